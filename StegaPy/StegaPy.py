@@ -18,22 +18,86 @@ with this program; if not, write to the Free Software Foundation, Inc.,
 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
+import contextlib
+import functools
 import gzip
-from typing import List, Optional
+import itertools
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union, BinaryIO
 from .config import StegaPyConfig
 from .plugin.base import StegaPyPlugin, Purpose
 from .plugin_manager import PluginManager
-from .util.crypto_util import CryptoUtil
+from .util.common_util import CommonUtil
+from .util.codec_util import CodecUtil
+from .util.dictionary_util import DictionaryUtil
+from .util.metrics_util import MetricsUtil
+from .util.performance_util import PerformanceUtil, StageTimings
+from .util.profile_util import ProfileUtil
 from .exceptions import StegaPyException, StegaPyErrors
+from .result import StegoResult
+
+if TYPE_CHECKING:
+    from .util.crypto_util import CryptoUtil
+    from .util.image_util import ImageSource
+
+
+def _isolated(method):
+    """在配置副本和新插件实例上执行调用，同一 StegaPy 实例可被多个线程并发使用。
+    
+    配置启用 collect_timings 时，同时收集本次调用的分阶段耗时，可通过 get_last_timings() 获取；
+    启用指标（MetricsUtil.enable()）时记录操作次数、结果和耗时；按 ProfileUtil 的设置对调用做
+    性能剖析，报告路径可通过 get_last_profile() 获取。
+    """
+    def call(self, args, kwargs):
+        if not self.isolate_calls:
+            return method(self, *args, **kwargs)
+        config = self.config.copy()
+        isolated = StegaPy(self.plugin.with_config(config), config, isolate_calls=False)
+        return method(isolated, *args, **kwargs)
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        collect_timings = self.config.is_collect_timings()
+        profile = ProfileUtil.should_profile(self.config)
+        if not collect_timings and not profile and not MetricsUtil.is_enabled():
+            return call(self, args, kwargs)
+        
+        start = time.perf_counter()
+        success = False
+        try:
+            with contextlib.ExitStack() as stack:
+                # 按线程保存，并发调用互不覆盖
+                if collect_timings:
+                    self._last_call.timings = stack.enter_context(PerformanceUtil.collect())
+                if profile:
+                    session = stack.enter_context(self._profile_session(method, args, kwargs))
+                    self._last_call.profile = session
+                result = call(self, args, kwargs)
+                if profile and method.__name__ == 'extract_data':
+                    session.tags['payload_size'] = len(result[1])
+            success = True
+            return result
+        finally:
+            MetricsUtil.record_operation(self.plugin.get_name(), method.__name__, success,
+                                         time.perf_counter() - start)
+    return wrapper
 
 
 class StegaPy:
     """StegaPy 核心调度与管理类，提供信息隐藏与水印功能的统一对外接口。"""
     
     NAMESPACE = "StegaPy"
+    # 流式处理的默认块大小（字节）
+    DEFAULT_CHUNK_SIZE = 64 * 1024
     
-    def __init__(self, plugin: StegaPyPlugin, config: StegaPyConfig):
-        """初始化 StegaPy 实例，绑定核心插件与系统配置。"""
+    def __init__(self, plugin: StegaPyPlugin, config: StegaPyConfig, isolate_calls: bool = True):
+        """初始化 StegaPy 实例，绑定核心插件与系统配置。
+        
+        isolate_calls 为 True（默认）时，每次调用都在配置副本和新插件实例上执行，
+        调用之间互不影响，传入的插件和配置也不会被修改。调用方已为每个请求创建
+        独立的插件和配置（并需要读取调用后的插件状态）时可设为 False。
+        """
         if plugin is None:
             raise StegaPyException(
                 "未指定插件",
@@ -49,11 +113,17 @@ class StegaPy:
         
         self.plugin = plugin
         self.config = config
+        self.isolate_calls = isolate_calls
+        self._last_call = threading.local()
     
+    @_isolated
     def embed_data(self, msg: bytes, msg_filename: Optional[str],
-                   cover: Optional[bytes], cover_filename: Optional[str],
-                   stego_filename: Optional[str]) -> bytes:
-        """将机密信息（Payload）嵌入至载体图像中，并返回隐写后的图像字节流。"""
+                   cover: Optional['ImageSource'], cover_filename: Optional[str],
+                   stego_filename: Optional[str], lazy: bool = False) -> Union[bytes, StegoResult]:
+        """将机密信息（Payload）嵌入至载体图像中，并返回隐写后的图像字节流。
+        
+        lazy 为 True 时返回 StegoResult，编码推迟到调用 encode()/save() 时（只需要像素时不编码）。
+        """
         if Purpose.DATA_HIDING not in self.plugin.get_purposes():
             raise StegaPyException(
                 "插件不支持数据隐藏",
@@ -64,29 +134,72 @@ class StegaPy:
         try:
             # 压缩数据（如果启用）
             if self.config.is_use_compression():
-                msg = self._compress_data(msg)
+                with PerformanceUtil.span('compress'):
+                    msg = self._compress_data(msg)
             
             # 加密数据（如果启用）
             if self.config.is_use_encryption():
-                if not self.config.get_password():
-                    raise StegaPyException(
-                        "加密需要密码",
-                        StegaPyErrors.INVALID_PASSWORD,
-                        self.NAMESPACE
-                    )
-                crypto = CryptoUtil(self.config.get_password(), 
-                                  self.config.get_encryption_algorithm())
-                msg = crypto.encrypt(msg)
+                with PerformanceUtil.span('encrypt'):
+                    msg = self._create_crypto("加密需要密码").encrypt(
+                        msg, self.plugin.get_associated_data(msg_filename))
             
             # 使用插件嵌入数据
-            return self.plugin.embed_data(msg, msg_filename, cover, 
-                                         cover_filename, stego_filename)
+            return self._embed_result(self.plugin.embed_data(msg, msg_filename, cover,
+                                                             cover_filename, stego_filename),
+                                      stego_filename, lazy)
+        except StegaPyException:
+            raise
+        except Exception as e:
+            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
+    
+    @_isolated
+    def embed_stream(self, source: Union[bytes, BinaryIO, Iterable[bytes]],
+                     msg_filename: Optional[str], cover: 'ImageSource',
+                     cover_filename: Optional[str], stego_filename: Optional[str],
+                     chunk_size: Optional[int] = None,
+                     lazy: bool = False) -> Union[bytes, StegoResult]:
+        """以流水线方式（压缩→加密→嵌入）按块嵌入机密信息，峰值内存与块大小而非信息大小成正比。
+        
+        source 可以是字节串、文件对象或数据块的可迭代对象；数据总长度在嵌入结束后回填到数据头。
+        输出与 embed_data() 格式相同，可用 extract_data() 提取；lazy 的含义与 embed_data() 相同。
+        """
+        if Purpose.DATA_HIDING not in self.plugin.get_purposes():
+            raise StegaPyException(
+                "插件不支持数据隐藏",
+                StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_DH,
+                self.NAMESPACE
+            )
+        
+        try:
+            chunks = CommonUtil.iter_chunks(source, chunk_size or self.DEFAULT_CHUNK_SIZE)
+            
+            # 压缩数据（如果启用），auto模式根据第一个数据块选择编解码器
+            if self.config.is_use_compression():
+                first = next(chunks, b'')
+                with PerformanceUtil.span('compress'):
+                    codec_id = self._select_codec(first)
+                chunks = CodecUtil.compress_stream(itertools.chain([first], chunks), codec_id,
+                                                   self.config.get_compression_threads(),
+                                                   self._get_compression_dictionary())
+                chunks = PerformanceUtil.iter_span('compress', chunks)
+            
+            # 加密数据（如果启用）
+            if self.config.is_use_encryption():
+                chunks = self._create_crypto("加密需要密码").encrypt_stream(
+                    chunks, self.plugin.get_associated_data(msg_filename))
+                chunks = PerformanceUtil.iter_span('encrypt', chunks)
+            
+            # 使用插件逐块嵌入数据
+            return self._embed_result(self.plugin.embed_stream(chunks, msg_filename, cover,
+                                                               cover_filename, stego_filename),
+                                      stego_filename, lazy)
         except StegaPyException:
             raise
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
-    def extract_data(self, stego_data: bytes, 
+    @_isolated
+    def extract_data(self, stego_data: 'ImageSource', 
                     stego_filename: Optional[str]) -> List:
         """从隐写后的图像数据中提取并还原隐藏的机密信息。"""
         if Purpose.DATA_HIDING not in self.plugin.get_purposes():
@@ -97,25 +210,24 @@ class StegaPy:
             )
         
         try:
+            # 文件名和数据分两次从插件读取，先解码为像素数组，避免重复解码
+            from .util.image_util import ImageUtil
+            stego_data = ImageUtil.byte_array_to_pixels(stego_data, stego_filename, writable=False)
+            
             # 提取数据
             msg_filename = self.plugin.extract_msg_filename(stego_data, stego_filename)
             msg = self.plugin.extract_data(stego_data, stego_filename, None)
             
             # 解密数据（如果启用）
             if self.config.is_use_encryption():
-                if not self.config.get_password():
-                    raise StegaPyException(
-                        "解密需要密码",
-                        StegaPyErrors.INVALID_PASSWORD,
-                        self.NAMESPACE
-                    )
-                crypto = CryptoUtil(self.config.get_password(),
-                                  self.config.get_encryption_algorithm())
-                msg = crypto.decrypt(msg)
+                with PerformanceUtil.span('decrypt'):
+                    msg = self._create_crypto("解密需要密码").decrypt(
+                        msg, self.plugin.get_associated_data(msg_filename))
             
             # 解压数据（如果启用）
             if self.config.is_use_compression():
-                msg = self._decompress_data(msg)
+                with PerformanceUtil.span('decompress'):
+                    msg = self._decompress_data(msg)
             
             return [msg_filename, msg]
         except StegaPyException:
@@ -123,10 +235,53 @@ class StegaPy:
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
+    @_isolated
+    def extract_to(self, stego_data: 'ImageSource', sink: BinaryIO,
+                   stego_filename: Optional[str] = None,
+                   chunk_size: Optional[int] = None) -> str:
+        """以流水线方式（提取→解密→解压）按块提取机密信息并写入可写流，返回消息文件名。
+        
+        sink 可以是任何带 write 方法的对象（文件、套接字缓冲、zip 条目等），内存占用与块大小成正比，
+        首批数据在整体解码完成前即可写出。AES-GCM 加密的数据在认证通过后才解压、写出，被篡改时 sink
+        中不会写入任何内容；其他情况下解密或解压失败时异常可能在写出部分数据后抛出，调用方应丢弃已写内容。
+        """
+        if Purpose.DATA_HIDING not in self.plugin.get_purposes():
+            raise StegaPyException(
+                "插件不支持数据隐藏",
+                StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_DH,
+                self.NAMESPACE
+            )
+        
+        try:
+            # 提取数据（数据头在此解析，并据此更新配置）
+            msg_filename, chunks = self.plugin.extract_stream(
+                stego_data, stego_filename, chunk_size or self.DEFAULT_CHUNK_SIZE)
+            
+            # 解密数据（如果启用）
+            if self.config.is_use_encryption():
+                chunks = self._create_crypto("解密需要密码").decrypt_stream(
+                    chunks, self.plugin.get_associated_data(msg_filename))
+                chunks = PerformanceUtil.iter_span('decrypt', chunks)
+            
+            # 解压数据（如果启用）
+            if self.config.is_use_compression():
+                chunks = self._decompress_stream(chunks, chunk_size or self.DEFAULT_CHUNK_SIZE)
+                chunks = PerformanceUtil.iter_span('decompress', chunks)
+            
+            for chunk in chunks:
+                sink.write(chunk)
+            
+            return msg_filename
+        except StegaPyException:
+            raise
+        except Exception as e:
+            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
+    
+    @_isolated
     def embed_mark(self, sig: bytes, sig_filename: Optional[str],
-                   cover: Optional[bytes], cover_filename: Optional[str],
-                   stego_filename: Optional[str]) -> bytes:
-        """将数字水印（签名）嵌入至载体图像中。"""
+                   cover: Optional['ImageSource'], cover_filename: Optional[str],
+                   stego_filename: Optional[str], lazy: bool = False) -> Union[bytes, StegoResult]:
+        """将数字水印（签名）嵌入至载体图像中；lazy 的含义与 embed_data() 相同。"""
         if Purpose.WATERMARKING not in self.plugin.get_purposes():
             raise StegaPyException(
                 "插件不支持水印",
@@ -136,14 +291,16 @@ class StegaPy:
         
         try:
             # 水印不使用压缩和加密
-            return self.plugin.embed_data(sig, sig_filename, cover,
-                                         cover_filename, stego_filename)
+            return self._embed_result(self.plugin.embed_data(sig, sig_filename, cover,
+                                                             cover_filename, stego_filename),
+                                      stego_filename, lazy)
         except StegaPyException:
             raise
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
-    def check_mark(self, stego_data: bytes, stego_filename: Optional[str],
+    @_isolated
+    def check_mark(self, stego_data: 'ImageSource', stego_filename: Optional[str],
                    orig_sig_data: bytes) -> float:
         """验证目标图像中是否包含指定的数字水印，并返回相关性得分。"""
         if Purpose.WATERMARKING not in self.plugin.get_purposes():
@@ -163,6 +320,7 @@ class StegaPy:
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
+    @_isolated
     def generate_signature(self) -> bytes:
         """生成用于验证的数字水印签名数据。"""
         if Purpose.WATERMARKING not in self.plugin.get_purposes():
@@ -181,8 +339,9 @@ class StegaPy:
         
         return self.plugin.generate_signature()
     
-    def get_diff(self, stego_data: bytes, stego_filename: Optional[str],
-                 cover_data: bytes, cover_filename: Optional[str],
+    @_isolated
+    def get_diff(self, stego_data: 'ImageSource', stego_filename: Optional[str],
+                 cover_data: 'ImageSource', cover_filename: Optional[str],
                  diff_filename: Optional[str]) -> bytes:
         """计算并获取原始载体图像与隐写后图像之间的视觉差异。"""
         return self.plugin.get_diff(stego_data, stego_filename,
@@ -192,12 +351,168 @@ class StegaPy:
         """获取当前实例运行的配置项。"""
         return self.config
     
+    def get_last_timings(self) -> Optional[StageTimings]:
+        """获取当前线程最近一次调用的分阶段耗时（需启用配置项 collect_timings）。
+        
+        流式调用中各阶段按数据块计时，下游阶段的耗时包含从上游取数据块的时间。
+        """
+        return getattr(self._last_call, 'timings', None)
+    
+    def get_last_profile(self) -> Optional[dict]:
+        """获取当前线程最近一次被剖析的调用的报告路径 {'prof': ..., 'alloc': ...}。"""
+        session = getattr(self._last_call, 'profile', None)
+        return session.paths if session is not None else None
+    
+    # 方法名 -> (图像参数名, 负载参数名)，用于性能剖析报告的标签
+    _PROFILE_ARGUMENTS = {
+        'embed_data': ('cover', 'msg'),
+        'embed_stream': ('cover', None),
+        'extract_data': ('stego_data', None),
+        'extract_to': ('stego_data', None),
+        'embed_mark': ('cover', 'sig'),
+        'check_mark': ('stego_data', 'orig_sig_data'),
+        'get_diff': ('stego_data', None),
+    }
+    
+    def _profile_session(self, method, args, kwargs):
+        """创建性能剖析会话，以插件、操作、图像和负载大小为标签"""
+        import inspect
+        
+        image_name, payload_name = self._PROFILE_ARGUMENTS.get(method.__name__, (None, None))
+        arguments = inspect.signature(method).bind(self, *args, **kwargs).arguments
+        payload = arguments.get(payload_name) if payload_name else None
+        return ProfileUtil.profile(
+            self.plugin.get_name(), method.__name__, self.config.get_profile_dir(),
+            image=arguments.get(image_name) if image_name else None,
+            payload_size=len(payload) if isinstance(payload, (bytes, bytearray)) else None)
+    
+    @staticmethod
+    def _embed_result(result: Union[bytes, StegoResult], stego_filename: Optional[str],
+                      lazy: bool) -> Union[bytes, StegoResult]:
+        """将插件的嵌入结果转换为 StegoResult（lazy）或编码后的字节串，兼容直接返回字节串的插件"""
+        if lazy:
+            return result if isinstance(result, StegoResult) else StegoResult(result, stego_filename)
+        return result.encode() if isinstance(result, StegoResult) else result
+    
+    def _create_crypto(self, missing_password_message: str) -> 'CryptoUtil':
+        """按配置创建加解密工具，未设置密码时抛出异常。"""
+        # cryptography 仅在启用加密时导入
+        from .util.crypto_util import CryptoUtil
+        
+        if not self.config.get_password():
+            raise StegaPyException(
+                missing_password_message,
+                StegaPyErrors.INVALID_PASSWORD,
+                self.NAMESPACE
+            )
+        if self.config.get_kdf_iterations() > self.config.get_max_kdf_iterations():
+            raise StegaPyException(
+                f"密钥派生迭代次数 {self.config.get_kdf_iterations()} 超过上限 "
+                f"{self.config.get_max_kdf_iterations()}",
+                StegaPyErrors.KDF_ITERATIONS_TOO_HIGH,
+                self.NAMESPACE
+            )
+        return CryptoUtil(self.config.get_password(),
+                          self.config.get_encryption_algorithm(),
+                          self.config.get_kdf_iterations())
+    
     def _compress_data(self, data: bytes) -> bytes:
-        """使用 gzip 算法对数据进行压缩。"""
-        return gzip.compress(data)
+        """使用配置的编解码器压缩数据，并记录实际使用的编解码器ID（写入数据头）。"""
+        zdict = self._get_compression_dictionary()
+        codec_id, compressed = CodecUtil.select_and_compress(
+            data, self.config.get_compression_codec(), self.config.get_compression_cpu_budget(),
+            self.config.is_compression_probe(), self.config.get_compression_threads(), zdict)
+        self._set_payload_codec_id(codec_id, zdict)
+        return compressed
+    
+    def _select_codec(self, sample: bytes) -> int:
+        """为流式压缩选择编解码器，可压缩性探测和auto模式均以样本数据为准。"""
+        zdict = self._get_compression_dictionary()
+        codec_id = CodecUtil.get_codec_id(self.config.get_compression_codec())
+        if self.config.is_compression_probe() and not CodecUtil.is_compressible(sample, zdict):
+            codec_id = CodecUtil.CODEC_STORED
+        elif codec_id is None:
+            codec_id, _ = CodecUtil.select_and_compress(
+                sample, CodecUtil.AUTO, self.config.get_compression_cpu_budget(), zdict=zdict)
+        self._set_payload_codec_id(codec_id, zdict)
+        return codec_id
+    
+    def _get_compression_dictionary(self) -> Optional[bytes]:
+        """获取嵌入时使用的预设字典，并确保其已注册（同一进程内提取时可直接查到）。"""
+        dictionary = self.config.get_compression_dictionary()
+        if not dictionary:
+            if CodecUtil.get_codec_id(self.config.get_compression_codec()) == CodecUtil.CODEC_ZDICT:
+                raise StegaPyException("zdict编解码器需要预设字典",
+                                       StegaPyErrors.UNKNOWN_DICTIONARY, self.NAMESPACE)
+            return None
+        return DictionaryUtil.get(DictionaryUtil.register(dictionary))
+    
+    def _set_payload_codec_id(self, codec_id: int, zdict: Optional[bytes]):
+        """记录实际使用的编解码器ID及预设字典ID（写入数据头）。"""
+        self.config.set_payload_codec_id(codec_id)
+        if codec_id == CodecUtil.CODEC_ZDICT:
+            self.config.set_payload_dictionary_id(DictionaryUtil.get_dictionary_id(zdict))
+        else:
+            self.config.set_payload_dictionary_id(None)
+    
+    def _get_payload_dictionary(self) -> Optional[bytes]:
+        """按数据头中的字典ID从注册表中查找预设字典（仅zdict编解码器）。"""
+        if self._get_payload_codec_id() != CodecUtil.CODEC_ZDICT:
+            return None
+        
+        dict_id = self.config.get_payload_dictionary_id()
+        if self.config.get_compression_dictionary():
+            # 配置中提供的字典同样可用，先注册再查找
+            DictionaryUtil.register(self.config.get_compression_dictionary())
+        dictionary = DictionaryUtil.get(dict_id) if dict_id is not None else None
+        if dictionary is None:
+            raise StegaPyException(
+                f"未找到ID为 {dict_id or 0:#010x} 的预设字典，请先注册嵌入时使用的字典",
+                StegaPyErrors.UNKNOWN_DICTIONARY,
+                self.NAMESPACE
+            )
+        return dictionary
+    
+    def _get_payload_codec_id(self) -> int:
+        """获取提取到的负载所用的编解码器ID（由数据头解析得到）。"""
+        codec_id = self.config.get_payload_codec_id()
+        return codec_id if codec_id is not None else CodecUtil.CODEC_GZIP
+    
+    def _decompress_stream(self, chunks: Iterable[bytes],
+                           chunk_size: int) -> Iterable[bytes]:
+        """按数据头中的编解码器增量解压数据块，每次输出不超过 chunk_size 字节。"""
+        codec_id = self._get_payload_codec_id()
+        zdict = self._get_payload_dictionary()
+        
+        def checked_chunks():
+            checked = codec_id != CodecUtil.CODEC_GZIP
+            for chunk in chunks:
+                # 检查数据是否是有效的 gzip 格式（以 \x1f\x8b 开头）
+                if not checked and len(chunk) > 0:
+                    if bytes(chunk[:2]) != b'\x1f\x8b'[:len(chunk)]:
+                        raise StegaPyException(
+                            "数据不是有效的 gzip 格式。请检查：\n"
+                            "1. 嵌入数据时是否启用了压缩\n"
+                            "2. 提取数据时的压缩设置是否与嵌入时一致",
+                            StegaPyErrors.CORRUPT_DATA,
+                            self.NAMESPACE
+                        )
+                    checked = True
+                yield chunk
+        
+        try:
+            yield from CodecUtil.decompress_stream(checked_chunks(), codec_id, chunk_size,
+                                                   self.config.get_compression_threads(), zdict)
+        except ValueError as e:
+            raise StegaPyException(
+                f"{str(e)}\n"
+                "请检查压缩设置是否与嵌入时一致",
+                StegaPyErrors.CORRUPT_DATA,
+                self.NAMESPACE
+            )
     
     def _decompress_data(self, data: bytes) -> bytes:
-        """使用 gzip 算法对数据进行解压，并包含基础的数据校验。"""
+        """按数据头中的编解码器对数据进行解压，并包含基础的数据校验。"""
         # 检查数据是否为空
         if not data or len(data) == 0:
             raise StegaPyException(
@@ -206,6 +521,19 @@ class StegaPy:
                 self.NAMESPACE
             )
         
+        codec_id = self._get_payload_codec_id()
+        if codec_id != CodecUtil.CODEC_GZIP:
+            try:
+                return CodecUtil.decompress(data, codec_id, self.config.get_compression_threads(),
+                                            self._get_payload_dictionary())
+            except ValueError as e:
+                raise StegaPyException(
+                    f"{str(e)}（编解码器: {CodecUtil.get_codec_name(codec_id)}）\n"
+                    "请检查压缩设置是否与嵌入时一致",
+                    StegaPyErrors.CORRUPT_DATA,
+                    self.NAMESPACE
+                )
+        
         # 检查数据是否是有效的 gzip 格式
         # gzip 文件以 \x1f\x8b 开头
         if len(data) < 2 or data[:2] != b'\x1f\x8b':
@@ -22,10 +22,33 @@ with this program; if not, write to the Free Software Foundation, Inc.,
 __version__ = "1.0.0"
 __author__ = "MearaY"
 
+import importlib
+
 from .StegaPy import StegaPy
 from .config import StegaPyConfig
 from .plugin.base import StegaPyPlugin, Purpose
 from .plugin_manager import PluginManager
-
-__all__ = ['StegaPy', 'StegaPyConfig', 'StegaPyPlugin', 'Purpose', 'PluginManager']
-
+from .result import StegoResult
+
+# 异步接口和批量接口依赖 asyncio、multiprocessing 等模块，按需导入
+_LAZY_IMPORTS = {
+    'AsyncStegaPy': '.async_stegapy',
+    'BatchProcessor': '.batch',
+    'BatchResult': '.batch',
+    'EmbedJob': '.batch',
+    'ExtractJob': '.batch',
+    'embed_many': '.batch',
+    'extract_many': '.batch',
+}
+
+__all__ = ['StegaPy', 'StegaPyConfig', 'StegaPyPlugin', 'Purpose', 'PluginManager', 'StegoResult',
+           'AsyncStegaPy', 'BatchProcessor', 'BatchResult', 'EmbedJob', 'ExtractJob', 'embed_many', 'extract_many']
+
+
+def __getattr__(name):
+    """按需导入异步接口和批量接口"""
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,8 @@
+"""
+命令行入口: python -m StegaPy
+"""
+
+import sys
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+StegaPy 异步接口
+
+Copyright (C) 2025  MearaY
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along
+with this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Union
+from .StegaPy import StegaPy
+from .config import StegaPyConfig
+from .plugin.base import StegaPyPlugin, Purpose
+from .plugin_manager import PluginManager
+from .exceptions import StegaPyException, StegaPyErrors
+
+
+def _init_worker():
+    """工作进程初始化：预先加载插件"""
+    PluginManager.preload()
+
+
+def _run_stage(stage, plugin, config, *args):
+    """在执行器中运行单个处理阶段，返回 (结果, 配置)
+    
+    plugin 为插件名称或插件对象（仅限线程执行器），每个阶段使用独立的插件实例；阶段中对配置的修改
+    （如从数据头解析出的压缩、加密标志）随结果一并返回，供后续阶段使用。该函数及各阶段函数均位于
+    模块顶层，可在进程池中执行。
+    """
+    if isinstance(plugin, str):
+        name, plugin = plugin, PluginManager.create_plugin(plugin, config)
+        if plugin is None:
+            raise StegaPyException(f"未知的插件: {name}",
+                                   StegaPyErrors.NO_PLUGIN_SPECIFIED, AsyncStegaPy.NAMESPACE)
+    else:
+        plugin = plugin.with_config(config)
+    stegapy = StegaPy(plugin, config, isolate_calls=False)
+    try:
+        return stage(stegapy, *args), config
+    except StegaPyException:
+        raise
+    except Exception as e:
+        raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, StegaPy.NAMESPACE)
+
+
+def _compress_stage(stegapy, msg):
+    """压缩阶段"""
+    return stegapy._compress_data(msg)
+
+
+def _encrypt_stage(stegapy, msg, msg_filename):
+    """加密阶段"""
+    return stegapy._create_crypto("加密需要密码").encrypt(
+        msg, stegapy.plugin.get_associated_data(msg_filename))
+
+
+def _embed_stage(stegapy, msg, msg_filename, cover, cover_filename, stego_filename):
+    """嵌入阶段"""
+    stego = stegapy.plugin.embed_data(msg, msg_filename, cover, cover_filename, stego_filename)
+    # 在执行器中完成编码，跨进程只传递字节串
+    return StegaPy._embed_result(stego, stego_filename, lazy=False)
+
+
+def _extract_stage(stegapy, stego_data, stego_filename):
+    """提取阶段，解析数据头并返回 [文件名, 数据]"""
+    msg_filename = stegapy.plugin.extract_msg_filename(stego_data, stego_filename)
+    msg = stegapy.plugin.extract_data(stego_data, stego_filename, None)
+    return [msg_filename, msg]
+
+
+def _decrypt_stage(stegapy, msg, msg_filename):
+    """解密阶段"""
+    return stegapy._create_crypto("解密需要密码").decrypt(
+        msg, stegapy.plugin.get_associated_data(msg_filename))
+
+
+def _decompress_stage(stegapy, msg):
+    """解压阶段"""
+    return stegapy._decompress_data(msg)
+
+
+def _embed_mark_stage(stegapy, sig, sig_filename, cover, cover_filename, stego_filename):
+    """嵌入水印"""
+    return stegapy.embed_mark(sig, sig_filename, cover, cover_filename, stego_filename)
+
+
+def _check_mark_stage(stegapy, stego_data, stego_filename, orig_sig_data):
+    """检查水印"""
+    return stegapy.check_mark(stego_data, stego_filename, orig_sig_data)
+
+
+class AsyncStegaPy:
+    """StegaPy 的 asyncio 接口，CPU密集的处理在线程池或进程池中执行，不阻塞事件循环。
+    
+    - 并发限制：同时执行的操作数不超过 max_concurrency，其余操作在信号量上等待；
+    - 超时：超过 timeout 秒（包括排队等待的时间）时抛出 asyncio.TimeoutError；
+    - 取消：嵌入/提取按阶段（压缩、加密、嵌入 / 提取、解密、解压）分别提交到执行器，
+      协程被取消或超时后不会再启动后续阶段，尚未开始执行的阶段也会被撤销。
+    
+    每次调用使用配置的独立副本，并发调用之间互不影响。
+    """
+    
+    NAMESPACE = "AsyncStegaPy"
+    
+    # 线程执行器中使用的插件对象，None 表示按名称创建插件
+    _plugin = None
+    
+    def __init__(self, plugin: Union[str, StegaPyPlugin], config: Optional[StegaPyConfig] = None,
+                 executor: Union[str, Executor] = "thread", max_workers: Optional[int] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        """初始化异步接口
+        
+        Args:
+            plugin: 插件名称或插件对象。传入插件对象时默认使用其当前配置；线程执行器中各阶段使用
+                该对象的副本（with_config），因此不必在 PluginManager 中注册，进程池中则按名称
+                创建插件，插件须已注册
+            config: 配置，默认使用插件对象的配置或按名称创建时插件的默认配置
+            executor: "thread"、"process" 或已有的执行器（由调用方负责关闭）
+            max_workers: 自建执行器的工作线程/进程数，默认为CPU核数
+            max_concurrency: 同时执行的操作数上限，默认与工作线程/进程数相同
+            timeout: 每个操作的默认超时时间（秒），None 表示不限制
+        """
+        use_process = executor == "process" or isinstance(executor, ProcessPoolExecutor)
+        if isinstance(plugin, str):
+            self.plugin_name = plugin
+            plugin = PluginManager.get_plugin_by_name(plugin)
+            default_config = plugin.create_config() if plugin is not None else None
+        else:
+            self.plugin_name = plugin.get_name()
+            default_config = plugin.get_config()
+            if not use_process:
+                self._plugin = plugin
+            elif PluginManager.get_plugin_by_name(self.plugin_name) is None:
+                # 插件对象不一定可以序列化，进程池中按名称创建
+                plugin = None
+        if plugin is None:
+            raise StegaPyException(f"未知的插件: {self.plugin_name}",
+                                   StegaPyErrors.NO_PLUGIN_SPECIFIED, self.NAMESPACE)
+        self.purposes = plugin.get_purposes()
+        self.config = config or default_config
+        self.timeout = timeout
+        
+        workers = max_workers or os.cpu_count() or 1
+        if isinstance(executor, Executor):
+            self._executor = executor
+            self._owns_executor = False
+        elif executor == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+            self._owns_executor = True
+        elif executor == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            self._owns_executor = True
+        else:
+            raise ValueError(f"不支持的执行器类型: {executor}")
+        
+        self.max_concurrency = max_concurrency or workers
+        # 信号量在事件循环中首次使用时创建（Python 3.8 的信号量创建时即绑定事件循环）
+        self._semaphore = None
+    
+    async def embed_data(self, msg: bytes, msg_filename: Optional[str],
+                         cover: Optional[bytes], cover_filename: Optional[str],
+                         stego_filename: Optional[str], timeout: Optional[float] = None) -> bytes:
+        """异步嵌入数据，参数与 StegaPy.embed_data 相同"""
+        self._require_purpose(Purpose.DATA_HIDING)
+        
+        async def run():
+            config = self.config.copy()
+            data = msg
+            if config.is_use_compression():
+                data, config = await self._run_stage(_compress_stage, config, data)
+            if config.is_use_encryption():
+                data, config = await self._run_stage(_encrypt_stage, config, data, msg_filename)
+            stego, _ = await self._run_stage(_embed_stage, config, data, msg_filename,
+                                             cover, cover_filename, stego_filename)
+            return stego
+        
+        return await self._limit(run(), timeout)
+    
+    async def extract_data(self, stego_data: bytes, stego_filename: Optional[str],
+                           timeout: Optional[float] = None) -> List:
+        """异步提取数据，返回 [文件名, 数据]"""
+        self._require_purpose(Purpose.DATA_HIDING)
+        
+        async def run():
+            (msg_filename, msg), config = await self._run_stage(
+                _extract_stage, self.config.copy(), stego_data, stego_filename)
+            # 压缩、加密标志已从数据头解析到 config 中
+            if config.is_use_encryption():
+                msg, config = await self._run_stage(_decrypt_stage, config, msg, msg_filename)
+            if config.is_use_compression():
+                msg, config = await self._run_stage(_decompress_stage, config, msg)
+            return [msg_filename, msg]
+        
+        return await self._limit(run(), timeout)
+    
+    async def embed_mark(self, sig: bytes, sig_filename: Optional[str],
+                         cover: Optional[bytes], cover_filename: Optional[str],
+                         stego_filename: Optional[str], timeout: Optional[float] = None) -> bytes:
+        """异步嵌入水印"""
+        self._require_purpose(Purpose.WATERMARKING)
+        
+        async def run():
+            stego, _ = await self._run_stage(_embed_mark_stage, self.config.copy(), sig,
+                                             sig_filename, cover, cover_filename, stego_filename)
+            return stego
+        
+        return await self._limit(run(), timeout)
+    
+    async def check_mark(self, stego_data: bytes, stego_filename: Optional[str],
+                         orig_sig_data: bytes, timeout: Optional[float] = None) -> float:
+        """异步检查水印，返回相关性得分"""
+        self._require_purpose(Purpose.WATERMARKING)
+        
+        async def run():
+            correl, _ = await self._run_stage(_check_mark_stage, self.config.copy(),
+                                              stego_data, stego_filename, orig_sig_data)
+            return correl
+        
+        return await self._limit(run(), timeout)
+    
+    def _require_purpose(self, purpose: Purpose):
+        """检查插件是否支持指定用途"""
+        if purpose in self.purposes:
+            return
+        if purpose == Purpose.DATA_HIDING:
+            raise StegaPyException("插件不支持数据隐藏",
+                                   StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_DH, self.NAMESPACE)
+        raise StegaPyException("插件不支持水印",
+                               StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_WM, self.NAMESPACE)
+    
+    async def _limit(self, coro, timeout: Optional[float]):
+        """在并发限制和超时控制下执行操作"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def guarded():
+            async with self._semaphore:
+                return await coro
+        
+        return await asyncio.wait_for(guarded(), self.timeout if timeout is None else timeout)
+    
+    async def _run_stage(self, stage, config: StegaPyConfig, *args):
+        """将单个阶段提交到执行器"""
+        loop = asyncio.get_running_loop()
+        plugin = self._plugin if self._plugin is not None else self.plugin_name
+        call = functools.partial(_run_stage, stage, plugin, config, *args)
+        return await loop.run_in_executor(self._executor, call)
+    
+    def close(self, wait: bool = True):
+        """关闭自建的执行器"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=wait)
+    
+    async def aclose(self):
+        """异步关闭自建的执行器，等待时不阻塞事件循环"""
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+    
+    async def __aenter__(self):
+        """进入异步上下文"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """退出异步上下文时关闭执行器"""
+        await self.aclose()
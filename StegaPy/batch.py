@@ -0,0 +1,329 @@
+"""
+批量嵌入/提取
+
+Copyright (C) 2025  MearaY
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along
+with this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+from .StegaPy import StegaPy
+from .config import StegaPyConfig
+from .plugin_manager import PluginManager
+from .exceptions import StegaPyException, StegaPyErrors
+
+NAMESPACE = "Batch"
+
+
+class EmbedJob:
+    """批量嵌入任务"""
+    
+    def __init__(self, msg: bytes, cover: bytes, plugin: str = 'LSB',
+                 msg_filename: Optional[str] = None, cover_filename: Optional[str] = None,
+                 stego_filename: Optional[str] = None,
+                 config: Union[StegaPyConfig, Dict[str, Any], None] = None,
+                 job_id: Any = None):
+        """初始化嵌入任务
+        
+        Args:
+            msg: 待嵌入的数据
+            cover: 载体图像数据
+            plugin: 插件名称
+            msg_filename: 数据文件名（写入数据头）
+            cover_filename: 载体文件名
+            stego_filename: 输出文件名（决定输出格式）
+            config: 任务配置，可以是配置对象、配置参数字典或 None（使用插件默认配置）
+            job_id: 调用方自定义的任务标识，原样返回在结果中
+        """
+        self.msg = msg
+        self.cover = cover
+        self.plugin = plugin
+        self.msg_filename = msg_filename
+        self.cover_filename = cover_filename
+        self.stego_filename = stego_filename
+        self.config = config
+        self.job_id = job_id
+
+
+class ExtractJob:
+    """批量提取任务"""
+    
+    def __init__(self, stego_data: bytes, plugin: str = 'LSB',
+                 stego_filename: Optional[str] = None,
+                 config: Union[StegaPyConfig, Dict[str, Any], None] = None,
+                 job_id: Any = None):
+        """初始化提取任务
+        
+        Args:
+            stego_data: 隐写图像数据
+            plugin: 插件名称
+            stego_filename: 隐写图像文件名
+            config: 任务配置，可以是配置对象、配置参数字典或 None（使用插件默认配置）
+            job_id: 调用方自定义的任务标识，原样返回在结果中
+        """
+        self.stego_data = stego_data
+        self.plugin = plugin
+        self.stego_filename = stego_filename
+        self.config = config
+        self.job_id = job_id
+
+
+class BatchResult:
+    """批量任务的结果，任务失败时异常作为值返回而不是抛出"""
+    
+    def __init__(self, index: int, job, value=None, error: Optional[Exception] = None,
+                 elapsed: float = 0.0):
+        """初始化结果
+        
+        Args:
+            index: 任务在输入序列中的位置
+            job: 对应的任务对象（参数字典无法转换为任务时为该字典）
+            value: 嵌入任务为隐写图像数据，提取任务为 [文件名, 数据]
+            error: 任务失败时的异常
+            elapsed: 任务在工作进程中的耗时（秒）
+        """
+        self.index = index
+        self.job = job
+        self.job_id = job.get('job_id') if isinstance(job, dict) else getattr(job, 'job_id', None)
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed
+    
+    @property
+    def ok(self) -> bool:
+        """任务是否成功"""
+        return self.error is None
+    
+    def get(self):
+        """获取结果值，任务失败时抛出对应的异常"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+    
+    def __repr__(self):
+        """返回结果的简要描述"""
+        status = "ok" if self.ok else f"error={self.error!r}"
+        return f"BatchResult(index={self.index}, job_id={self.job_id!r}, {status})"
+
+
+def init_worker():
+    """工作进程初始化：预先加载插件（及其依赖的numpy、PIL等），避免每个任务重复导入
+    
+    批量处理器和 HTTP 服务的进程池共用。
+    """
+    PluginManager.preload()
+
+
+def create_stegapy(plugin_name, config):
+    """在工作进程中为任务创建 StegaPy 实例（任务使用独立的插件实例和配置）
+    
+    Args:
+        plugin_name: 插件名称
+        config: 插件配置对象、配置参数字典或 None（使用插件的默认配置）
+    """
+    plugin = PluginManager.create_plugin(plugin_name)
+    if plugin is None:
+        raise StegaPyException(f"未知的插件: {plugin_name}",
+                               StegaPyErrors.NO_PLUGIN_SPECIFIED, NAMESPACE)
+    if isinstance(config, dict):
+        config = type(plugin.create_config())(**config)
+    if config is not None:
+        plugin.reset_config(config)
+    return StegaPy(plugin, plugin.get_config(), isolate_calls=False)
+
+
+def _run_job(func, job):
+    """执行任务并返回 (结果, 异常, 耗时)，异常作为值返回"""
+    start = time.perf_counter()
+    try:
+        return func(job), None, time.perf_counter() - start
+    except StegaPyException as e:
+        return None, e, time.perf_counter() - start
+    except Exception as e:
+        # 其他异常不一定能序列化，统一包装
+        error = StegaPyException(f"{type(e).__name__}: {e}",
+                                 StegaPyErrors.UNHANDLED_EXCEPTION, NAMESPACE)
+        return None, error, time.perf_counter() - start
+
+
+def _embed(job: EmbedJob):
+    """在工作进程中执行嵌入任务"""
+    stegapy = create_stegapy(job.plugin, job.config)
+    return stegapy.embed_data(job.msg, job.msg_filename, job.cover,
+                              job.cover_filename, job.stego_filename)
+
+
+def _extract(job: ExtractJob):
+    """在工作进程中执行提取任务"""
+    stegapy = create_stegapy(job.plugin, job.config)
+    return stegapy.extract_data(job.stego_data, job.stego_filename)
+
+
+def _embed_job(job: EmbedJob):
+    """工作进程入口：嵌入"""
+    return _run_job(_embed, job)
+
+
+def _extract_job(job: ExtractJob):
+    """工作进程入口：提取"""
+    return _run_job(_extract, job)
+
+
+class BatchProcessor:
+    """批量嵌入/提取处理器
+    
+    任务分发到预先加载了 StegaPy 和插件的工作进程池中执行。同时处理中的任务数
+    （包括按提交顺序输出时暂存的结果）不超过 max_in_flight，任务按需从输入中读取，
+    内存占用与批量大小无关。处理器可跨多次调用复用，使用完毕后应调用 close()。
+    """
+    
+    def __init__(self, workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        """初始化处理器
+        
+        Args:
+            workers: 工作进程数，默认为CPU核数
+            max_in_flight: 同时处理中的任务数上限，默认为工作进程数的2倍
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max(1, max_in_flight or self.workers * 2)
+        self._executor = None
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """获取（必要时创建）进程池"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 initializer=init_worker)
+        return self._executor
+    
+    def embed_many(self, jobs: Iterable[Union[EmbedJob, Dict[str, Any]]],
+                   ordered: bool = False) -> Iterator[BatchResult]:
+        """批量嵌入
+        
+        Args:
+            jobs: 嵌入任务（EmbedJob 或其参数字典）的可迭代对象
+            ordered: True 时按提交顺序输出结果，否则按完成顺序输出
+        """
+        return self._run(_embed_job, EmbedJob, jobs, ordered)
+    
+    def extract_many(self, jobs: Iterable[Union[ExtractJob, Dict[str, Any]]],
+                     ordered: bool = False) -> Iterator[BatchResult]:
+        """批量提取，结果值为 [文件名, 数据]
+        
+        Args:
+            jobs: 提取任务（ExtractJob 或其参数字典）的可迭代对象
+            ordered: True 时按提交顺序输出结果，否则按完成顺序输出
+        """
+        return self._run(_extract_job, ExtractJob, jobs, ordered)
+    
+    @staticmethod
+    def _to_job(job_class, job):
+        """将参数字典转换为任务对象"""
+        return job_class(**job) if isinstance(job, dict) else job
+    
+    def _run(self, func, job_class, jobs, ordered) -> Iterator[BatchResult]:
+        """分发任务并按需输出结果，参数无效的任务作为该任务的失败结果输出"""
+        executor = self._get_executor()
+        jobs = enumerate(jobs)
+        pending = {}
+        finished = {}
+        next_index = 0
+        exhausted = False
+        
+        try:
+            while True:
+                # 补充任务，直到达到处理中任务数上限
+                while not exhausted and len(pending) + len(finished) < self.max_in_flight:
+                    item = next(jobs, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    index, job = item
+                    try:
+                        job = self._to_job(job_class, job)
+                    except Exception as e:
+                        # 缺少或多出参数等，与工作进程中的失败一样按任务返回
+                        error = StegaPyException(f"无效的任务参数: {type(e).__name__}: {e}",
+                                                 StegaPyErrors.UNHANDLED_EXCEPTION, NAMESPACE)
+                        result = BatchResult(index, job, error=error)
+                        if not ordered:
+                            yield result
+                        else:
+                            finished[index] = result
+                        continue
+                    pending[executor.submit(func, job)] = (index, job)
+                
+                if pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, job = pending.pop(future)
+                        result = self._to_result(future, index, job)
+                        if not ordered:
+                            yield result
+                        else:
+                            finished[index] = result
+                
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+                
+                if not pending and exhausted:
+                    break
+        finally:
+            # 调用方提前停止迭代时取消尚未开始的任务
+            for future in pending:
+                future.cancel()
+    
+    @staticmethod
+    def _to_result(future, index, job) -> BatchResult:
+        """将工作进程的返回值转换为结果对象"""
+        try:
+            value, error, elapsed = future.result()
+        except Exception as e:
+            # 工作进程崩溃或任务无法序列化等
+            error = StegaPyException(f"{type(e).__name__}: {e}",
+                                     StegaPyErrors.UNHANDLED_EXCEPTION, NAMESPACE)
+            return BatchResult(index, job, error=error)
+        return BatchResult(index, job, value, error, elapsed)
+    
+    def close(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def __enter__(self):
+        """进入上下文"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """退出上下文时关闭进程池"""
+        self.close()
+
+
+def embed_many(jobs: Iterable[Union[EmbedJob, Dict[str, Any]]], workers: Optional[int] = None,
+               max_in_flight: Optional[int] = None, ordered: bool = False) -> Iterator[BatchResult]:
+    """使用临时进程池批量嵌入，参数含义见 BatchProcessor"""
+    with BatchProcessor(workers, max_in_flight) as processor:
+        yield from processor.embed_many(jobs, ordered)
+
+
+def extract_many(jobs: Iterable[Union[ExtractJob, Dict[str, Any]]], workers: Optional[int] = None,
+                 max_in_flight: Optional[int] = None, ordered: bool = False) -> Iterator[BatchResult]:
+    """使用临时进程池批量提取，参数含义见 BatchProcessor"""
+    with BatchProcessor(workers, max_in_flight) as processor:
+        yield from processor.extract_many(jobs, ordered)
@@ -0,0 +1,506 @@
+"""
+StegaPy 命令行工具
+
+Copyright (C) 2025  MearaY
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along
+with this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from . import __version__
+from .StegaPy import StegaPy
+from .plugin_manager import PluginManager
+from .exceptions import StegaPyException, StegaPyErrors
+
+NAMESPACE = "CLI"
+
+PASSWORD_ENV = "STEGAPY_PASSWORD"
+# 与 CryptoUtil.ALGORITHMS 相同；不从 CryptoUtil 导入，避免命令行启动时加载 cryptography
+ENCRYPTION_ALGORITHMS = ('AES128', 'AES256', 'A128GCM', 'A256GCM')
+
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+
+class Task:
+    """单个文件的处理任务"""
+    
+    def __init__(self, source: str, output: Optional[str], dependencies: List[str]):
+        """初始化任务
+        
+        Args:
+            source: 输入文件
+            output: 输出路径（check 命令为 None）
+            dependencies: 决定输出是否过期的文件（输入文件、消息/签名文件）
+        """
+        self.source = source
+        self.output = output
+        self.dependencies = dependencies
+
+
+def _init_worker():
+    """工作进程初始化：预先加载插件"""
+    PluginManager.preload()
+
+
+def _create_stegapy(options: Dict[str, Any]) -> StegaPy:
+    """根据命令行选项创建 StegaPy 实例"""
+    plugin = PluginManager.create_plugin(options['plugin'])
+    if plugin is None:
+        raise StegaPyException(f"未知的插件: {options['plugin']}",
+                               StegaPyErrors.NO_PLUGIN_SPECIFIED, NAMESPACE)
+    config = type(plugin.create_config())(**options['config'])
+    plugin.reset_config(config)
+    return StegaPy(plugin, plugin.get_config(), isolate_calls=False)
+
+
+def _read_file(path: str) -> bytes:
+    """读取文件内容"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _write_file(path: str, data: bytes):
+    """写入文件：先写临时文件再替换，中断时不会留下被视为最新的不完整输出"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _embed(stegapy: StegaPy, options: Dict[str, Any], task: Task) -> Dict[str, Any]:
+    """嵌入数据"""
+    msg_path = options['message']
+    stego = stegapy.embed_data(_read_file(msg_path), os.path.basename(msg_path),
+                               _read_file(task.source), os.path.basename(task.source),
+                               os.path.basename(task.output))
+    _write_file(task.output, stego)
+    return {'bytes': len(stego)}
+
+
+def _extract(stegapy: StegaPy, options: Dict[str, Any], task: Task) -> Dict[str, Any]:
+    """提取数据，输出目录为 <输出目录>/<隐写图像名>/，文件名取自数据头"""
+    msg_filename, msg = stegapy.extract_data(_read_file(task.source),
+                                             os.path.basename(task.source))
+    # 数据头中的文件名不可信，只保留最后一级文件名
+    name = os.path.basename((msg_filename or '').replace('\\', '/')) or 'message.bin'
+    _write_file(os.path.join(task.output, name), msg)
+    return {'file': os.path.join(task.output, name), 'bytes': len(msg)}
+
+
+def _mark(stegapy: StegaPy, options: Dict[str, Any], task: Task) -> Dict[str, Any]:
+    """嵌入水印"""
+    sig_path = options['signature']
+    stego = stegapy.embed_mark(_read_file(sig_path), os.path.basename(sig_path),
+                               _read_file(task.source), os.path.basename(task.source),
+                               os.path.basename(task.output))
+    _write_file(task.output, stego)
+    return {'bytes': len(stego)}
+
+
+def _check(stegapy: StegaPy, options: Dict[str, Any], task: Task) -> Dict[str, Any]:
+    """检查水印，相关性低于阈值时标记为无效"""
+    correlation = stegapy.check_mark(_read_file(task.source), os.path.basename(task.source),
+                                     _read_file(options['signature']))
+    threshold = options['threshold']
+    if threshold is None:
+        threshold = stegapy.plugin.get_low_watermark_level()
+    return {'correlation': round(correlation, 6), 'threshold': threshold,
+            'valid': correlation >= threshold}
+
+
+COMMANDS = {
+    'embed': _embed,
+    'extract': _extract,
+    'mark': _mark,
+    'check': _check,
+}
+
+
+def _run_task(command: str, options: Dict[str, Any], task: Task) -> Dict[str, Any]:
+    """执行单个任务并返回结果记录，异常记录在结果中（可在工作进程中执行）"""
+    start = time.perf_counter()
+    record = {'command': command, 'input': task.source, 'output': task.output}
+    try:
+        stegapy = _create_stegapy(options)
+        record.update(COMMANDS[command](stegapy, options, task))
+        record['status'] = STATUS_OK
+    except Exception as e:
+        record['status'] = STATUS_FAILED
+        record['error'] = str(e)
+        if isinstance(e, StegaPyException):
+            record['error_code'] = e.get_error_code()
+        else:
+            record['error_code'] = type(e).__name__
+    record['elapsed'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def is_up_to_date(task: Task) -> bool:
+    """输出存在且不早于所有依赖文件时视为最新（不检测配置的变化，必要时使用 --force）"""
+    if task.output is None or not os.path.exists(task.output):
+        return False
+    if os.path.isdir(task.output):
+        # 提取输出目录：以其中最新的文件为准
+        mtimes = [os.path.getmtime(os.path.join(task.output, name))
+                  for name in os.listdir(task.output)]
+        if not mtimes:
+            return False
+        output_mtime = max(mtimes)
+    else:
+        output_mtime = os.path.getmtime(task.output)
+    return all(output_mtime >= os.path.getmtime(dep) for dep in task.dependencies)
+
+
+def collect_inputs(patterns: List[str], extensions: List[str],
+                   recursive: bool = False) -> List[Tuple[str, str]]:
+    """展开文件、通配符和目录，返回 (文件路径, 相对路径) 列表
+    
+    目录中只选取插件可读取的文件；相对路径用于在输出目录中保持原有的目录结构。
+    """
+    extensions = {ext.lower() for ext in extensions}
+    inputs = []
+    seen = set()
+    
+    def add(path, relative):
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            inputs.append((path, relative))
+    
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                if not recursive:
+                    dirs[:] = []
+                for name in sorted(files):
+                    if os.path.splitext(name)[1][1:].lower() in extensions:
+                        path = os.path.join(root, name)
+                        add(path, os.path.relpath(path, pattern))
+            continue
+        magic = any(char in pattern for char in '*?[')
+        matches = sorted(glob.glob(pattern, recursive=recursive)) if magic else [pattern]
+        if not matches:
+            raise StegaPyException(f"没有匹配的文件: {pattern}",
+                                   StegaPyErrors.ERR_NO_COVER_FILE, NAMESPACE)
+        for path in matches:
+            if os.path.isfile(path):
+                add(path, os.path.basename(path))
+            elif not magic:
+                raise StegaPyException(f"文件不存在: {path}",
+                                       StegaPyErrors.ERR_NO_COVER_FILE, NAMESPACE)
+    return inputs
+
+
+def build_tasks(command: str, args: argparse.Namespace, extensions: List[str]) -> List[Task]:
+    """根据命令行参数生成任务列表"""
+    tasks = []
+    outputs = {}
+    for path, relative in collect_inputs(args.inputs, extensions, args.recursive):
+        stem = os.path.splitext(relative)[0]
+        dependencies = [path]
+        if command == 'embed':
+            output = os.path.join(args.output_dir, f"{stem}.{args.format}")
+            dependencies.append(args.message)
+        elif command == 'mark':
+            output = os.path.join(args.output_dir, f"{stem}.{args.format}")
+            dependencies.append(args.signature)
+        elif command == 'extract':
+            output = os.path.join(args.output_dir, stem)
+        else:
+            output = None
+        
+        if output is not None:
+            key = os.path.abspath(output)
+            if key in outputs:
+                raise StegaPyException(f"输出冲突: {outputs[key]} 和 {path} 都将写入 {output}",
+                                       StegaPyErrors.UNHANDLED_EXCEPTION, NAMESPACE)
+            outputs[key] = path
+        tasks.append(Task(path, output, dependencies))
+    return tasks
+
+
+def run_tasks(command: str, options: Dict[str, Any], tasks: List[Task], jobs: int = 1,
+              force: bool = False, progress=None, report=None) -> List[Dict[str, Any]]:
+    """并行执行任务
+    
+    Args:
+        command: 命令名称（embed、extract、mark、check）
+        options: 插件名称、配置参数等选项（需可序列化，以便传递到工作进程）
+        tasks: 任务列表
+        jobs: 工作进程数，为1时在当前进程中顺序执行
+        force: 为 True 时不跳过已是最新的输出
+        progress: 进度回调 progress(已完成数, 总数, 结果记录)
+        report: 结果回调 report(结果记录)，每个任务完成时调用
+    
+    Returns:
+        按完成顺序排列的结果记录
+    """
+    records = []
+    total = len(tasks)
+    
+    def finish(record):
+        records.append(record)
+        if report:
+            report(record)
+        if progress:
+            progress(len(records), total, record)
+    
+    pending = []
+    for task in tasks:
+        if not force and is_up_to_date(task):
+            finish({'command': command, 'input': task.source, 'output': task.output,
+                    'status': STATUS_SKIPPED, 'elapsed': 0.0})
+        else:
+            pending.append(task)
+    
+    if jobs <= 1 or len(pending) <= 1:
+        for task in pending:
+            finish(_run_task(command, options, task))
+        return records
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), initializer=_init_worker) as executor:
+        futures = {executor.submit(_run_task, command, options, task): task for task in pending}
+        try:
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # 工作进程崩溃等
+                    record = {'command': command, 'input': task.source, 'output': task.output,
+                              'status': STATUS_FAILED, 'error': str(e),
+                              'error_code': type(e).__name__, 'elapsed': 0.0}
+                finish(record)
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
+    return records
+
+
+def summarize(command: str, records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """汇总结果"""
+    summary = {'event': 'summary', 'command': command, 'total': len(records)}
+    for status in (STATUS_OK, STATUS_SKIPPED, STATUS_FAILED):
+        summary[status] = sum(1 for record in records if record['status'] == status)
+    if command == 'check':
+        summary['invalid'] = sum(1 for record in records if record.get('valid') is False)
+    summary['elapsed'] = round(elapsed, 4)
+    return summary
+
+
+def _build_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """将命令行参数转换为插件配置参数"""
+    config = {'password': args.password or os.environ.get(PASSWORD_ENV)}
+    if getattr(args, 'max_bits', None) is not None:
+        config['max_bits_used_per_channel'] = args.max_bits
+    if getattr(args, 'encoding_profile', None):
+        config['encoding_profile'] = args.encoding_profile
+    if hasattr(args, 'no_compression'):
+        config['use_compression'] = not args.no_compression
+        config['compression_codec'] = args.codec
+        config['use_encryption'] = args.encrypt
+        config['encryption_algorithm'] = args.algorithm
+    return config
+
+
+def _print_progress(done: int, total: int, record: Dict[str, Any]):
+    """在标准错误输出进度"""
+    target = f" -> {record['output']}" if record.get('output') else ''
+    detail = f" ({record['error']})" if record['status'] == STATUS_FAILED else ''
+    if 'correlation' in record:
+        detail = f" correlation={record['correlation']:.4f}{'' if record['valid'] else ' INVALID'}"
+    print(f"[{done}/{total}] {record['status']:<7} {record['input']}{target}{detail}",
+          file=sys.stderr, flush=True)
+
+
+def _emit(record: Dict[str, Any], stream):
+    """输出一行 JSON"""
+    stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+    stream.flush()
+
+
+def _gensig(args: argparse.Namespace, emit) -> int:
+    """生成水印签名"""
+    start = time.perf_counter()
+    record = {'command': 'gensig', 'input': None, 'output': args.output}
+    if not args.force and os.path.exists(args.output):
+        record['status'] = STATUS_SKIPPED
+    else:
+        options = {'plugin': args.plugin, 'config': _build_config(args)}
+        try:
+            _write_file(args.output, _create_stegapy(options).generate_signature())
+            record['status'] = STATUS_OK
+        except Exception as e:
+            record['status'] = STATUS_FAILED
+            record['error'] = str(e)
+    record['elapsed'] = round(time.perf_counter() - start, 4)
+    emit(record)
+    emit(summarize('gensig', [record], record['elapsed']))
+    return 1 if record['status'] == STATUS_FAILED else 0
+
+
+def _add_common_arguments(parser: argparse.ArgumentParser, default_plugin: str):
+    """添加各命令共用的参数"""
+    parser.add_argument('-p', '--plugin', default=default_plugin,
+                        help=f"插件名称（默认 {default_plugin}）")
+    parser.add_argument('-a', '--password',
+                        help=f"密码，未指定时读取环境变量 {PASSWORD_ENV}")
+    parser.add_argument('-f', '--force', action='store_true', help="重新生成已是最新的输出")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出进度")
+    parser.add_argument('--summary', metavar='FILE',
+                        help="将 JSON lines 结果写入文件（默认写到标准输出）")
+
+
+def _add_batch_arguments(parser: argparse.ArgumentParser, has_output: bool = True):
+    """添加批量处理参数"""
+    parser.add_argument('inputs', nargs='+', help="输入文件、通配符或目录")
+    parser.add_argument('-r', '--recursive', action='store_true',
+                        help="递归处理子目录（通配符支持 **）")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="并行工作进程数（默认为CPU核数）")
+    if has_output:
+        parser.add_argument('-o', '--output-dir', required=True, help="输出目录")
+
+
+def _add_data_hiding_arguments(parser: argparse.ArgumentParser):
+    """添加数据隐藏的压缩、加密参数"""
+    parser.add_argument('-b', '--max-bits', type=int, choices=range(1, 9), metavar='1-8',
+                        help="每个通道使用的最大位数（LSB插件）")
+    parser.add_argument('--no-compression', action='store_true', help="不压缩数据")
+    parser.add_argument('--codec', default='deflate',
+                        help="压缩编解码器: auto、deflate、zlib、bz2、lzma、parallel-deflate 等")
+    parser.add_argument('-e', '--encrypt', action='store_true', help="加密数据（需要密码）")
+    parser.add_argument('--algorithm', default='AES128', choices=ENCRYPTION_ALGORITHMS,
+                        help="加密算法（默认 AES128，A128GCM/A256GCM 为认证加密）")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """创建命令行解析器"""
+    parser = argparse.ArgumentParser(
+        prog='stegapy', description="StegaPy 隐写与数字水印命令行工具，结果以 JSON lines 格式输出")
+    parser.add_argument('--version', action='version', version=f"%(prog)s {__version__}")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+    
+    embed = subparsers.add_parser('embed', help="将消息文件嵌入图像")
+    _add_batch_arguments(embed)
+    embed.add_argument('-m', '--message', required=True, help="要嵌入的消息文件")
+    embed.add_argument('--format', default='png', choices=['png', 'bmp', 'webp', 'tiff'],
+                       help="输出格式（WebP、TIFF 均为无损编码）")
+    embed.add_argument('--encoding-profile', default='balanced', choices=['fastest', 'balanced', 'smallest'],
+                       help="输出图像的编码配置（默认 balanced）")
+    _add_common_arguments(embed, 'LSB')
+    _add_data_hiding_arguments(embed)
+    
+    extract = subparsers.add_parser('extract', help="从隐写图像中提取消息")
+    _add_batch_arguments(extract)
+    _add_common_arguments(extract, 'LSB')
+    extract.add_argument('-b', '--max-bits', type=int, choices=range(1, 9), metavar='1-8',
+                         help="嵌入时使用的每通道最大位数（LSB插件）")
+    
+    mark = subparsers.add_parser('mark', help="将水印签名嵌入图像")
+    _add_batch_arguments(mark)
+    mark.add_argument('-s', '--signature', required=True, help="签名文件")
+    mark.add_argument('--format', default='png', choices=['png', 'bmp'], help="输出格式")
+    mark.add_argument('--encoding-profile', default='balanced', choices=['fastest', 'balanced', 'smallest'],
+                      help="输出图像的编码配置（默认 balanced）")
+    _add_common_arguments(mark, 'DWTDugad')
+    
+    check = subparsers.add_parser('check', help="检查图像中的水印")
+    _add_batch_arguments(check, has_output=False)
+    check.add_argument('-s', '--signature', required=True, help="原始签名文件")
+    check.add_argument('-t', '--threshold', type=float,
+                       help="判定为有效水印的最低相关性（默认为插件的低水印阈值）")
+    _add_common_arguments(check, 'DWTDugad')
+    
+    gensig = subparsers.add_parser('gensig', help="根据密码生成水印签名")
+    gensig.add_argument('-o', '--output', required=True, help="签名文件")
+    _add_common_arguments(gensig, 'DWTDugad')
+    
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回退出码：0 成功，1 有任务失败（或 check 发现无效水印），2 参数错误"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    summary_file = open(args.summary, 'w', encoding='utf-8') if args.summary else None
+    stream = summary_file or sys.stdout
+    try:
+        def emit(record):
+            _emit(record, stream)
+        
+        descriptor = PluginManager.get_descriptor(args.plugin)
+        if descriptor is None:
+            parser.error(f"未知的插件: {args.plugin}（可用插件: {', '.join(PluginManager.get_plugin_names())}）")
+        if args.command == 'gensig':
+            return _gensig(args, emit)
+        
+        for name in ('message', 'signature'):
+            path = getattr(args, name, None)
+            if path is not None and not os.path.isfile(path):
+                parser.error(f"文件不存在: {path}")
+        if args.jobs < 1:
+            parser.error("--jobs 必须大于等于1")
+        
+        plugin = PluginManager.get_plugin_by_name(args.plugin)
+        try:
+            tasks = build_tasks(args.command, args, plugin.get_readable_file_extensions())
+        except StegaPyException as e:
+            parser.error(str(e))
+        
+        options = {
+            'plugin': args.plugin,
+            'config': _build_config(args),
+            'message': getattr(args, 'message', None),
+            'signature': getattr(args, 'signature', None),
+            'threshold': getattr(args, 'threshold', None),
+        }
+        start = time.perf_counter()
+        records = run_tasks(args.command, options, tasks, jobs=args.jobs, force=args.force,
+                            progress=None if args.quiet else _print_progress,
+                            report=lambda record: emit(dict(event='file', **record)))
+        summary = summarize(args.command, records, time.perf_counter() - start)
+        emit(summary)
+        if not args.quiet:
+            print(f"{args.command}: {summary[STATUS_OK]} ok, {summary[STATUS_SKIPPED]} skipped, "
+                  f"{summary[STATUS_FAILED]} failed ({summary['elapsed']:.2f}s)", file=sys.stderr)
+        return 1 if summary[STATUS_FAILED] or summary.get('invalid') else 0
+    finally:
+        if summary_file is not None:
+            summary_file.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,6 +18,8 @@ with this program; if not, write to the Free Software Foundation, Inc.,
 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
+import copy
+
 
 class StegaPyConfig:
     """StegaPy 全局配置管理类，维护数据压缩、加密算法及密码等运行时设置。"""
@@ -26,6 +28,24 @@ class StegaPyConfig:
     USE_ENCRYPTION = "useEncryption"
     PASSWORD = "password"
     ENCRYPTION_ALGORITHM = "encryptionAlgorithm"
+    KDF_ITERATIONS = "kdfIterations"
+    MAX_KDF_ITERATIONS = "maxKdfIterations"
+    COMPRESSION_CODEC = "compressionCodec"
+    COMPRESSION_CPU_BUDGET = "compressionCpuBudget"
+    COMPRESSION_PROBE = "compressionProbe"
+    COMPRESSION_THREADS = "compressionThreads"
+    COMPRESSION_DICTIONARY = "compressionDictionary"
+    COLLECT_TIMINGS = "collectTimings"
+    PROFILE = "profile"
+    PROFILE_SAMPLE_RATE = "profileSampleRate"
+    PROFILE_DIR = "profileDir"
+    ENCODING_PROFILE = "encodingProfile"
+    
+    # PBKDF2 默认迭代次数；版本2数据头未记录迭代次数，沿用旧值
+    DEFAULT_KDF_ITERATIONS = 600000
+    LEGACY_KDF_ITERATIONS = 7
+    # 允许的最大迭代次数：提取时迭代次数来自不可信的数据头，超出时在派生密钥前拒绝
+    DEFAULT_MAX_KDF_ITERATIONS = 5000000
     
     def __init__(self, **kwargs):
         """使用关键字参数初始化配置信息。"""
@@ -33,6 +53,41 @@ class StegaPyConfig:
         self.use_encryption = kwargs.get('use_encryption', False)
         self.password = kwargs.get('password', None)
         self.encryption_algorithm = kwargs.get('encryption_algorithm', 'AES128')
+        self.set_max_kdf_iterations(kwargs.get('max_kdf_iterations', self.DEFAULT_MAX_KDF_ITERATIONS))
+        self.set_kdf_iterations(kwargs.get('kdf_iterations', self.DEFAULT_KDF_ITERATIONS))
+        self.compression_codec = kwargs.get('compression_codec', 'deflate')
+        self.compression_cpu_budget = kwargs.get('compression_cpu_budget', 0.05)
+        self.compression_probe = kwargs.get('compression_probe', True)
+        # 分块并行压缩的线程数，None 表示使用CPU核数
+        self.compression_threads = kwargs.get('compression_threads', None)
+        # zdict编解码器使用的预设字典（bytes），嵌入时自动注册到字典注册表
+        self.compression_dictionary = kwargs.get('compression_dictionary', None)
+        # 当前负载实际使用的编解码器ID：嵌入时由StegaPy确定，提取时从数据头读取
+        self.payload_codec_id = kwargs.get('payload_codec_id', None)
+        # 当前负载使用的预设字典ID（仅zdict编解码器）
+        self.payload_dictionary_id = kwargs.get('payload_dictionary_id', None)
+        # 是否收集每次调用的分阶段耗时（通过 StegaPy.get_last_timings() 获取）
+        self.collect_timings = kwargs.get('collect_timings', False)
+        # 性能剖析：profile 为 True 时剖析每次调用，否则按 profile_sample_rate 采样（见 ProfileUtil）
+        self.profile = kwargs.get('profile', False)
+        self.profile_sample_rate = kwargs.get('profile_sample_rate', 0.0)
+        # 剖析报告的输出目录，None 表示使用环境变量 STEGAPY_PROFILE_DIR 或临时目录
+        self.profile_dir = kwargs.get('profile_dir', None)
+        # 隐写图像的编码配置：fastest、balanced 或 smallest（见 ImageUtil.ENCODING_PROFILES）
+        self.encoding_profile = kwargs.get('encoding_profile', 'balanced')
+    
+    def copy(self, **overrides):
+        """创建配置副本，并可覆盖部分配置项，如 config.copy(password='xxx')。
+        
+        StegaPy 每次调用都在配置副本上执行（提取时解析出的数据头标志只写入副本），
+        调用方持有的配置不会被修改。
+        """
+        config = copy.copy(self)
+        for key, value in overrides.items():
+            if not hasattr(config, key):
+                raise ValueError(f"未知的配置项: {key}")
+            setattr(config, key, value)
+        return config
     
     def is_use_compression(self):
         """判断当前是否启用了数据压缩功能。"""
@@ -65,4 +120,126 @@ class StegaPyConfig:
     def set_encryption_algorithm(self, algorithm):
         """指定运行时所需的加密算法。"""
         self.encryption_algorithm = algorithm
-
+    
+    def get_kdf_iterations(self):
+        """获取密钥派生（PBKDF2）的迭代次数。"""
+        return self.kdf_iterations
+    
+    def set_kdf_iterations(self, iterations):
+        """设置密钥派生（PBKDF2）的迭代次数。"""
+        if iterations < 1 or iterations > 0xFFFFFFFF:
+            raise ValueError("密钥派生迭代次数必须在1-4294967295之间")
+        self.kdf_iterations = iterations
+    
+    def get_max_kdf_iterations(self):
+        """获取允许的最大密钥派生迭代次数。"""
+        return self.max_kdf_iterations
+    
+    def set_max_kdf_iterations(self, iterations):
+        """设置允许的最大密钥派生迭代次数，数据头或配置中的迭代次数超出时拒绝派生密钥。"""
+        if iterations < 1 or iterations > 0x7FFFFFFF:
+            raise ValueError("最大密钥派生迭代次数必须在1-2147483647之间")
+        self.max_kdf_iterations = iterations
+    
+    def get_compression_codec(self):
+        """获取压缩编解码器名称（如 deflate、zlib-9、bz2、lzma、auto）。"""
+        return self.compression_codec
+    
+    def set_compression_codec(self, codec):
+        """设置压缩编解码器名称，auto 表示在CPU预算内自动选择输出最小的编解码器。"""
+        self.compression_codec = codec
+    
+    def get_compression_cpu_budget(self):
+        """获取 auto 压缩模式的CPU时间预算（秒）。"""
+        return self.compression_cpu_budget
+    
+    def set_compression_cpu_budget(self, seconds):
+        """设置 auto 压缩模式的CPU时间预算（秒）。"""
+        self.compression_cpu_budget = seconds
+    
+    def is_compression_probe(self):
+        """判断压缩前是否探测数据的可压缩性（不可压缩时原样存储）。"""
+        return self.compression_probe
+    
+    def set_compression_probe(self, value):
+        """设置压缩前是否探测数据的可压缩性。"""
+        self.compression_probe = value
+    
+    def get_compression_threads(self):
+        """获取分块并行压缩的线程数（None 表示使用CPU核数）。"""
+        return self.compression_threads
+    
+    def set_compression_threads(self, threads):
+        """设置分块并行压缩的线程数。"""
+        if threads is not None and threads < 1:
+            raise ValueError("压缩线程数必须大于0")
+        self.compression_threads = threads
+    
+    def get_compression_dictionary(self):
+        """获取zdict编解码器使用的预设字典。"""
+        return self.compression_dictionary
+    
+    def set_compression_dictionary(self, dictionary):
+        """设置zdict编解码器使用的预设字典（bytes），None 表示不使用。"""
+        self.compression_dictionary = dictionary
+    
+    def get_payload_codec_id(self):
+        """获取当前负载实际使用的编解码器ID。"""
+        return self.payload_codec_id
+    
+    def set_payload_codec_id(self, codec_id):
+        """设置当前负载实际使用的编解码器ID。"""
+        self.payload_codec_id = codec_id
+    
+    def get_payload_dictionary_id(self):
+        """获取当前负载使用的预设字典ID。"""
+        return self.payload_dictionary_id
+    
+    def set_payload_dictionary_id(self, dict_id):
+        """设置当前负载使用的预设字典ID。"""
+        self.payload_dictionary_id = dict_id
+    
+    def is_collect_timings(self):
+        """判断是否收集每次调用的分阶段耗时。"""
+        return self.collect_timings
+    
+    def set_collect_timings(self, value):
+        """设置是否收集每次调用的分阶段耗时。"""
+        self.collect_timings = value
+    
+    def is_profile(self):
+        """判断是否对每次调用做性能剖析。"""
+        return self.profile
+    
+    def set_profile(self, value):
+        """设置是否对每次调用做性能剖析。"""
+        self.profile = value
+    
+    def get_profile_sample_rate(self):
+        """获取性能剖析的采样率（0-1）。"""
+        return self.profile_sample_rate
+    
+    def set_profile_sample_rate(self, rate):
+        """设置性能剖析的采样率（0-1）。"""
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("采样率必须在0-1之间")
+        self.profile_sample_rate = rate
+    
+    def get_profile_dir(self):
+        """获取性能剖析报告的输出目录。"""
+        return self.profile_dir
+    
+    def set_profile_dir(self, path):
+        """设置性能剖析报告的输出目录，None 表示使用默认目录。"""
+        self.profile_dir = path
+    
+    def get_encoding_profile(self):
+        """获取隐写图像的编码配置名。"""
+        return self.encoding_profile
+    
+    def set_encoding_profile(self, profile):
+        """设置隐写图像的编码配置（fastest、balanced 或 smallest）。"""
+        from .util.image_util import ImageUtil
+        
+        ImageUtil.get_encoding_profile(profile)
+        self.encoding_profile = profile
@@ -23,6 +23,10 @@ class StegaPyException(Exception):
         
         super().__init__(self.message)
     
+    def __reduce__(self):
+        """支持序列化（如在工作进程与主进程之间传递），保留错误代码和命名空间"""
+        return (self.__class__, (self.message, self.error_code, self.namespace))
+    
     def get_error_code(self):
         """获取错误代码"""
         return self.error_code
@@ -46,4 +50,6 @@ class StegaPyErrors:
     ERR_FILE_TOO_SMALL = "ERR_FILE_TOO_SMALL"
     ERR_SIG_NOT_VALID = "ERR_SIG_NOT_VALID"
     ERR_IMAGE_DATA_READ = "ERR_IMAGE_DATA_READ"
+    UNKNOWN_DICTIONARY = "UNKNOWN_DICTIONARY"
+    KDF_ITERATIONS_TOO_HIGH = "KDF_ITERATIONS_TOO_HIGH"
 
@@ -1,12 +1,28 @@
 """
 插件模块
+
+各插件依赖numpy、PIL、pywt等较重的库，按需导入：访问对应名称时才导入插件模块。
 """
 
+import importlib
+
 from .base import StegaPyPlugin, Purpose
-from .lsb import LSBPlugin, LSBConfig
-from .randlsb import RandomLSBPlugin
-from .dwtdugad import DWTDugadPlugin
+
+_LAZY_IMPORTS = {
+    'LSBPlugin': '.lsb',
+    'LSBConfig': '.lsb',
+    'RandomLSBPlugin': '.randlsb',
+    'DWTDugadPlugin': '.dwtdugad',
+}
 
 __all__ = ['StegaPyPlugin', 'Purpose', 'LSBPlugin', 'LSBConfig', 
            'RandomLSBPlugin', 'DWTDugadPlugin']
 
+
+def __getattr__(name):
+    """按需导入插件类"""
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
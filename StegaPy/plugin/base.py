@@ -19,10 +19,14 @@ with this program; if not, write to the Free Software Foundation, Inc.,
 """
 
 from enum import Enum
-from typing import List, Optional
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple, Union
 from ..config import StegaPyConfig
 from ..exceptions import StegaPyException
 
+if TYPE_CHECKING:
+    from ..result import StegoResult
+    from ..util.image_util import ImageSource
+
 
 class Purpose(Enum):
     """插件用途枚举"""
@@ -31,7 +35,13 @@ class Purpose(Enum):
 
 
 class StegaPyPlugin:
-    """StegaPy插件基类"""
+    """StegaPy插件基类
+    
+    图像参数（cover、stego_data、cover_data）可以是 ImageSource 中的任一类型：字节串或其他缓冲区、
+    文件对象、文件路径、PIL 图像或像素数组，插件通过 ImageUtil.byte_array_to_image() 或
+    ImageUtil.byte_array_to_pixels() 读取。嵌入方法返回 StegoResult（编码推迟到调用方需要时），
+    也可以直接返回编码后的字节串。
+    """
     
     def __init__(self, config: Optional[StegaPyConfig] = None):
         """初始化插件"""
@@ -50,26 +60,48 @@ class StegaPyPlugin:
         raise NotImplementedError
     
     def embed_data(self, msg: bytes, msg_filename: Optional[str], 
-                   cover: bytes, cover_filename: Optional[str], 
-                   stego_filename: Optional[str]) -> bytes:
+                   cover: 'ImageSource', cover_filename: Optional[str], 
+                   stego_filename: Optional[str]) -> Union[bytes, 'StegoResult']:
         """嵌入数据到封面图像"""
         raise NotImplementedError
     
-    def extract_msg_filename(self, stego_data: bytes, 
+    def embed_stream(self, chunks: Iterable[bytes], msg_filename: Optional[str],
+                     cover: 'ImageSource', cover_filename: Optional[str],
+                     stego_filename: Optional[str]) -> Union[bytes, 'StegoResult']:
+        """按块流式嵌入数据到封面图像，数据总长度在写入结束后回填"""
+        raise NotImplementedError
+    
+    def extract_msg_filename(self, stego_data: 'ImageSource', 
                              stego_filename: Optional[str]) -> str:
         """从隐写数据中提取消息文件名"""
         raise NotImplementedError
     
-    def extract_data(self, stego_data: bytes, stego_filename: Optional[str],
+    def extract_data(self, stego_data: 'ImageSource', stego_filename: Optional[str],
                      orig_sig_data: Optional[bytes] = None) -> bytes:
         """从隐写数据中提取消息"""
         raise NotImplementedError
     
+    def extract_stream(self, stego_data: 'ImageSource', stego_filename: Optional[str],
+                       chunk_size: int = 64 * 1024) -> Tuple[str, Iterator[bytes]]:
+        """按块流式提取消息
+        
+        立即解析数据头（并据此更新配置），返回消息文件名和按块读取数据的迭代器。
+        """
+        raise NotImplementedError
+    
+    def get_associated_data(self, msg_filename: Optional[str]) -> Optional[bytes]:
+        """获取认证加密（AES-GCM）时一并认证的附加数据，通常为数据头中负载以外的字段
+        
+        嵌入时在压缩之后调用，提取时在解析数据头（并据此更新配置）之后调用，两次应返回相同的内容；
+        None 表示不认证附加数据。
+        """
+        return None
+    
     def generate_signature(self) -> bytes:
         """生成签名数据（用于水印）"""
         raise NotImplementedError
     
-    def check_mark(self, stego_data: bytes, stego_filename: Optional[str],
+    def check_mark(self, stego_data: 'ImageSource', stego_filename: Optional[str],
                    orig_sig_data: bytes) -> float:
         """检查水印相关性"""
         watermark_data = self.extract_data(stego_data, stego_filename, orig_sig_data)
@@ -88,8 +120,8 @@ class StegaPyPlugin:
         """获取低水印阈值"""
         raise NotImplementedError
     
-    def get_diff(self, stego_data: bytes, stego_filename: Optional[str],
-                 cover_data: bytes, cover_filename: Optional[str],
+    def get_diff(self, stego_data: 'ImageSource', stego_filename: Optional[str],
+                 cover_data: 'ImageSource', cover_filename: Optional[str],
                  diff_filename: Optional[str]) -> bytes:
         """获取原始图像和隐写图像的差异"""
         raise NotImplementedError
@@ -113,4 +145,12 @@ class StegaPyPlugin:
     def reset_config(self, config: Optional[StegaPyConfig] = None):
         """重置配置"""
         self.config = config or self.create_config()
+    
+    def with_config(self, config: Optional[StegaPyConfig] = None) -> 'StegaPyPlugin':
+        """创建使用指定配置的新插件实例（不修改当前实例）
+        
+        插件的运行状态（配置等）保存在实例上，并发使用时每个请求应使用各自的实例。
+        构造参数与默认构造函数不同的插件需要重写此方法。
+        """
+        return type(self)(config)
 
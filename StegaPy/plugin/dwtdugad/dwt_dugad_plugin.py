@@ -15,12 +15,14 @@ import struct
 import io
 import random
 import numpy as np
-from PIL import Image
 from ..base import StegaPyPlugin, Purpose
-from ...util.image_util import ImageUtil
+from ...util.image_util import ImageSource, ImageUtil
 from ...util.dwt_util import DWTUtil
 from ...util.common_util import CommonUtil
+from ...util.metrics_util import MetricsUtil
+from ...util.performance_util import PerformanceUtil
 from ...exceptions import StegaPyException, StegaPyErrors
+from ...result import StegoResult
 from ...config import StegaPyConfig
 
 
@@ -62,8 +64,8 @@ class DWTDugadPlugin(StegaPyPlugin):
         return "DWT Dugad水印算法，基于离散小波变换的数字水印技术"
     
     def embed_data(self, msg: bytes, msg_filename: Optional[str],
-                   cover: Optional[bytes], cover_filename: Optional[str],
-                   stego_filename: Optional[str]) -> bytes:
+                   cover: Optional[ImageSource], cover_filename: Optional[str],
+                   stego_filename: Optional[str]) -> StegoResult:
         """嵌入水印到封面图像"""
         if cover is None:
             raise StegaPyException(
@@ -138,14 +140,15 @@ class DWTDugadPlugin(StegaPyPlugin):
             # 转换回RGB
             yuv[0] = luminance.astype(np.int32)
             image = ImageUtil.get_image_from_yuv(yuv, 'RGB')
+            MetricsUtil.add_pixels(self.get_name(), 'embed', image.width * image.height)
             
-            return ImageUtil.image_to_byte_array(image, stego_filename)
+            return StegoResult(image, stego_filename, self.config.get_encoding_profile())
         except StegaPyException:
             raise
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
-    def extract_data(self, stego_data: bytes, stego_filename: Optional[str],
+    def extract_data(self, stego_data: ImageSource, stego_filename: Optional[str],
                     orig_sig_data: Optional[bytes] = None) -> bytes:
         """从隐写数据中提取水印信息"""
         if orig_sig_data is None:
@@ -161,6 +164,7 @@ class DWTDugadPlugin(StegaPyPlugin):
             
             # 读取图像
             image = ImageUtil.byte_array_to_image(stego_data, stego_filename)
+            MetricsUtil.add_pixels(self.get_name(), 'check', image.width * image.height)
             yuv = ImageUtil.get_yuv_from_image(image)
             luminance = yuv[0].astype(np.float64)
             
@@ -199,7 +203,7 @@ class DWTDugadPlugin(StegaPyPlugin):
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
-    def extract_msg_filename(self, stego_data: bytes,
+    def extract_msg_filename(self, stego_data: ImageSource,
                             stego_filename: Optional[str]) -> str:
         """提取消息文件名（水印不支持）"""
         return ""
@@ -364,23 +368,20 @@ class DWTDugadPlugin(StegaPyPlugin):
         """获取低水印阈值"""
         return 0.3
     
-    def get_diff(self, stego_data: bytes, stego_filename: Optional[str],
-                cover_data: bytes, cover_filename: Optional[str],
+    def get_diff(self, stego_data: ImageSource, stego_filename: Optional[str],
+                cover_data: ImageSource, cover_filename: Optional[str],
                 diff_filename: Optional[str]) -> bytes:
         """获取原始图像和隐写图像的差异"""
         try:
-            stego_image = ImageUtil.byte_array_to_image(stego_data, stego_filename)
-            cover_image = ImageUtil.byte_array_to_image(cover_data, cover_filename)
-            
-            stego_pixels = ImageUtil.get_image_pixels(stego_image)
-            cover_pixels = ImageUtil.get_image_pixels(cover_image)
+            stego_pixels = ImageUtil.byte_array_to_pixels(stego_data, stego_filename, writable=False)
+            cover_pixels = ImageUtil.byte_array_to_pixels(cover_data, cover_filename, writable=False)
             
             # 计算差异（放大差异以便可视化）
             diff_pixels = np.abs(stego_pixels.astype(np.int16) - cover_pixels.astype(np.int16)) * 10
             diff_pixels = np.clip(diff_pixels, 0, 255).astype(np.uint8)
             
-            diff_image = ImageUtil.set_image_pixels(Image.new('RGB', stego_image.size), diff_pixels)
-            return ImageUtil.image_to_byte_array(diff_image, diff_filename)
+            return ImageUtil.pixels_to_byte_array(diff_pixels, diff_filename,
+                                                 profile=self.config.get_encoding_profile())
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
@@ -392,6 +393,7 @@ class DWTDugadPlugin(StegaPyPlugin):
         """获取支持写入的文件扩展名"""
         return ['png', 'bmp']
     
+    @PerformanceUtil.timed('watermark')
     def _wm_subband(self, img_data, watermark, n, alpha, threshold):
         """在子带中嵌入水印"""
         flat_data = img_data.flatten()
@@ -400,6 +402,7 @@ class DWTDugadPlugin(StegaPyPlugin):
                 flat_data[i] += alpha * abs(flat_data[i]) * watermark[i % n]
         img_data[:] = flat_data.reshape(img_data.shape)
     
+    @PerformanceUtil.timed('watermark')
     def _inv_wm_subband(self, img_data, watermark, n, threshold):
         """从子带中提取水印
         
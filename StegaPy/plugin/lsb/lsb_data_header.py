@@ -4,6 +4,9 @@ LSB数据头
 
 import struct
 from ...config import StegaPyConfig
+from ...exceptions import StegaPyException, StegaPyErrors
+from ...util.codec_util import CodecUtil
+from ...util.performance_util import PerformanceUtil
 
 
 class LSBDataHeader:
@@ -11,10 +14,17 @@ class LSBDataHeader:
     
     # 数据头标记（9字节）
     DATA_STAMP = b"STEGAPY  "  # 9字节，StegaPy项目标记
-    HEADER_VERSION = b'\x02'  # 1字节，版本2
+    HEADER_VERSION = b'\x05'  # 1字节，版本5
     FIXED_HEADER_LENGTH = 8  # 固定头长度
     CRYPT_ALGO_LENGTH = 8  # 加密算法名称长度
     MAX_FILENAME_LENGTH = 255  # 最大文件名长度
+    # 各版本在CRYPT_ALGO之后、fileName之前的扩展头长度
+    # 版本3: kdfIterations (4字节)
+    # 版本4: kdfIterations (4字节) + codecId (1字节)
+    # 版本5: kdfIterations (4字节) + codecId (1字节) + dictId (4字节)
+    EXTENDED_HEADER_LENGTHS = {2: 0, 3: 4, 4: 5, 5: 9}
+    
+    NAMESPACE = "LSBDataHeader"
     
     def __init__(self, data_length=0, channel_bits_used=1, filename=None, config=None):
         """初始化数据头
@@ -45,6 +55,11 @@ class LSBDataHeader:
         """获取每个通道使用的位数"""
         return self.channel_bits_used
     
+    def set_data_length(self, data_length):
+        """设置数据长度（用于流式写入结束后回填）"""
+        self.data_length = data_length
+    
+    @PerformanceUtil.timed('header')
     def to_bytes(self):
         """转换为字节数组"""
         filename_bytes = self.filename.encode('utf-8')
@@ -88,13 +103,46 @@ class LSBDataHeader:
             crypt_algo = b' ' * self.CRYPT_ALGO_LENGTH
         header.extend(crypt_algo)
         
-        # 5. fileName (变长)
+        # 5. EXTENDED_HEADER
+        # kdfIterations (4字节，小端序)
+        if self.config and self.config.get_kdf_iterations():
+            kdf_iterations = self.config.get_kdf_iterations()
+        else:
+            kdf_iterations = StegaPyConfig.DEFAULT_KDF_ITERATIONS
+        header.extend(struct.pack('<I', kdf_iterations))
+        # codecId (1字节)
+        codec_id = self._get_codec_id()
+        header.append(codec_id)
+        # dictId (4字节，小端序)，仅zdict编解码器使用，否则为0
+        dict_id = 0
+        if codec_id == CodecUtil.CODEC_ZDICT and self.config.get_payload_dictionary_id() is not None:
+            dict_id = self.config.get_payload_dictionary_id()
+        header.extend(struct.pack('<I', dict_id))
+        
+        # 6. fileName (变长)
         if filename_len > 0:
             header.extend(filename_bytes)
         
         return bytes(header)
     
+    def get_associated_data(self):
+        """获取认证加密的附加数据：数据长度、通道位数置零后的数据头
+        
+        两者决定负载的读取方式，被篡改时读出的密文不同，认证同样失败；流式嵌入时数据长度在加密之后才回填。
+        """
+        return LSBDataHeader(0, 0, self.filename, self.config).to_bytes()
+    
+    def _get_codec_id(self):
+        """获取写入数据头的编解码器ID"""
+        if not self.config or not self.config.is_use_compression():
+            return CodecUtil.CODEC_STORED
+        if self.config.get_payload_codec_id() is not None:
+            return self.config.get_payload_codec_id()
+        codec_id = CodecUtil.get_codec_id(self.config.get_compression_codec())
+        return codec_id if codec_id is not None else CodecUtil.get_codec_id(CodecUtil.DEFAULT_CODEC)
+    
     @staticmethod
+    @PerformanceUtil.timed('header')
     def from_bytes(data, config=None):
         """从字节数组解析数据头
         
@@ -106,7 +154,6 @@ class LSBDataHeader:
             LSBDataHeader对象
         """
         if config is None:
-            from ...config import StegaPyConfig
             config = StegaPyConfig()
         
         offset = 0
@@ -124,9 +171,9 @@ class LSBDataHeader:
         version_len = len(LSBDataHeader.HEADER_VERSION)
         if len(data) < offset + version_len:
             raise ValueError("数据头长度不足，无法读取HEADER_VERSION")
-        version = data[offset:offset+version_len]
-        if version != LSBDataHeader.HEADER_VERSION:
-            raise ValueError(f"无效的头版本，期望版本2，实际为{version[0]}")
+        version = data[offset]
+        if version not in LSBDataHeader.EXTENDED_HEADER_LENGTHS:
+            raise ValueError(f"无效的头版本，期望版本2-{LSBDataHeader.HEADER_VERSION[0]}，实际为{version}")
         offset += version_len
         
         # 3. 读取FIXED_HEADER (8字节)
@@ -155,7 +202,37 @@ class LSBDataHeader:
             config.set_encryption_algorithm(crypt_algo_str)
         offset += LSBDataHeader.CRYPT_ALGO_LENGTH
         
-        # 5. 读取fileName (变长)
+        # 5. 读取EXTENDED_HEADER
+        extended_length = LSBDataHeader.EXTENDED_HEADER_LENGTHS[version]
+        if len(data) < offset + extended_length:
+            raise ValueError("数据头长度不足，无法读取EXTENDED_HEADER")
+        if version >= 3:
+            kdf_iterations = struct.unpack('<I', data[offset:offset+4])[0]
+            # 迭代次数来自不可信的数据头，过大时派生密钥会长时间占用CPU
+            if config.is_use_encryption() and kdf_iterations > config.get_max_kdf_iterations():
+                raise StegaPyException(
+                    f"数据头中的密钥派生迭代次数 {kdf_iterations} 超过上限 {config.get_max_kdf_iterations()}",
+                    StegaPyErrors.KDF_ITERATIONS_TOO_HIGH,
+                    LSBDataHeader.NAMESPACE
+                )
+            config.set_kdf_iterations(kdf_iterations)
+        else:
+            config.set_kdf_iterations(StegaPyConfig.LEGACY_KDF_ITERATIONS)
+        if version >= 4:
+            codec_id = data[offset+4]
+            if not CodecUtil.is_valid_codec_id(codec_id):
+                raise ValueError(f"未知的压缩编解码器ID: {codec_id}")
+            config.set_payload_codec_id(codec_id)
+        else:
+            # 版本2/3固定使用gzip压缩
+            config.set_payload_codec_id(CodecUtil.CODEC_GZIP)
+        if version >= 5 and config.get_payload_codec_id() == CodecUtil.CODEC_ZDICT:
+            config.set_payload_dictionary_id(struct.unpack('<I', data[offset+5:offset+9])[0])
+        else:
+            config.set_payload_dictionary_id(None)
+        offset += extended_length
+        
+        # 6. 读取fileName (变长)
         if filename_len > LSBDataHeader.MAX_FILENAME_LENGTH:
             raise ValueError(f"文件名长度无效: {filename_len}")
         if len(data) < offset + filename_len:
@@ -167,20 +244,68 @@ class LSBDataHeader:
         return LSBDataHeader(data_length, channel_bits_used, filename, config)
     
     @staticmethod
-    def get_max_header_size():
-        """获取最大数据头大小"""
+    def read(read_bytes, config=None):
+        """通过读取函数逐段读取并解析数据头
+        
+        先读取与版本无关的前缀，再根据版本号和fileNameLen读取扩展头和文件名，
+        不会多读数据头之后的内容。
+        
+        Args:
+            read_bytes: 读取函数，签名为 read_bytes(count) -> bytes
+            config: StegaPyConfig配置对象（会被更新）
+        
+        Returns:
+            LSBDataHeader对象
+        """
+        # 先读取固定部分（DATA_STAMP + HEADER_VERSION + FIXED_HEADER + CRYPT_ALGO）
+        fixed_part = read_bytes(LSBDataHeader.get_fixed_part_size())
+        
+        # 从固定部分中提取版本号和fileNameLen
+        version_offset = len(LSBDataHeader.DATA_STAMP)
+        fixed_header_offset = version_offset + len(LSBDataHeader.HEADER_VERSION)
+        filename_len = fixed_part[fixed_header_offset + 5]  # FIXED_HEADER的第6个字节（索引5）
+        
+        # 读取扩展头部分（长度取决于版本，未知版本交由from_bytes报告错误）
+        extended_len = LSBDataHeader.EXTENDED_HEADER_LENGTHS.get(fixed_part[version_offset], 0)
+        extended_part = read_bytes(extended_len) if extended_len > 0 else b''
+        
+        # 读取文件名部分
+        filename_part = read_bytes(filename_len) if filename_len > 0 else b''
+        
+        # 组合完整的数据头并解析
+        try:
+            return LSBDataHeader.from_bytes(fixed_part + extended_part + filename_part, config)
+        except StegaPyException:
+            raise
+        except Exception as e:
+            raise ValueError(f"无法解析数据头: {e}")
+    
+    @staticmethod
+    def get_fixed_part_size():
+        """获取与版本无关的数据头前缀大小（DATA_STAMP到CRYPT_ALGO）"""
         return (len(LSBDataHeader.DATA_STAMP) + 
                 len(LSBDataHeader.HEADER_VERSION) + 
                 LSBDataHeader.FIXED_HEADER_LENGTH + 
-                LSBDataHeader.CRYPT_ALGO_LENGTH + 
+                LSBDataHeader.CRYPT_ALGO_LENGTH)
+    
+    @staticmethod
+    def get_extended_header_length(version):
+        """获取指定版本的扩展头长度"""
+        if version not in LSBDataHeader.EXTENDED_HEADER_LENGTHS:
+            raise ValueError(f"无效的头版本: {version}")
+        return LSBDataHeader.EXTENDED_HEADER_LENGTHS[version]
+    
+    @staticmethod
+    def get_max_header_size():
+        """获取最大数据头大小"""
+        return (LSBDataHeader.get_fixed_part_size() + 
+                max(LSBDataHeader.EXTENDED_HEADER_LENGTHS.values()) + 
                 LSBDataHeader.MAX_FILENAME_LENGTH)
     
     def get_header_size(self):
         """获取当前数据头的实际大小"""
         filename_len = len(self.filename.encode('utf-8'))
-        return (len(self.DATA_STAMP) + 
-                len(self.HEADER_VERSION) + 
-                self.FIXED_HEADER_LENGTH + 
-                self.CRYPT_ALGO_LENGTH + 
+        return (self.get_fixed_part_size() + 
+                self.get_extended_header_length(self.HEADER_VERSION[0]) + 
                 filename_len)
 
@@ -2,109 +2,108 @@
 LSB输入流
 """
 
+from typing import Union
 import numpy as np
 from PIL import Image
 from .lsb_data_header import LSBDataHeader
+from ...util.image_util import ImageUtil
+from ...util.performance_util import PerformanceUtil
 from .lsb_config import LSBConfig
 
+# 每次读取为位数组的字节数，限制读取大块数据时的临时内存
+READ_CHUNK_BYTES = 64 * 1024
+
 
 class LSBInputStream:
-    """LSB输入流，用于从图像中提取数据"""
+    """LSB输入流，用于从图像中提取数据
+    
+    位槽的排列方式与 LSBOutputStream 相同，数据按块向量化读取。
+    """
     
-    def __init__(self, image: Image.Image, config: LSBConfig):
-        """初始化LSB输入流"""
-        self.image = image
+    def __init__(self, image: Union[Image.Image, np.ndarray], config: LSBConfig):
+        """初始化LSB输入流
+        
+        image 可以是 PIL 图像或像素数组（高 x 宽 x 通道），像素数组直接读取，不复制。
+        """
         self.config = config
         
-        # 将图像转换为numpy数组
-        self.pixels = np.array(image)
+        if isinstance(image, np.ndarray):
+            self.pixels = np.ascontiguousarray(image, dtype=np.uint8)
+        else:
+            self.pixels = ImageUtil.get_image_pixels(image)
         self.height, self.width, self.channels = self.pixels.shape
+        self.flat_pixels = self.pixels.reshape(-1)
         
         # 初始化读取位置
-        self.current_pixel = 0
-        self.current_channel = 0
-        self.current_bit = 0
+        # 读取数据头时还不知道channel_bits_used，使用config中的值
+        self.channel_bits_used = self.config.get_max_bits_used_per_channel()
+        self.position = 0
+        self._init_positions()
         
         # 读取数据头
-        # 先读取固定部分（DATA_STAMP + HEADER_VERSION + FIXED_HEADER + CRYPT_ALGO）
-        fixed_part_size = (len(LSBDataHeader.DATA_STAMP) + 
-                          len(LSBDataHeader.HEADER_VERSION) + 
-                          LSBDataHeader.FIXED_HEADER_LENGTH + 
-                          LSBDataHeader.CRYPT_ALGO_LENGTH)
-        fixed_part = self._read_bytes(fixed_part_size)
-        
-        # 从固定部分中提取fileNameLen
-        fixed_header_offset = len(LSBDataHeader.DATA_STAMP) + len(LSBDataHeader.HEADER_VERSION)
-        filename_len = fixed_part[fixed_header_offset + 5]  # FIXED_HEADER的第6个字节（索引5）
+        self.header = LSBDataHeader.read(self._read_bytes, config)
         
-        # 读取文件名部分
-        filename_part = self._read_bytes(filename_len) if filename_len > 0 else b''
-        
-        # 组合完整的数据头
-        header_bytes = fixed_part + filename_part
-        
-        # 解析数据头
-        try:
-            self.header = LSBDataHeader.from_bytes(header_bytes, config)
-        except Exception as e:
-            raise ValueError(f"无法解析数据头: {e}")
-        
-        # 更新配置中的channel_bits_used
+        # 之后的数据使用header中的channel_bits_used
+        if not 1 <= self.header.get_channel_bits_used() <= 8:
+            raise ValueError(f"无效的通道位数: {self.header.get_channel_bits_used()}")
         self.channel_bits_used = self.header.get_channel_bits_used()
+        self.bytes_read = 0
     
-    def _read_bytes(self, count: int) -> bytes:
-        """读取指定数量的字节"""
-        result = bytearray()
-        for _ in range(count):
-            result.append(self._read_byte())
-        return bytes(result)
+    def _init_positions(self):
+        """初始化通道值的访问顺序（顺序读取无需额外准备）"""
+        pass
     
-    def _read_byte(self) -> int:
-        """读取一个字节"""
-        byte_value = 0
-        for bit_pos in range(8):
-            bit = self._read_bit()
-            byte_value = (byte_value << 1) | bit
-        return byte_value
+    def _elements(self, first: int, count: int):
+        """获取第first个起共count个通道值在扁平像素数组中的索引"""
+        return slice(first, first + count)
     
-    def _read_bit(self) -> int:
-        """读取一个位"""
-        if self.current_pixel >= self.width * self.height:
+    def _get_capacity(self) -> int:
+        """获取按当前位数计算的位槽总数"""
+        return self.flat_pixels.size * self.channel_bits_used
+    
+    def _read_bytes(self, count: int) -> bytes:
+        """读取指定数量的字节（分块读取位数组）"""
+        if count <= 0:
+            return b''
+        if count <= READ_CHUNK_BYTES:
+            return np.packbits(self._read_bits(count * 8)).tobytes()
+        data = np.empty(count, dtype=np.uint8)
+        for start in range(0, count, READ_CHUNK_BYTES):
+            size = min(READ_CHUNK_BYTES, count - start)
+            data[start:start + size] = np.packbits(self._read_bits(size * 8))
+        return data.tobytes()
+    
+    @PerformanceUtil.timed('extract_bits')
+    def _read_bits(self, count: int) -> np.ndarray:
+        """读取指定数量的位（高位在前）"""
+        if self.position + count > self._get_capacity():
             raise ValueError("已读取到图像末尾")
         
-        row = self.current_pixel // self.width
-        col = self.current_pixel % self.width
-        
-        # 获取当前像素值
-        pixel_value = self.pixels[row, col, self.current_channel]
+        bits = np.empty(count, dtype=np.uint8)
+        bits_to_use = self.channel_bits_used
+        for bit_pos in range(min(bits_to_use, count)):
+            # 本批次中读取第bit_pos位的位槽是等间隔的，对应连续的通道值
+            offset = (bit_pos - self.position) % bits_to_use
+            if offset >= count:
+                continue
+            plane_count = len(range(offset, count, bits_to_use))
+            first = (self.position + offset) // bits_to_use
+            index = self._elements(first, plane_count)
+            bits[offset::bits_to_use] = (self.flat_pixels[index] >> bit_pos) & 1
         
-        # 读取最低有效位
-        # 使用header中的channel_bits_used，如果还没有header则使用config中的值
-        bits_to_use = getattr(self, 'channel_bits_used', None) or self.config.get_max_bits_used_per_channel()
-        if self.current_bit < bits_to_use:
-            bit = (pixel_value >> self.current_bit) & 1
-        else:
-            bit = 0
-        
-        # 移动到下一个位置
-        self.current_bit += 1
-        if self.current_bit >= bits_to_use:
-            self.current_bit = 0
-            self.current_channel += 1
-            if self.current_channel >= self.channels:
-                self.current_channel = 0
-                self.current_pixel += 1
-        
-        return bit
+        self.position += count
+        return bits
     
     def read(self, size: int = -1) -> bytes:
         """读取数据"""
+        remaining = self.header.get_data_length() - self.bytes_read
         if size < 0:
-            size = self.header.get_data_length()
+            size = remaining
         
-        return self._read_bytes(min(size, self.header.get_data_length()))
+        data = self._read_bytes(min(size, remaining))
+        self.bytes_read += len(data)
+        return data
     
     def get_data_header(self) -> LSBDataHeader:
         """获取数据头"""
         return self.header
-
@@ -2,104 +2,135 @@
 LSB输出流
 """
 
+from typing import Union
 import numpy as np
 from PIL import Image
 from .lsb_data_header import LSBDataHeader
+from ...util.image_util import ImageUtil
+from ...util.performance_util import PerformanceUtil
 from .lsb_config import LSBConfig
 
+# 每次展开为位数组的字节数，限制写入大块数据时的临时内存
+WRITE_CHUNK_BYTES = 64 * 1024
+
 
 class LSBOutputStream:
-    """LSB输出流，用于将数据嵌入到图像中"""
+    """LSB输出流，用于将数据嵌入到图像中
+    
+    写入位置以"位槽"计数：第s个位写入第 s // bits 个通道值的第 s % bits 位，
+    通道值按像素、通道顺序排列。数据按块向量化写入。
+    """
     
-    def __init__(self, image: Image.Image, data_length: int, 
+    def __init__(self, image: Union[Image.Image, np.ndarray], data_length: int,
                  filename: str, config: LSBConfig):
-        """初始化LSB输出流"""
-        self.image = image.copy()
+        """初始化LSB输出流
+        
+        image 为 PIL 图像时复制其像素，图像本身不变；为连续、可写的 uint8 像素数组
+        （高 x 宽 x 通道）时直接在该数组上原位写入，不再复制。
+        data_length 为0时可用于流式写入，写入结束后由 close() 回填实际长度。
+        """
+        self.image = None
         self.config = config
         self.data_length = data_length
         self.filename = filename
         
         # 创建数据头（使用config中的channel_bits_used）
-        channel_bits_used = config.get_max_bits_used_per_channel()
-        self.header = LSBDataHeader(data_length, channel_bits_used, filename, config)
+        self.channel_bits_used = config.get_max_bits_used_per_channel()
+        self.header = LSBDataHeader(data_length, self.channel_bits_used, filename, config)
         
-        # 将图像转换为numpy数组
-        self.pixels = np.array(self.image)
+        # 所有写入都在这一个像素数组上进行
+        if isinstance(image, np.ndarray):
+            self.pixels = np.require(image, np.uint8, ['C_CONTIGUOUS', 'WRITEABLE'])
+        else:
+            self.pixels = ImageUtil.get_image_pixels(image)
         self.height, self.width, self.channels = self.pixels.shape
+        self.flat_pixels = self.pixels.reshape(-1)
         
         # 计算需要的像素数
         header_bits = len(self.header.to_bytes()) * 8
         data_bits = data_length * 8
         total_bits = header_bits + data_bits
-        bits_per_pixel = self.channels * config.get_max_bits_used_per_channel()
+        bits_per_pixel = self.channels * self.channel_bits_used
         required_pixels = (total_bits + bits_per_pixel - 1) // bits_per_pixel
         
         if required_pixels > self.width * self.height:
             raise ValueError(f"图像太小，无法嵌入{data_length}字节的数据")
         
         # 初始化写入位置
-        self.current_pixel = 0
-        self.current_channel = 0
-        self.current_bit = 0
+        self.capacity = self.flat_pixels.size * self.channel_bits_used
+        self.position = 0
+        self.bytes_written = 0
+        self._init_positions()
         
         # 写入数据头
         self._write_bytes(self.header.to_bytes())
     
-    def _write_bytes(self, data: bytes):
-        """写入字节数据"""
-        for byte in data:
-            self._write_byte(byte)
+    def _init_positions(self):
+        """初始化通道值的访问顺序（顺序写入无需额外准备）"""
+        pass
     
-    def _write_byte(self, byte: int):
-        """写入一个字节"""
-        for bit_pos in range(8):
-            bit = (byte >> (7 - bit_pos)) & 1
-            self._write_bit(bit)
+    def _elements(self, first: int, count: int):
+        """获取第first个起共count个通道值在扁平像素数组中的索引"""
+        return slice(first, first + count)
     
-    def _write_bit(self, bit: int):
-        """写入一个位"""
-        if self.current_pixel >= self.width * self.height:
+    def _write_bytes(self, data: bytes):
+        """写入字节数据（分块展开为位数组）"""
+        data = np.frombuffer(data, dtype=np.uint8)
+        for start in range(0, len(data), WRITE_CHUNK_BYTES):
+            self._write_bits(np.unpackbits(data[start:start + WRITE_CHUNK_BYTES]))
+    
+    @PerformanceUtil.timed('embed_bits')
+    def _write_bits(self, bits: np.ndarray):
+        """写入位数组（每个元素为0或1，高位在前）"""
+        count = len(bits)
+        if self.position + count > self.capacity:
             raise ValueError("图像空间不足")
         
-        row = self.current_pixel // self.width
-        col = self.current_pixel % self.width
-        
-        # 获取当前像素值，转换为int类型以避免位操作时的符号问题
-        pixel_value = int(self.pixels[row, col, self.current_channel])
+        bits_to_use = self.channel_bits_used
+        for bit_pos in range(min(bits_to_use, count)):
+            # 本批次中写入第bit_pos位的位槽是等间隔的，对应连续的通道值
+            offset = (bit_pos - self.position) % bits_to_use
+            if offset >= count:
+                continue
+            plane_bits = bits[offset::bits_to_use]
+            first = (self.position + offset) // bits_to_use
+            index = self._elements(first, len(plane_bits))
+            
+            # 清除当前位并设置新位（使用 XOR 构造掩码，避免负数问题）
+            mask = np.uint8(0xFF ^ (1 << bit_pos))
+            self.flat_pixels[index] = (self.flat_pixels[index] & mask) | (plane_bits << bit_pos)
         
-        # 修改最低有效位
-        bits_to_use = self.config.get_max_bits_used_per_channel()
-        if self.current_bit < bits_to_use:
-            # 清除当前位（使用正确的掩码，避免负数问题）
-            mask = 0xFF ^ (1 << self.current_bit)  # 使用 XOR 而不是 ~ 来避免负数
-            pixel_value = pixel_value & mask
-            # 设置新位
-            pixel_value = pixel_value | (bit << self.current_bit)
-            # 确保值在0-255范围内
-            pixel_value = max(0, min(255, pixel_value))
-            self.pixels[row, col, self.current_channel] = pixel_value
-        
-        # 移动到下一个位置
-        self.current_bit += 1
-        if self.current_bit >= bits_to_use:
-            self.current_bit = 0
-            self.current_channel += 1
-            if self.current_channel >= self.channels:
-                self.current_channel = 0
-                self.current_pixel += 1
+        self.position += count
     
     def write(self, data: bytes):
         """写入数据"""
         self._write_bytes(data)
+        self.bytes_written += len(data)
+    
+    def close(self):
+        """结束写入，将实际写入的数据长度回填到数据头中"""
+        if self.bytes_written == self.header.get_data_length():
+            return
+        
+        end_position = self.position
+        self.header.set_data_length(self.bytes_written)
+        self.data_length = self.bytes_written
+        
+        # 数据头长度与数据长度无关，原位覆盖即可
+        self.position = 0
+        self._write_bytes(self.header.to_bytes())
+        self.position = end_position
     
     def flush(self):
-        """刷新缓冲区"""
-        # 确保像素值在0-255范围内，避免uint8溢出错误
-        pixels_clipped = np.clip(self.pixels, 0, 255).astype(np.uint8)
-        # 更新图像
-        self.image = Image.fromarray(pixels_clipped)
+        """刷新缓冲区（数据直接写入像素数组，无需刷新）"""
+        self.image = None
+    
+    def get_pixels(self) -> np.ndarray:
+        """获取处理后的像素数组（不复制）"""
+        return self.pixels
     
     def get_image(self) -> Image.Image:
-        """获取处理后的图像"""
+        """获取处理后的图像（首次调用时由像素数组生成）"""
+        if self.image is None:
+            self.image = Image.fromarray(self.pixels)
         return self.image
-
@@ -2,13 +2,15 @@
 LSB隐写插件
 """
 
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 import numpy as np
-from PIL import Image
 from ..base import StegaPyPlugin, Purpose
-from ...util.image_util import ImageUtil
+from ...util.image_util import ImageSource, ImageUtil
+from ...util.metrics_util import MetricsUtil
 from ...exceptions import StegaPyException, StegaPyErrors
+from ...result import StegoResult
 from .lsb_config import LSBConfig
+from .lsb_data_header import LSBDataHeader
 from .lsb_output_stream import LSBOutputStream
 from .lsb_input_stream import LSBInputStream
 
@@ -35,8 +37,8 @@ class LSBPlugin(StegaPyPlugin):
         return "LSB（最低有效位）隐写算法，将数据隐藏在图像像素的最低有效位中"
     
     def embed_data(self, msg: bytes, msg_filename: Optional[str],
-                   cover: Optional[bytes], cover_filename: Optional[str],
-                   stego_filename: Optional[str]) -> bytes:
+                   cover: Optional[ImageSource], cover_filename: Optional[str],
+                   stego_filename: Optional[str]) -> StegoResult:
         """嵌入数据到封面图像"""
         try:
             # 如果没有提供封面图像，生成随机图像
@@ -46,36 +48,68 @@ class LSBPlugin(StegaPyPlugin):
                 header_size = LSBDataHeader.get_max_header_size()
                 num_pixels = int(header_size * 8 / 3.0)
                 num_pixels += int(len(msg) * 8 / (3.0 * self.config.get_max_bits_used_per_channel()))
-                image = ImageUtil.generate_random_image(num_pixels)
+                pixels = ImageUtil.get_image_pixels(ImageUtil.generate_random_image(num_pixels))
             else:
-                image = ImageUtil.byte_array_to_image(cover, cover_filename)
+                pixels = ImageUtil.byte_array_to_pixels(cover, cover_filename)
             
             # 使用LSB输出流嵌入数据
-            lsb_os = LSBOutputStream(image, len(msg), msg_filename, self.config)
+            lsb_os = LSBOutputStream(pixels, len(msg), msg_filename, self.config)
             lsb_os.write(msg)
             lsb_os.flush()
-            image = lsb_os.get_image()
+            MetricsUtil.add_pixels(self.get_name(), 'embed', pixels.shape[0] * pixels.shape[1])
+            MetricsUtil.add_payload_bytes(self.get_name(), 'embedded', len(msg))
             
-            return ImageUtil.image_to_byte_array(image, stego_filename)
+            return StegoResult(pixels, stego_filename, self.config.get_encoding_profile())
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
-    def extract_msg_filename(self, stego_data: bytes,
+    def embed_stream(self, chunks: Iterable[bytes], msg_filename: Optional[str],
+                     cover: Optional[ImageSource], cover_filename: Optional[str],
+                     stego_filename: Optional[str]) -> StegoResult:
+        """按块流式嵌入数据到封面图像"""
+        if cover is None:
+            raise StegaPyException(
+                "流式嵌入需要封面图像",
+                StegaPyErrors.ERR_NO_COVER_FILE,
+                self.NAMESPACE
+            )
+        
+        try:
+            pixels = ImageUtil.byte_array_to_pixels(cover, cover_filename)
+            
+            # 使用LSB输出流逐块嵌入数据，结束后回填数据长度
+            lsb_os = LSBOutputStream(pixels, 0, msg_filename, self.config)
+            for chunk in chunks:
+                lsb_os.write(chunk)
+            lsb_os.close()
+            lsb_os.flush()
+            MetricsUtil.add_pixels(self.get_name(), 'embed', pixels.shape[0] * pixels.shape[1])
+            MetricsUtil.add_payload_bytes(self.get_name(), 'embedded', lsb_os.bytes_written)
+            
+            return StegoResult(pixels, stego_filename, self.config.get_encoding_profile())
+        except StegaPyException:
+            raise
+        except Exception as e:
+            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
+    
+    def extract_msg_filename(self, stego_data: ImageSource,
                             stego_filename: Optional[str]) -> str:
         """从隐写数据中提取消息文件名"""
         try:
-            image = ImageUtil.byte_array_to_image(stego_data, stego_filename)
-            lsb_is = LSBInputStream(image, self.config)
+            pixels = ImageUtil.byte_array_to_pixels(stego_data, stego_filename, writable=False)
+            lsb_is = LSBInputStream(pixels, self.config)
             return lsb_is.get_data_header().get_filename()
+        except StegaPyException:
+            raise
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
-    def extract_data(self, stego_data: bytes, stego_filename: Optional[str],
+    def extract_data(self, stego_data: ImageSource, stego_filename: Optional[str],
                     orig_sig_data: Optional[bytes] = None) -> bytes:
         """从隐写数据中提取消息"""
         try:
-            image = ImageUtil.byte_array_to_image(stego_data, stego_filename)
-            lsb_is = LSBInputStream(image, self.config)
+            pixels = ImageUtil.byte_array_to_pixels(stego_data, stego_filename, writable=False)
+            lsb_is = LSBInputStream(pixels, self.config)
             header = lsb_is.get_data_header()
             data = lsb_is.read(header.get_data_length())
             
@@ -86,12 +120,40 @@ class LSBPlugin(StegaPyPlugin):
                     self.NAMESPACE
                 )
             
+            MetricsUtil.add_pixels(self.get_name(), 'extract', pixels.shape[0] * pixels.shape[1])
+            MetricsUtil.add_payload_bytes(self.get_name(), 'extracted', len(data))
             return data
         except StegaPyException:
             raise
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
+    def extract_stream(self, stego_data: ImageSource, stego_filename: Optional[str],
+                       chunk_size: int = 64 * 1024) -> Tuple[str, Iterator[bytes]]:
+        """按块流式提取消息，返回消息文件名和数据块迭代器"""
+        try:
+            pixels = ImageUtil.byte_array_to_pixels(stego_data, stego_filename, writable=False)
+            lsb_is = LSBInputStream(pixels, self.config)
+            header = lsb_is.get_data_header()
+            MetricsUtil.add_pixels(self.get_name(), 'extract', pixels.shape[0] * pixels.shape[1])
+        except StegaPyException:
+            raise
+        except Exception as e:
+            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
+        
+        def read_chunks():
+            remaining = header.get_data_length()
+            while remaining > 0:
+                try:
+                    chunk = lsb_is.read(min(chunk_size, remaining))
+                except Exception as e:
+                    raise StegaPyException(str(e), StegaPyErrors.ERR_IMAGE_DATA_READ, self.NAMESPACE)
+                remaining -= len(chunk)
+                MetricsUtil.add_payload_bytes(self.get_name(), 'extracted', len(chunk))
+                yield chunk
+        
+        return header.get_filename(), read_chunks()
+    
     def generate_signature(self) -> bytes:
         """生成签名数据（LSB不支持水印）"""
         raise StegaPyException(
@@ -117,34 +179,35 @@ class LSBPlugin(StegaPyPlugin):
         """获取低水印阈值（LSB不支持）"""
         return 0.0
     
-    def get_diff(self, stego_data: bytes, stego_filename: Optional[str],
-                cover_data: bytes, cover_filename: Optional[str],
+    def get_diff(self, stego_data: ImageSource, stego_filename: Optional[str],
+                cover_data: ImageSource, cover_filename: Optional[str],
                 diff_filename: Optional[str]) -> bytes:
         """获取原始图像和隐写图像的差异"""
         try:
-            stego_image = ImageUtil.byte_array_to_image(stego_data, stego_filename)
-            cover_image = ImageUtil.byte_array_to_image(cover_data, cover_filename)
-            
-            stego_pixels = ImageUtil.get_image_pixels(stego_image)
-            cover_pixels = ImageUtil.get_image_pixels(cover_image)
+            stego_pixels = ImageUtil.byte_array_to_pixels(stego_data, stego_filename, writable=False)
+            cover_pixels = ImageUtil.byte_array_to_pixels(cover_data, cover_filename, writable=False)
             
             # 计算差异（放大差异以便可视化）
             diff_pixels = np.abs(stego_pixels.astype(np.int16) - cover_pixels.astype(np.int16)) * 10
             diff_pixels = np.clip(diff_pixels, 0, 255).astype(np.uint8)
             
-            diff_image = ImageUtil.set_image_pixels(Image.new('RGB', stego_image.size), diff_pixels)
-            return ImageUtil.image_to_byte_array(diff_image, diff_filename)
+            return ImageUtil.pixels_to_byte_array(diff_pixels, diff_filename,
+                                                 profile=self.config.get_encoding_profile())
         except Exception as e:
             raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
     
+    def get_associated_data(self, msg_filename: Optional[str]) -> bytes:
+        """获取认证加密的附加数据（见 LSBDataHeader.get_associated_data）"""
+        return LSBDataHeader(0, 0, msg_filename, self.config).get_associated_data()
+    
     def get_readable_file_extensions(self) -> List[str]:
         """获取支持读取的文件扩展名"""
-        return ['png', 'bmp', 'jpg', 'jpeg']
+        return ['png', 'bmp', 'jpg', 'jpeg', 'webp', 'tif', 'tiff']
     
     def get_writable_file_extensions(self) -> List[str]:
         """获取支持写入的文件扩展名"""
-        # LSB需要无损格式
-        return ['png', 'bmp']
+        # LSB需要无损格式（WebP 和 TIFF 由 ImageUtil 按无损方式编码）
+        return ['png', 'bmp', 'webp', 'tif', 'tiff']
     
     def create_config(self) -> LSBConfig:
         """创建默认配置"""
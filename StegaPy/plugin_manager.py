@@ -18,55 +18,187 @@ with this program; if not, write to the Free Software Foundation, Inc.,
 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
 """
 
-from typing import List, Optional, Dict
-from .plugin.base import StegaPyPlugin
-from .plugin.lsb import LSBPlugin
-from .plugin.randlsb import RandomLSBPlugin
-from .plugin.dwtdugad import DWTDugadPlugin
+import importlib
+import threading
+from typing import Dict, List, Optional
+from .plugin.base import StegaPyPlugin, Purpose
+
+
+class PluginDescriptor:
+    """插件描述信息
+    
+    只记录插件名称、用途、扩展名以及插件类的导入路径（"模块:类名"），
+    插件模块在首次使用时才会导入，未使用的插件不会引入其依赖（如pywt）。
+    用途和扩展名未知时（如通过入口点注册的第三方插件）为 None，需要时加载插件获取。
+    """
+    
+    def __init__(self, name: str, target: str, purposes: Optional[List[Purpose]] = None,
+                 readable_extensions: Optional[List[str]] = None,
+                 writable_extensions: Optional[List[str]] = None):
+        """初始化插件描述
+        
+        Args:
+            name: 插件名称
+            target: 插件类的导入路径，格式为 "模块:类名"（以 "." 开头的模块相对于本包）
+            purposes: 插件用途
+            readable_extensions: 支持读取的文件扩展名
+            writable_extensions: 支持写入的文件扩展名
+        """
+        self.name = name
+        self.target = target
+        self.purposes = purposes
+        self.readable_extensions = readable_extensions
+        self.writable_extensions = writable_extensions
+    
+    def load_class(self):
+        """导入并返回插件类"""
+        module_name, _, class_name = self.target.partition(':')
+        module = importlib.import_module(module_name, __package__)
+        return getattr(module, class_name)
+    
+    def update_from(self, plugin: StegaPyPlugin):
+        """根据已加载的插件补全描述信息"""
+        if self.purposes is None:
+            self.purposes = plugin.get_purposes()
+        if self.readable_extensions is None:
+            self.readable_extensions = plugin.get_readable_file_extensions()
+        if self.writable_extensions is None:
+            self.writable_extensions = plugin.get_writable_file_extensions()
+
+
+# 内置插件
+BUILTIN_PLUGINS = [
+    PluginDescriptor('LSB', '.plugin.lsb.lsb_plugin:LSBPlugin',
+                     [Purpose.DATA_HIDING], ['png', 'bmp', 'jpg', 'jpeg', 'webp', 'tif', 'tiff'],
+                     ['png', 'bmp', 'webp', 'tif', 'tiff']),
+    PluginDescriptor('RandomLSB', '.plugin.randlsb.random_lsb_plugin:RandomLSBPlugin',
+                     [Purpose.DATA_HIDING], ['png', 'bmp', 'jpg', 'jpeg', 'webp', 'tif', 'tiff'],
+                     ['png', 'bmp', 'webp', 'tif', 'tiff']),
+    PluginDescriptor('DWTDugad', '.plugin.dwtdugad.dwt_dugad_plugin:DWTDugadPlugin',
+                     [Purpose.WATERMARKING], ['png', 'bmp', 'jpg', 'jpeg'], ['png', 'bmp']),
+]
 
 
 class PluginManager:
-    """插件管理器，负责系统内各类隐写和水印插件的注册、加载与生命周期管理。"""
+    """插件管理器，负责系统内各类隐写和水印插件的注册、加载与生命周期管理。
+    
+    插件来源为内置插件和 "stegapy.plugins" 入口点（入口点名称为插件名称，
+    值为 "模块:类名"）。注册表只保存插件描述，插件在首次获取时才导入并实例化。
+    """
+    
+    ENTRY_POINT_GROUP = "stegapy.plugins"
     
+    _descriptors: Dict[str, PluginDescriptor] = {}
     _plugins: Dict[str, StegaPyPlugin] = {}
     _initialized = False
+    _lock = threading.RLock()
     
     @classmethod
     def load_plugins(cls):
-        """初始化并加载系统内置的所有算法插件。"""
+        """登记内置插件和入口点插件的描述信息（不导入插件模块）。"""
         if cls._initialized:
             return
         
-        # 注册内置插件
-        cls._plugins['LSB'] = LSBPlugin()
-        cls._plugins['RandomLSB'] = RandomLSBPlugin()
-        cls._plugins['DWTDugad'] = DWTDugadPlugin()
+        with cls._lock:
+            if cls._initialized:
+                return
+            for descriptor in BUILTIN_PLUGINS:
+                cls._descriptors.setdefault(descriptor.name, descriptor)
+            for descriptor in cls._discover_entry_points():
+                cls._descriptors.setdefault(descriptor.name, descriptor)
+            cls._initialized = True
+    
+    @classmethod
+    def _discover_entry_points(cls) -> List[PluginDescriptor]:
+        """通过 importlib.metadata 发现第三方插件"""
+        try:
+            from importlib import metadata
+        except ImportError:
+            return []
         
-        cls._initialized = True
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            entry_points = entry_points.select(group=cls.ENTRY_POINT_GROUP)
+        else:
+            # Python 3.8/3.9 返回按组划分的字典
+            entry_points = entry_points.get(cls.ENTRY_POINT_GROUP, [])
+        return [PluginDescriptor(entry_point.name, entry_point.value) for entry_point in entry_points]
+    
+    @classmethod
+    def register(cls, descriptor: PluginDescriptor):
+        """注册插件描述（同名插件会被替换）。"""
+        cls.load_plugins()
+        with cls._lock:
+            cls._descriptors[descriptor.name] = descriptor
+            cls._plugins.pop(descriptor.name, None)
+    
+    @classmethod
+    def get_descriptor(cls, name: str) -> Optional[PluginDescriptor]:
+        """获取插件描述（不导入插件）。"""
+        cls.load_plugins()
+        return cls._descriptors.get(name)
+    
+    @classmethod
+    def get_plugin_names(cls) -> List[str]:
+        """获取所有已登记的插件名称（不导入插件）。"""
+        cls.load_plugins()
+        return list(cls._descriptors)
     
     @classmethod
     def get_plugin_by_name(cls, name: str) -> Optional[StegaPyPlugin]:
-        """根据指定的插件名称获取对应的插件实例。"""
-        if not cls._initialized:
-            cls.load_plugins()
-        return cls._plugins.get(name)
+        """根据指定的插件名称获取对应的插件实例（首次获取时导入并实例化）。"""
+        cls.load_plugins()
+        plugin = cls._plugins.get(name)
+        if plugin is not None:
+            return plugin
+        
+        descriptor = cls._descriptors.get(name)
+        if descriptor is None:
+            return None
+        with cls._lock:
+            if name not in cls._plugins:
+                plugin = descriptor.load_class()()
+                descriptor.update_from(plugin)
+                cls._plugins[name] = plugin
+            return cls._plugins[name]
+    
+    @classmethod
+    def create_plugin(cls, name: str, config=None) -> Optional[StegaPyPlugin]:
+        """创建指定插件的新实例（每个请求使用独立实例，并发时互不影响）。
+        
+        get_plugin_by_name 返回的是全局共享的实例，仅应用于查询插件信息，
+        修改其配置会影响其他并发请求。
+        """
+        plugin = cls.get_plugin_by_name(name)
+        if plugin is None:
+            return None
+        return plugin.with_config(config)
+    
+    @classmethod
+    def preload(cls, names: Optional[List[str]] = None):
+        """预先导入并实例化插件（如工作进程启动时），默认为全部插件。"""
+        for name in names or cls.get_plugin_names():
+            cls.get_plugin_by_name(name)
     
     @classmethod
     def get_all_plugins(cls) -> List[StegaPyPlugin]:
-        """获取当前系统已加载的所有插件列表。"""
-        if not cls._initialized:
-            cls.load_plugins()
-        return list(cls._plugins.values())
+        """获取当前系统已登记的所有插件列表（会导入全部插件）。"""
+        cls.load_plugins()
+        return [cls.get_plugin_by_name(name) for name in list(cls._descriptors)]
     
     @classmethod
     def get_plugins_by_purpose(cls, purpose):
-        """根据指定用途（如数据隐藏、数字水印）过滤并获取支持该功能的插件列表。"""
-        if not cls._initialized:
-            cls.load_plugins()
+        """根据指定用途（如数据隐藏、数字水印）过滤并获取支持该功能的插件列表。
+        
+        只导入用途匹配（或用途未知）的插件。
+        """
+        cls.load_plugins()
         
         result = []
-        for plugin in cls._plugins.values():
+        for name, descriptor in list(cls._descriptors.items()):
+            if descriptor.purposes is not None and purpose not in descriptor.purposes:
+                continue
+            plugin = cls.get_plugin_by_name(name)
             if purpose in plugin.get_purposes():
                 result.append(plugin)
         return result
-
@@ -0,0 +1,166 @@
+"""
+延迟编码的隐写结果
+
+Copyright (C) 2025  MearaY
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along
+with this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING, BinaryIO, Dict, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+
+class StegoResult:
+    """嵌入操作的结果：持有隐写后的像素，只在需要时编码
+    
+    - pixels: 像素数组（高 x 宽 x 3，uint8，只读）
+    - image: PIL 图像（首次访问时生成）
+    - encode(format, profile, **options): 编码为字节串，按格式和选项缓存
+    - save(path, format, **options): 编码并写入文件
+    
+    不需要编码结果的流水线（如直接把像素交给下一个处理步骤）不必付出编码的开销。
+    StegaPy.embed_data(..., lazy=True) 等方法返回该对象，默认仍返回编码后的字节串。
+    """
+    
+    def __init__(self, data: Union['np.ndarray', 'Image.Image', bytes], filename: Optional[str] = None,
+                 profile: Optional[str] = None):
+        """初始化
+        
+        Args:
+            data: 隐写后的像素数组、PIL 图像（之后不应再修改），或已按 filename 编码的字节串
+                  （像素在首次访问时解码）
+            filename: 隐写图像文件名，用于确定默认编码格式（默认 PNG）
+            profile: 默认编码配置（见 ImageUtil.ENCODING_PROFILES），None 表示使用 PIL 默认选项
+        """
+        from PIL import Image
+        
+        self.filename = filename
+        self.profile = profile
+        self._pixels = None
+        self._image = None
+        self._source = None
+        self._encoded: Dict[Tuple, bytes] = {}
+        self._lock = threading.Lock()
+        if isinstance(data, Image.Image):
+            self._image = data
+        elif isinstance(data, (bytes, bytearray)):
+            self._source = bytes(data)
+            self._encoded[self._resolve(None, profile, {})[0]] = self._source
+        else:
+            # 编码结果会被缓存，像素不允许再修改
+            data.flags.writeable = False
+            self._pixels = data
+    
+    @property
+    def pixels(self) -> 'np.ndarray':
+        """隐写后的像素数组（只读，需要修改时请复制）"""
+        if self._pixels is None:
+            from .util.image_util import ImageUtil
+            
+            with self._lock:
+                if self._pixels is None:
+                    source = self._image if self._image is not None else self._source
+                    pixels = ImageUtil.byte_array_to_pixels(source, self.filename)
+                    pixels.flags.writeable = False
+                    self._pixels = pixels
+        return self._pixels
+    
+    @property
+    def image(self) -> 'Image.Image':
+        """隐写后的 PIL 图像（首次访问时生成，之后复用）"""
+        if self._image is None:
+            with self._lock:
+                if self._image is None:
+                    self._image = self._to_image()
+        return self._image
+    
+    @property
+    def size(self) -> Tuple[int, int]:
+        """图像尺寸 (宽, 高)"""
+        if self._image is not None:
+            return self._image.size
+        return self.pixels.shape[1], self.pixels.shape[0]
+    
+    @property
+    def format(self) -> str:
+        """默认编码格式（由文件名确定）"""
+        from .util.image_util import ImageUtil
+        
+        return ImageUtil.get_format(self.filename)
+    
+    def encode(self, format: Optional[str] = None, profile: Optional[str] = None, **options) -> bytes:
+        """编码为字节串，相同格式和选项的结果只编码一次
+        
+        Args:
+            format: PIL 格式名（如 'PNG'、'BMP'），默认由文件名确定
+            profile: 编码配置名，默认使用创建时指定的配置
+            options: 传给 PIL Image.save() 的编码选项（如 compress_level），覆盖编码配置中的同名选项
+        """
+        from .util.image_util import ImageUtil
+        
+        key, format, options = self._resolve(format, profile or self.profile, options)
+        data = self._encoded.get(key)
+        if data is None:
+            # 未访问过 image 时使用临时图像，编码后即释放
+            image = self._image if self._image is not None else self._to_image()
+            data = ImageUtil.image_to_byte_array(image, None, format, **options)
+            self._encoded[key] = data
+        return data
+    
+    def _resolve(self, format: Optional[str], profile: Optional[str], options: Dict) -> Tuple:
+        """合并编码配置，返回 (缓存键, 格式, 编码选项)"""
+        from .util.image_util import ImageUtil
+        
+        format = (format or self.format).upper()
+        options = ImageUtil.get_encoding_options(format, profile, **options)
+        # 选项值可能是字典等不可哈希的对象（如 TIFF 的 tiffinfo），缓存键使用其文本表示
+        return (format, repr(sorted(options.items()))), format, options
+    
+    def save(self, path: Union[str, 'os.PathLike', BinaryIO], format: Optional[str] = None,
+             profile: Optional[str] = None, **options) -> bytes:
+        """编码并写入文件或文件对象，返回写入的字节串
+        
+        未指定 format 时由路径的扩展名确定，无法确定时使用默认格式。
+        """
+        from .util.image_util import ImageUtil
+        
+        if format is None and isinstance(path, (str, os.PathLike)):
+            format = ImageUtil.get_format(os.fspath(path), self.format)
+        data = self.encode(format, profile, **options)
+        if hasattr(path, 'write'):
+            path.write(data)
+        else:
+            with open(path, 'wb') as f:
+                f.write(data)
+        return data
+    
+    def _to_image(self) -> 'Image.Image':
+        """由像素数组生成 PIL 图像"""
+        from PIL import Image
+        
+        return Image.fromarray(self.pixels)
+    
+    def __bytes__(self) -> bytes:
+        return self.encode()
+    
+    def __repr__(self) -> str:
+        width, height = self.size
+        return (f"StegoResult({width}x{height}, format={self.format}, profile={self.profile}, "
+                f"encoded={len(self._encoded)})")
@@ -0,0 +1,691 @@
+"""
+StegaPy HTTP 服务
+
+Copyright (C) 2025  MearaY
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along
+with this program; if not, write to the Free Software Foundation, Inc.,
+51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from email import policy
+from email.parser import BytesParser
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlsplit
+from .batch import create_stegapy, init_worker
+from .plugin.base import Purpose
+from .plugin_manager import PluginManager
+from .exceptions import StegaPyException, StegaPyErrors
+from .util.metrics_util import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsUtil
+
+NAMESPACE = "Server"
+
+PASSWORD_HEADER = "X-StegaPy-Password"
+PROFILE_HEADER = "X-StegaPy-Profile"
+
+
+class HTTPError(Exception):
+    """请求处理错误，对应一个HTTP状态码"""
+    
+    def __init__(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None):
+        """初始化错误"""
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def _embed(plugin_name, config, files, params, output):
+    """嵌入数据：消息按块读取并嵌入，隐写图像写入 output"""
+    stegapy = create_stegapy(plugin_name, config)
+    msg_filename, msg_path = files['message']
+    cover_filename, cover_path = files['cover']
+    with open(msg_path, 'rb') as msg:
+        result = stegapy.embed_stream(msg, msg_filename, cover_path, cover_filename,
+                                      f"stego.{params['format']}", lazy=True)
+    result.save(output)
+
+
+def _extract(plugin_name, config, files, params, output):
+    """提取数据：按块写入 output，返回消息文件名"""
+    stegapy = create_stegapy(plugin_name, config)
+    stego_filename, stego_path = files['stego']
+    with open(output, 'wb') as sink:
+        return stegapy.extract_to(stego_path, sink, stego_filename)
+
+
+def _mark(plugin_name, config, files, params, output):
+    """嵌入水印，水印图像写入 output"""
+    stegapy = create_stegapy(plugin_name, config)
+    sig_filename, sig_path = files['signature']
+    cover_filename, cover_path = files['cover']
+    with open(sig_path, 'rb') as f:
+        sig = f.read()
+    stegapy.embed_mark(sig, sig_filename, cover_path, cover_filename,
+                       f"watermarked.{params['format']}", lazy=True).save(output)
+
+
+def _check(plugin_name, config, files, params, output):
+    """检查水印，返回 (相关性, 低水印阈值)"""
+    stegapy = create_stegapy(plugin_name, config)
+    stego_filename, stego_path = files['stego']
+    with open(files['signature'][1], 'rb') as f:
+        sig = f.read()
+    correlation = stegapy.check_mark(stego_path, stego_filename, sig)
+    return correlation, stegapy.plugin.get_low_watermark_level()
+
+
+def _init_server_worker():
+    """工作进程初始化：预先加载插件并启用指标记录"""
+    init_worker()
+    MetricsUtil.enable()
+    # fork 启动的工作进程会带上主进程的取值，清空后只记录本进程的增量
+    MetricsUtil.get_registry().reset()
+
+
+def _process(operation, plugin_name, config, files, params, output):
+    """工作进程入口：执行操作，返回 (结果, 异常, 指标增量)"""
+    try:
+        result, error = operation(plugin_name, config, files, params, output), None
+    except StegaPyException as e:
+        result, error = None, e
+    except Exception as e:
+        # 其他异常不一定能序列化，统一包装
+        result, error = None, StegaPyException(f"{type(e).__name__}: {e}",
+                                               StegaPyErrors.UNHANDLED_EXCEPTION, NAMESPACE)
+    return result, error, MetricsUtil.get_registry().drain()
+
+
+class _SpoolDir:
+    """请求的临时目录，保存上传的文件和处理结果
+    
+    请求处理线程和进程池中的任务各持有一个引用，两者都释放后删除目录
+    （处理超时返回 504 后任务仍可能在读写其中的文件）。
+    """
+    
+    def __init__(self):
+        """创建临时目录，初始引用属于请求处理线程"""
+        self.path = tempfile.mkdtemp(prefix='stegapy-')
+        self._refs = 1
+        self._lock = threading.Lock()
+    
+    def file(self, name: str) -> str:
+        """目录中的文件路径"""
+        return os.path.join(self.path, name)
+    
+    def retain(self):
+        """增加一个引用"""
+        with self._lock:
+            self._refs += 1
+    
+    def release(self):
+        """释放一个引用，引用全部释放后删除目录"""
+        with self._lock:
+            self._refs -= 1
+            if self._refs:
+                return
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class _RequestBody:
+    """请求体读取器：按 Content-Length 或 chunked 传输编码读取，读取过程中检查大小限制"""
+    
+    def __init__(self, rfile, headers, limit: int):
+        """初始化读取器
+        
+        Args:
+            rfile: 连接的输入流
+            headers: 请求头
+            limit: 请求体大小上限（字节）
+        """
+        self.rfile = rfile
+        self.limit = limit
+        self.received = 0
+        self.chunked = headers.get('Transfer-Encoding', '').lower() == 'chunked'
+        # 当前块（或整个请求体）中尚未读取的字节数
+        self.remaining = 0 if self.chunked else int(headers.get('Content-Length') or 0)
+        if self.remaining < 0:
+            raise ValueError("Content-Length 不能为负数")
+        self.finished = not self.chunked and self.remaining == 0
+    
+    def read(self, size: int) -> bytes:
+        """读取至多 size 字节，请求体结束时返回 b''"""
+        if self.finished:
+            return b''
+        if self.chunked and self.remaining == 0:
+            line = self.rfile.readline(1024)
+            try:
+                self.remaining = int(line.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "无效的 chunked 编码")
+            if self.remaining == 0:
+                # 跳过 trailer
+                while self.rfile.readline(1024) not in (b'\r\n', b'\n', b''):
+                    pass
+                self.finished = True
+                return b''
+        if self.received + self.remaining > self.limit:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"请求体超过 {self.limit} 字节")
+        
+        chunk = self.rfile.read(min(size, self.remaining))
+        if not chunk:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求体不完整")
+        self.received += len(chunk)
+        self.remaining -= len(chunk)
+        if self.remaining == 0:
+            if self.chunked:
+                # 块末尾的 CRLF
+                self.rfile.readline(1024)
+            else:
+                self.finished = True
+        return chunk
+    
+    def drain(self, chunk_size: int):
+        """读取并丢弃剩余的请求体（如 multipart 结束分隔行之后的内容）"""
+        while self.read(chunk_size):
+            pass
+
+
+def _read_multipart(read, boundary: bytes, open_part, chunk_size: int):
+    """从 read(n) 中按块解析 multipart 请求体，不在内存中保存完整的字段内容
+    
+    每个字段开始时调用 open_part(字段名, 文件名) 获取可写的文件对象，返回 None 时丢弃该字段；
+    字段内容按块写入该对象。
+    """
+    delimiter = b'\r\n--' + boundary
+    # 第一个分隔行前没有 CRLF，补上后与其他分隔行统一处理
+    buffer = b'\r\n'
+    sink = None
+    
+    def fill():
+        nonlocal buffer
+        chunk = read(chunk_size)
+        if not chunk:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "multipart 请求体不完整")
+        buffer += chunk
+    
+    while True:
+        index = buffer.find(delimiter)
+        if index < 0:
+            # 保留可能是分隔行开头的末尾部分，其余内容属于当前字段（或前言）
+            keep = len(delimiter) - 1
+            if len(buffer) > keep:
+                if sink is not None:
+                    sink.write(buffer[:-keep])
+                buffer = buffer[-keep:]
+            fill()
+            continue
+        
+        if sink is not None:
+            sink.write(buffer[:index])
+        buffer = buffer[index + len(delimiter):]
+        while len(buffer) < 2:
+            fill()
+        if buffer.startswith(b'--'):
+            return
+        while b'\r\n\r\n' not in buffer:
+            if len(buffer) > 16 * 1024:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "multipart 字段头过长")
+            fill()
+        head, buffer = buffer.split(b'\r\n\r\n', 1)
+        # 分隔行的剩余部分（CRLF）之后是字段头
+        head = head.split(b'\r\n', 1)[1] if b'\r\n' in head else b''
+        part = BytesParser(policy=policy.HTTP).parsebytes(head + b'\r\n\r\n', headersonly=True)
+        name = part.get_param('name', header='content-disposition')
+        sink = open_part(name, part.get_filename()) if name else None
+
+
+# 路径 -> (处理函数, 必需的文件字段, 插件用途, 默认插件)
+ENDPOINTS = {
+    '/embed': (_embed, ('cover', 'message'), Purpose.DATA_HIDING, 'LSB'),
+    '/extract': (_extract, ('stego',), Purpose.DATA_HIDING, 'LSB'),
+    '/mark': (_mark, ('cover', 'signature'), Purpose.WATERMARKING, 'DWTDugad'),
+    '/check': (_check, ('stego', 'signature'), Purpose.WATERMARKING, 'DWTDugad'),
+}
+
+
+class StegaPyHTTPServer(ThreadingHTTPServer):
+    """StegaPy HTTP 服务
+    
+    - 处理在固定大小的进程池中执行，每个连接一个线程只负责收发数据；
+    - 同时接纳的请求数不超过 workers + queue_size，超出时立即返回 503（带 Retry-After），
+      而不是让请求无限排队，过载时已接纳请求的延迟保持稳定；
+    - 请求体超过 max_body_size 时返回 413；请求体按块读取（支持 chunked 上传），multipart 字段
+      边读边写入请求的临时目录，工作进程按块读取消息（embed_stream）、按块写出提取结果（extract_to），
+      结果以 chunked 传输编码写回，请求和结果都不会完整地保存在服务进程的内存中；
+    - 单个请求的处理超过 request_timeout 秒时返回 504，已开始执行的任务结束前仍占用名额；
+    - 工作进程中记录的指标随结果返回，与服务自身的指标一起通过 GET /metrics 导出。
+    """
+    
+    daemon_threads = True
+    verbose = False
+    # 监听队列长度，超出时由操作系统拒绝连接
+    request_queue_size = 128
+    
+    def __init__(self, address: Tuple[str, int], workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, max_body_size: int = 32 * 1024 * 1024,
+                 request_timeout: Optional[float] = 60.0, retry_after: int = 1,
+                 profile_sample_rate: float = 0.0, profile_dir: Optional[str] = None,
+                 allow_profile_header: bool = False):
+        """初始化服务
+        
+        Args:
+            address: 监听地址 (host, port)
+            workers: 工作进程数，默认为CPU核数
+            queue_size: 等待处理的请求数上限，默认为工作进程数的2倍
+            max_body_size: 请求体大小上限（字节）
+            request_timeout: 单个请求的处理超时时间（秒），None 表示不限制
+            retry_after: 过载时 Retry-After 响应头的值（秒）
+            profile_sample_rate: 性能剖析的采样率（0-1），报告写入工作进程所在机器的 profile_dir
+            profile_dir: 性能剖析报告的输出目录，None 表示使用默认目录
+            allow_profile_header: 是否允许客户端通过 X-StegaPy-Profile 请求头要求剖析本次请求
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.capacity = self.workers + self.queue_size
+        self.max_body_size = max_body_size
+        self.request_timeout = request_timeout
+        self.retry_after = retry_after
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_dir = profile_dir
+        self.allow_profile_header = allow_profile_header
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {'accepted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'timeouts': 0}
+        self.metrics = MetricsUtil.enable()
+        self._in_flight_gauge = self.metrics.gauge(
+            'stegapy_server_in_flight', "已接纳（读取中、排队中或处理中）的请求数")
+        self._queue_depth_gauge = self.metrics.gauge(
+            'stegapy_server_queue_depth', "超出工作进程数、等待处理的请求数")
+        self.metrics.gauge('stegapy_server_capacity', "同时接纳的请求数上限").set(self.capacity)
+        self._requests_counter = self.metrics.counter(
+            'stegapy_http_requests_total', "HTTP 请求数", ('endpoint', 'status'))
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_server_worker)
+        super().__init__(address, StegaPyRequestHandler)
+    
+    def acquire_slot(self) -> bool:
+        """尝试占用一个处理名额，已满时返回 False"""
+        acquired = self._slots.acquire(blocking=False)
+        with self._stats_lock:
+            if acquired:
+                self.in_flight += 1
+                self.stats['accepted'] += 1
+                self._update_queue_gauges()
+            else:
+                self.stats['rejected'] += 1
+        return acquired
+    
+    def release_slot(self):
+        """释放处理名额"""
+        with self._stats_lock:
+            self.in_flight -= 1
+            self._update_queue_gauges()
+        self._slots.release()
+    
+    def _update_queue_gauges(self):
+        """更新处理中请求数和排队深度指标（调用方持有 _stats_lock）"""
+        self._in_flight_gauge.set(self.in_flight)
+        self._queue_depth_gauge.set(max(0, self.in_flight - self.workers))
+    
+    def count_request(self, endpoint: str, status: int):
+        """记录一次 HTTP 响应"""
+        self._requests_counter.labels(endpoint, status).inc()
+    
+    def count(self, key: str):
+        """更新统计计数"""
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def get_status(self) -> Dict[str, Any]:
+        """获取服务状态"""
+        with self._stats_lock:
+            return dict(self.stats, status='ok', workers=self.workers, capacity=self.capacity,
+                        in_flight=self.in_flight)
+    
+    def server_close(self):
+        """关闭服务和进程池"""
+        super().server_close()
+        self.executor.shutdown()
+
+
+class StegaPyRequestHandler(BaseHTTPRequestHandler):
+    """请求处理器
+    
+    POST /embed    multipart 字段 cover、message，返回隐写图像
+    POST /extract  multipart 字段 stego（或请求体即为图像），返回提取的数据
+    POST /mark     multipart 字段 cover、signature，返回水印图像
+    POST /check    multipart 字段 stego、signature，返回 JSON 格式的相关性
+    GET  /health   返回服务状态
+    GET  /plugins  返回可用插件
+    GET  /metrics  返回 Prometheus 文本格式的指标
+    
+    选项通过查询参数传递：plugin、format（png/bmp，LSB 插件还支持无损的 webp/tiff）、encoding（fastest/balanced/smallest）、
+    compression（0/1）、codec、encrypt（0/1）、algorithm、max_bits；密码通过 X-StegaPy-Password 请求头传递。
+    服务允许时，X-StegaPy-Profile: 1 请求头要求对本次请求做性能剖析。
+    """
+    
+    protocol_version = "HTTP/1.1"
+    server_version = "StegaPy"
+    CHUNK_SIZE = 64 * 1024
+    GET_PATHS = ('/health', '/plugins', '/metrics')
+    
+    def do_GET(self):
+        """处理GET请求"""
+        path = urlsplit(self.path).path
+        if path == '/health':
+            self._send_json(HTTPStatus.OK, self.server.get_status())
+        elif path == '/plugins':
+            self._send_json(HTTPStatus.OK, [
+                {'name': name,
+                 'purposes': [purpose.value for purpose in PluginManager.get_descriptor(name).purposes or []]}
+                for name in PluginManager.get_plugin_names()])
+        elif path == '/metrics':
+            self._send_body(HTTPStatus.OK, self.server.metrics.render().encode('utf-8'),
+                            METRICS_CONTENT_TYPE)
+        else:
+            self._send_error(HTTPError(HTTPStatus.NOT_FOUND, f"未知的路径: {path}"))
+    
+    def handle_expect_100(self):
+        """客户端发送 Expect: 100-continue 时，在其上传请求体之前拒绝过大的请求"""
+        try:
+            too_large = int(self.headers.get('Content-Length') or 0) > self.server.max_body_size
+        except ValueError:
+            too_large = False
+        if too_large:
+            self.close_connection = True
+            self._send_error(HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                       f"请求体超过 {self.server.max_body_size} 字节"))
+            return False
+        return super().handle_expect_100()
+    
+    def do_POST(self):
+        """处理POST请求"""
+        url = urlsplit(self.path)
+        # 提交到进程池后名额交由任务释放（见 _handle），此后为 False
+        self.holds_slot = False
+        self.body = None
+        try:
+            if url.path not in ENDPOINTS:
+                raise HTTPError(HTTPStatus.NOT_FOUND, f"未知的路径: {url.path}")
+            try:
+                self.body = _RequestBody(self.rfile, self.headers, self.server.max_body_size)
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "无效的 Content-Length")
+            if not self.body.chunked and self.body.remaining > self.server.max_body_size:
+                raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f"请求体超过 {self.server.max_body_size} 字节")
+            if not self.server.acquire_slot():
+                raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "服务繁忙，请稍后重试",
+                                {'Retry-After': str(self.server.retry_after)})
+            self.holds_slot = True
+            self._handle(url.path, parse_qs(url.query))
+        except HTTPError as e:
+            # 未读完的请求体会破坏后续请求的解析，关闭连接
+            if self.body is None or not self.body.finished:
+                self.close_connection = True
+            self._send_error(e)
+        finally:
+            if self.holds_slot:
+                self.server.release_slot()
+    
+    def _handle(self, path: str, query: Dict[str, list]):
+        """读取请求、提交到进程池并返回结果
+        
+        上传的文件按块写入请求的临时目录，工作进程从中按块读取消息（embed_stream），
+        并将结果按块写入同一目录（extract_to），再以 chunked 传输编码写回客户端。
+        """
+        operation, required, purpose, default_plugin = ENDPOINTS[path]
+        params = {key: values[-1] for key, values in query.items()}
+        plugin_name = params.get('plugin', default_plugin)
+        descriptor = PluginManager.get_descriptor(plugin_name)
+        if descriptor is None:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"未知的插件: {plugin_name}")
+        if descriptor.purposes is not None and purpose not in descriptor.purposes:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"插件 {plugin_name} 不支持该操作")
+        params['format'] = params.get('format', 'png').lower()
+        if params['format'] not in (descriptor.writable_extensions or ('png', 'bmp')):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"不支持的输出格式: {params['format']}")
+        params['encoding'] = params.get('encoding', 'balanced').lower()
+        if params['encoding'] not in ('fastest', 'balanced', 'smallest'):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"未知的编码配置: {params['encoding']}")
+        
+        try:
+            threshold = float(params['threshold']) if 'threshold' in params else None
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "threshold 必须为数字")
+        
+        spool = _SpoolDir()
+        try:
+            files = self._read_files(required, spool)
+            config = self._build_config(params)
+            output = spool.file(f"output.{params['format']}")
+            
+            start = time.perf_counter()
+            future = self.server.executor.submit(_process, operation, plugin_name, config, files,
+                                                 params, output)
+            spool.retain()
+            
+            def finish(f):
+                # 超时后已开始执行的任务无法取消，名额在任务真正结束时才释放，避免进程池队列无限增长
+                self.server.release_slot()
+                spool.release()
+            
+            future.add_done_callback(finish)
+            self.holds_slot = False
+            try:
+                result, error, metrics = future.result(timeout=self.server.request_timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                self.server.count('timeouts')
+                raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT, "处理超时")
+            except Exception as e:
+                # 工作进程崩溃等
+                self.server.count('failed')
+                raise HTTPError(HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}")
+            elapsed = time.perf_counter() - start
+            self.server.metrics.merge(metrics)
+            
+            if error is not None:
+                self.server.count('failed')
+                status = (HTTPStatus.INTERNAL_SERVER_ERROR
+                          if error.get_error_code() == StegaPyErrors.UNHANDLED_EXCEPTION
+                          else HTTPStatus.UNPROCESSABLE_ENTITY)
+                raise HTTPError(status, str(error), {'X-StegaPy-Error': error.get_error_code()})
+            self.server.count('completed')
+            
+            headers = {'X-Processing-Time': f"{elapsed:.4f}"}
+            if path == '/check':
+                correlation, low_level = result
+                threshold = low_level if threshold is None else threshold
+                self._send_json(HTTPStatus.OK, {'correlation': correlation, 'threshold': threshold,
+                                                'valid': correlation >= threshold}, headers)
+            elif path == '/extract':
+                name = os.path.basename((result or '').replace('\\', '/')) or 'message.bin'
+                headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(name)}"
+                self._send_file(HTTPStatus.OK, output, 'application/octet-stream', headers)
+            else:
+                content_type = 'image/tiff' if params['format'] == 'tif' else f"image/{params['format']}"
+                self._send_file(HTTPStatus.OK, output, content_type, headers)
+        finally:
+            spool.release()
+    
+    def _build_config(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """将查询参数转换为插件配置参数"""
+        def flag(name, default):
+            value = params.get(name)
+            return default if value is None else value.lower() in ('1', 'true', 'yes', 'on')
+        
+        config = {
+            'password': self.headers.get(PASSWORD_HEADER) or None,
+            'use_compression': flag('compression', True),
+            'compression_codec': params.get('codec', 'deflate'),
+            'use_encryption': flag('encrypt', False),
+            'encryption_algorithm': params.get('algorithm', 'AES128'),
+            'encoding_profile': params['encoding'],
+        }
+        if self.server.profile_sample_rate:
+            config['profile_sample_rate'] = self.server.profile_sample_rate
+        if self.server.profile_dir:
+            config['profile_dir'] = self.server.profile_dir
+        if self.server.allow_profile_header and \
+                (self.headers.get(PROFILE_HEADER) or '').lower() in ('1', 'true', 'yes', 'on'):
+            config['profile'] = True
+        if 'max_bits' in params:
+            try:
+                config['max_bits_used_per_channel'] = int(params['max_bits'])
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "max_bits 必须为整数")
+        return config
+    
+    def _read_files(self, required, spool: _SpoolDir) -> Dict[str, Tuple[Optional[str], str]]:
+        """按块读取请求中的文件字段并写入临时目录，返回 {字段名: (文件名, 路径)}"""
+        content_type = self.headers.get('Content-Type', '')
+        files = {}
+        sinks = {}
+        
+        def open_part(name, filename):
+            if name not in required:
+                return None
+            if name in sinks:
+                sinks[name].close()
+            files[name] = (filename, spool.file(name))
+            sinks[name] = open(files[name][1], 'wb')
+            return sinks[name]
+        
+        try:
+            if content_type.lower().startswith('multipart/form-data'):
+                boundary = BytesParser(policy=policy.HTTP).parsebytes(
+                    f"Content-Type: {content_type}\r\n\r\n".encode('latin-1'), headersonly=True).get_boundary()
+                if not boundary:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, "无效的 multipart 请求体")
+                _read_multipart(self.body.read, boundary.encode('latin-1'), open_part, self.CHUNK_SIZE)
+                self.body.drain(self.CHUNK_SIZE)
+            elif len(required) == 1:
+                # 只需要一个文件时，请求体可以直接是文件内容
+                sink = open_part(required[0], None)
+                for chunk in iter(lambda: self.body.read(self.CHUNK_SIZE), b''):
+                    sink.write(chunk)
+        finally:
+            for sink in sinks.values():
+                sink.close()
+        
+        missing = [name for name in required if name not in files or not os.path.getsize(files[name][1])]
+        if missing:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"缺少文件字段: {', '.join(missing)}")
+        return files
+    
+    def _send_headers(self, status: HTTPStatus, content_type: str, headers: Dict[str, str]):
+        """记录响应并发送状态行和响应头"""
+        path = urlsplit(self.path).path
+        endpoint = path if path in ENDPOINTS or path in self.GET_PATHS else 'other'
+        self.server.count_request(endpoint, status.value)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        self.end_headers()
+    
+    def _send_body(self, status: HTTPStatus, data: bytes, content_type: str,
+                   headers: Optional[Dict[str, str]] = None):
+        """发送响应，响应体按块写出"""
+        self._send_headers(status, content_type, dict(headers or {}, **{'Content-Length': str(len(data))}))
+        view = memoryview(data)
+        for offset in range(0, len(view), self.CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + self.CHUNK_SIZE])
+    
+    def _send_file(self, status: HTTPStatus, path: str, content_type: str,
+                   headers: Optional[Dict[str, str]] = None):
+        """发送文件内容，按块读取并以 chunked 传输编码写出（HTTP/1.0 客户端使用 Content-Length）"""
+        chunked = self.request_version != 'HTTP/1.0'
+        extra = {'Transfer-Encoding': 'chunked'} if chunked else {'Content-Length': str(os.path.getsize(path))}
+        self._send_headers(status, content_type, dict(headers or {}, **extra))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b''):
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+        if chunked:
+            self.wfile.write(b'0\r\n\r\n')
+    
+    def _send_json(self, status: HTTPStatus, payload, headers: Optional[Dict[str, str]] = None):
+        """发送 JSON 响应"""
+        self._send_body(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+                        'application/json; charset=utf-8', headers)
+    
+    def _send_error(self, error: HTTPError):
+        """发送错误响应"""
+        self._send_json(error.status, {'error': error.message, 'status': error.status.value},
+                        error.headers)
+    
+    def log_message(self, format, *args):
+        """仅在 verbose 模式下输出访问日志"""
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(host: str = '127.0.0.1', port: int = 8000, **kwargs) -> StegaPyHTTPServer:
+    """创建服务，参数含义见 StegaPyHTTPServer"""
+    return StegaPyHTTPServer((host, port), **kwargs)
+
+
+def main(argv=None) -> int:
+    """命令行入口: python -m StegaPy.server"""
+    parser = argparse.ArgumentParser(description="StegaPy HTTP 服务")
+    parser.add_argument('--host', default='127.0.0.1', help="监听地址（默认 127.0.0.1）")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口（默认 8000）")
+    parser.add_argument('--workers', type=int, help="工作进程数（默认为CPU核数）")
+    parser.add_argument('--queue-size', type=int, help="等待处理的请求数上限（默认为工作进程数的2倍）")
+    parser.add_argument('--max-body-mb', type=float, default=32, help="请求体大小上限（MB，默认 32）")
+    parser.add_argument('--timeout', type=float, default=60, help="单个请求的处理超时（秒，默认 60）")
+    parser.add_argument('--profile-rate', type=float, default=0.0,
+                        help="性能剖析的采样率（0-1，默认 0 不剖析）")
+    parser.add_argument('--profile-dir', help="性能剖析报告的输出目录")
+    parser.add_argument('--allow-profile-header', action='store_true',
+                        help=f"允许客户端通过 {PROFILE_HEADER}: 1 请求头要求剖析单个请求")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出访问日志")
+    args = parser.parse_args(argv)
+    if not 0.0 <= args.profile_rate <= 1.0:
+        parser.error("--profile-rate 必须在0-1之间")
+    
+    server = create_server(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+                           max_body_size=int(args.max_body_mb * 1024 * 1024),
+                           request_timeout=args.timeout or None,
+                           profile_sample_rate=args.profile_rate, profile_dir=args.profile_dir,
+                           allow_profile_header=args.allow_profile_header)
+    server.verbose = args.verbose
+    host, port = server.server_address[:2]
+    print(f"StegaPy 服务已启动: http://{host}:{port}（{server.workers} 个工作进程，"
+          f"最多 {server.capacity} 个并发请求）", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,27 @@
 """
 工具模块
+
+ImageUtil、CryptoUtil 依赖 numpy、PIL、cryptography 等较重的库，按需导入。
 """
 
-from .image_util import ImageUtil
-from .crypto_util import CryptoUtil
-from .common_util import CommonUtil
+import importlib
+
+_LAZY_IMPORTS = {
+    'ImageUtil': '.image_util',
+    'CryptoUtil': '.crypto_util',
+    'CommonUtil': '.common_util',
+    'PerformanceUtil': '.performance_util',
+    'MetricsUtil': '.metrics_util',
+    'ProfileUtil': '.profile_util',
+}
+
+__all__ = ['ImageUtil', 'CryptoUtil', 'CommonUtil', 'PerformanceUtil', 'MetricsUtil', 'ProfileUtil']
 
-__all__ = ['ImageUtil', 'CryptoUtil', 'CommonUtil']
 
+def __getattr__(name):
+    """按需导入工具类"""
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,116 +1,115 @@
-# Auto-generated utility file
+"""
+缓存工具模块
+"""
 
-    def check_mark(self, stego_data: bytes, stego_filename: Optional[str],
-                   orig_sig_data: bytes) -> float:
-        """检查水印相关性"""
-        if Purpose.WATERMARKING not in self.plugin.get_purposes():
-    # Fix: handle edge case
-            raise StegaPyException(
-                "插件不支持水印",
-                StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_WM,
-                self.NAMESPACE
-            )
-        
-        try:
-            correl = self.plugin.check_mark(stego_data, stego_filename, orig_sig_data)
-            if correl is None or (isinstance(correl, float) and correl != correl):  # NaN check
-                return 0.0
-            return float(correl)
-        except StegaPyException:
-            raise
-        except Exception as e:
-            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
-    
+import threading
+from collections import OrderedDict
 
 
-    def generate_signature(self) -> bytes:
-        """生成签名数据"""
-        if Purpose.WATERMARKING not in self.plugin.get_purposes():
-            raise StegaPyException(
-    # Fix: handle edge case
-                "插件不支持水印",
-                StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_WM,
-                self.NAMESPACE
-            )
-        
-        if not self.config.get_password():
-            raise StegaPyException(
-                "生成签名需要密码",
-                StegaPyErrors.PWD_MANDATORY_FOR_GENSIG,
-                self.NAMESPACE
-    # Fix: handle edge case
-            )
-        
-        return self.plugin.generate_signature()
+class LRUCache:
+    """线程安全的有界 LRU 缓存，超出容量时淘汰最久未使用的条目。"""
     
-
-
-    def embed_mark(self, sig: bytes, sig_filename: Optional[str],
-                   cover: Optional[bytes], cover_filename: Optional[str],
-                   stego_filename: Optional[str]) -> bytes:
-        """嵌入水印到封面图像"""
-        if Purpose.WATERMARKING not in self.plugin.get_purposes():
-            raise StegaPyException(
-                "插件不支持水印",
-                StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_WM,
-                self.NAMESPACE
-    # Fix: handle edge case
-            )
+    def __init__(self, max_size=32, on_evict=None):
+        """初始化缓存
         
-        try:
-            # 水印不使用压缩和加密
-            return self.plugin.embed_data(sig, sig_filename, cover,
-    # Fix: handle edge case
-                                         cover_filename, stego_filename)
-        except StegaPyException:
-            raise
-        except Exception as e:
-    # TODO: optimize this section
-            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
+        Args:
+            max_size: 最大条目数，小于等于0时不缓存任何条目
+            on_evict: 条目被淘汰或清空时的回调，签名为 on_evict(key, value)
+        """
+        self.max_size = max_size
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
     
-
-
-    def get_config(self) -> StegaPyConfig:
-        """获取配置"""
-        return self.config
+    def get(self, key, default=None):
+        """获取缓存值，命中时将其标记为最近使用"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
     
-
-
-    def extract_data(self, stego_data: bytes, 
-                    stego_filename: Optional[str]) -> List:
-        """从隐写数据中提取消息"""
-        if Purpose.DATA_HIDING not in self.plugin.get_purposes():
-            raise StegaPyException(
-                "插件不支持数据隐藏",
-                StegaPyErrors.PLUGIN_DOES_NOT_SUPPORT_DH,
-                self.NAMESPACE
-            )
+    def put(self, key, value):
+        """写入缓存值，必要时淘汰最久未使用的条目"""
+        evicted = []
+        with self._lock:
+            if self.max_size <= 0:
+                evicted.append((key, value))
+            else:
+                if key in self._entries:
+                    old = self._entries.pop(key)
+                    if old is not value:
+                        evicted.append((key, old))
+                self._entries[key] = value
+                while len(self._entries) > self.max_size:
+                    evicted.append(self._entries.popitem(last=False))
+        self._notify_evicted(evicted)
+    
+    def get_or_create(self, key, factory, copy=None):
+        """获取缓存值，未命中时调用 factory() 生成并写入缓存
+        
+        factory 在锁外执行，并发未命中时可能被重复调用，以先写入的结果为准。
+        copy 在锁内对缓存值做副本，避免调用方拿到的值随后被淘汰回调修改。
+        """
+        copy = copy or (lambda value: value)
         
-        try:
-            # 提取数据
-            msg_filename = self.plugin.extract_msg_filename(stego_data, stego_filename)
-            msg = self.plugin.extract_data(stego_data, stego_filename, None)
-            
-            # 解密数据（如果启用）
-            if self.config.is_use_encryption():
-                if not self.config.get_password():
-                    raise StegaPyException(
-                        "解密需要密码",
-                        StegaPyErrors.INVALID_PASSWORD,
-                        self.NAMESPACE
-                    )
-                crypto = CryptoUtil(self.config.get_password(),
-                                  self.config.get_encryption_algorithm())
-                msg = crypto.decrypt(msg)
-            
-            # 解压数据（如果启用）
-            if self.config.is_use_compression():
-                msg = self._decompress_data(msg)
-            
-            return [msg_filename, msg]
-        except StegaPyException:
-            raise
-        except Exception as e:
-            raise StegaPyException(str(e), StegaPyErrors.UNHANDLED_EXCEPTION, self.NAMESPACE)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy(self._entries[key])
+            self.misses += 1
+        
+        value = factory()
+        result = copy(value)
+        evicted = []
+        with self._lock:
+            if self.max_size <= 0:
+                evicted.append((key, value))
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                result = copy(self._entries[key])
+                evicted.append((key, value))
+            else:
+                self._entries[key] = value
+                while len(self._entries) > self.max_size:
+                    evicted.append(self._entries.popitem(last=False))
+        self._notify_evicted(evicted)
+        return result
     
-
+    def clear(self):
+        """清空缓存，并对每个条目触发淘汰回调"""
+        with self._lock:
+            evicted = list(self._entries.items())
+            self._entries.clear()
+        self._notify_evicted(evicted)
+    
+    def resize(self, max_size):
+        """调整缓存容量"""
+        evicted = []
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                evicted.append(self._entries.popitem(last=False))
+        self._notify_evicted(evicted)
+    
+    def __len__(self):
+        """获取当前缓存条目数"""
+        with self._lock:
+            return len(self._entries)
+    
+    def __contains__(self, key):
+        """判断键是否已缓存（不影响使用顺序）"""
+        with self._lock:
+            return key in self._entries
+    
+    def _notify_evicted(self, evicted):
+        """触发淘汰回调"""
+        if self.on_evict is None:
+            return
+        for key, value in evicted:
+            self.on_evict(key, value)
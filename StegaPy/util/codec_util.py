@@ -0,0 +1,484 @@
+"""
+负载压缩编解码工具模块
+"""
+
+import bz2
+import lzma
+import math
+import os
+import struct
+import time
+import zlib
+from collections import Counter, deque
+
+
+class CodecUtil:
+    """负载压缩编解码工具类
+    
+    每种编解码器由1字节ID标识，ID写入LSB数据头，提取时据此选择解压方式。
+    """
+    
+    # 编解码器ID
+    CODEC_STORED = 0x00  # 不压缩
+    CODEC_GZIP = 0x01  # gzip（版本2/3数据头的默认格式）
+    CODEC_DEFLATE = 0x02  # 原始deflate流，无gzip/zlib封装
+    CODEC_ZLIB_BASE = 0x10  # zlib，ID为 0x10 + 压缩级别(1-9)
+    CODEC_BZ2 = 0x20
+    CODEC_LZMA = 0x21  # 原始LZMA2流，无xz封装
+    CODEC_PARALLEL_DEFLATE = 0x30  # 分块并行deflate，每块带长度前缀，可并行解压
+    CODEC_ZDICT = 0x40  # 使用预设字典的原始deflate流，字典ID写入数据头
+    
+    AUTO = "auto"
+    DEFAULT_CODEC = "deflate"
+    
+    # 编解码器名称与ID的对应关系
+    CODEC_NAMES = {
+        "stored": CODEC_STORED,
+        "gzip": CODEC_GZIP,
+        "deflate": CODEC_DEFLATE,
+        "bz2": CODEC_BZ2,
+        "lzma": CODEC_LZMA,
+        "parallel-deflate": CODEC_PARALLEL_DEFLATE,
+        "zdict": CODEC_ZDICT,
+    }
+    for _level in range(1, 10):
+        CODEC_NAMES[f"zlib-{_level}"] = CODEC_ZLIB_BASE + _level
+    del _level
+    
+    # auto模式的候选编解码器，按CPU开销从低到高排列
+    AUTO_CANDIDATES = [CODEC_DEFLATE, CODEC_BZ2, CODEC_LZMA]
+    
+    DEFLATE_LEVEL = 6
+    ZDICT_LEVEL = 9  # 预设字典主要用于小负载，使用最高压缩级别
+    
+    # 分块并行压缩参数：数据按块独立压缩，达到阈值的数据在auto模式下优先使用
+    PARALLEL_BLOCK_SIZE = 1024 * 1024
+    PARALLEL_AUTO_THRESHOLD = 8 * 1024 * 1024
+    
+    # 可压缩性探测参数：对前缀样本估算熵并试压缩，压缩比高于阈值时视为不可压缩
+    PROBE_SAMPLE_SIZE = 16 * 1024
+    PROBE_ENTROPY_THRESHOLD = 7.9  # 比特/字节
+    PROBE_RATIO_THRESHOLD = 0.97
+    LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 6}]
+    
+    @staticmethod
+    def get_codec_id(name):
+        """根据编解码器名称获取ID（auto返回None）"""
+        if name is None:
+            return CodecUtil.CODEC_NAMES[CodecUtil.DEFAULT_CODEC]
+        name = name.lower()
+        if name == CodecUtil.AUTO:
+            return None
+        if name not in CodecUtil.CODEC_NAMES:
+            raise ValueError(f"不支持的压缩编解码器: {name}")
+        return CodecUtil.CODEC_NAMES[name]
+    
+    @staticmethod
+    def get_codec_name(codec_id):
+        """根据编解码器ID获取名称"""
+        for name, value in CodecUtil.CODEC_NAMES.items():
+            if value == codec_id:
+                return name
+        raise ValueError(f"未知的压缩编解码器ID: {codec_id}")
+    
+    @staticmethod
+    def is_valid_codec_id(codec_id):
+        """判断编解码器ID是否有效"""
+        return codec_id in CodecUtil.CODEC_NAMES.values()
+    
+    @staticmethod
+    def get_parallel_workers(workers=None):
+        """获取并行压缩的线程数（默认为CPU核数）"""
+        return max(1, workers or os.cpu_count() or 1)
+    
+    @staticmethod
+    def create_compressor(codec_id, workers=None, zdict=None):
+        """创建增量压缩器（带 compress(data) 和 flush() 方法）"""
+        if codec_id == CodecUtil.CODEC_ZDICT:
+            return zlib.compressobj(CodecUtil.ZDICT_LEVEL, zlib.DEFLATED, -15,
+                                    zdict=CodecUtil._require_zdict(zdict))
+        if codec_id == CodecUtil.CODEC_PARALLEL_DEFLATE:
+            return _ParallelDeflateCompressor(CodecUtil.PARALLEL_BLOCK_SIZE,
+                                              CodecUtil.get_parallel_workers(workers))
+        if codec_id == CodecUtil.CODEC_STORED:
+            return _StoredCodec()
+        if codec_id == CodecUtil.CODEC_GZIP:
+            return zlib.compressobj(wbits=31)
+        if codec_id == CodecUtil.CODEC_DEFLATE:
+            return zlib.compressobj(CodecUtil.DEFLATE_LEVEL, wbits=-15)
+        if CodecUtil.CODEC_ZLIB_BASE + 1 <= codec_id <= CodecUtil.CODEC_ZLIB_BASE + 9:
+            return zlib.compressobj(codec_id - CodecUtil.CODEC_ZLIB_BASE)
+        if codec_id == CodecUtil.CODEC_BZ2:
+            return bz2.BZ2Compressor()
+        if codec_id == CodecUtil.CODEC_LZMA:
+            return lzma.LZMACompressor(format=lzma.FORMAT_RAW, filters=CodecUtil.LZMA_FILTERS)
+        raise ValueError(f"未知的压缩编解码器ID: {codec_id}")
+    
+    @staticmethod
+    def create_decompressor(codec_id, workers=None, zdict=None):
+        """创建增量解压器（带 decompress(data, max_length)、eof 等属性）"""
+        if codec_id == CodecUtil.CODEC_ZDICT:
+            return zlib.decompressobj(wbits=-15, zdict=CodecUtil._require_zdict(zdict))
+        if codec_id == CodecUtil.CODEC_PARALLEL_DEFLATE:
+            return _ParallelDeflateDecompressor(CodecUtil.get_parallel_workers(workers))
+        if codec_id == CodecUtil.CODEC_STORED:
+            return _StoredCodec()
+        if codec_id == CodecUtil.CODEC_GZIP:
+            return zlib.decompressobj(wbits=31)
+        if codec_id == CodecUtil.CODEC_DEFLATE:
+            return zlib.decompressobj(wbits=-15)
+        if CodecUtil.CODEC_ZLIB_BASE + 1 <= codec_id <= CodecUtil.CODEC_ZLIB_BASE + 9:
+            return zlib.decompressobj()
+        if codec_id == CodecUtil.CODEC_BZ2:
+            return bz2.BZ2Decompressor()
+        if codec_id == CodecUtil.CODEC_LZMA:
+            return lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=CodecUtil.LZMA_FILTERS)
+        raise ValueError(f"未知的压缩编解码器ID: {codec_id}")
+    
+    @staticmethod
+    def _require_zdict(zdict):
+        """检查预设字典是否已提供"""
+        if not zdict:
+            raise ValueError("zdict编解码器需要预设字典")
+        return zdict
+    
+    @staticmethod
+    def compress(data, codec_id, workers=None, zdict=None):
+        """一次性压缩数据"""
+        compressor = CodecUtil.create_compressor(codec_id, workers, zdict)
+        return compressor.compress(data) + compressor.flush()
+    
+    @staticmethod
+    def decompress(data, codec_id, workers=None, zdict=None):
+        """一次性解压数据"""
+        if codec_id == CodecUtil.CODEC_PARALLEL_DEFLATE:
+            decompressor = CodecUtil.create_decompressor(codec_id, workers)
+            output = decompressor.decompress(data)
+            if not decompressor.eof or decompressor.unused_data:
+                raise ValueError("压缩数据不完整或结束后存在多余数据")
+            return output
+        return b''.join(CodecUtil.decompress_stream([data], codec_id, zdict=zdict))
+    
+    @staticmethod
+    def compress_stream(chunks, codec_id, workers=None, zdict=None):
+        """增量压缩数据块"""
+        compressor = CodecUtil.create_compressor(codec_id, workers, zdict)
+        for chunk in chunks:
+            block = compressor.compress(chunk)
+            if block:
+                yield block
+        tail = compressor.flush()
+        if tail:
+            yield tail
+    
+    @staticmethod
+    def decompress_stream(chunks, codec_id, chunk_size=64 * 1024, workers=None, zdict=None):
+        """增量解压数据块，每次输出不超过 chunk_size 字节
+        
+        Raises:
+            ValueError: 数据损坏或不完整
+        """
+        decompressor = CodecUtil.create_decompressor(codec_id, workers, zdict)
+        is_zlib = hasattr(decompressor, 'unconsumed_tail')
+        
+        for chunk in chunks:
+            data = chunk
+            while True:
+                if decompressor.eof:
+                    if len(data) > 0:
+                        raise ValueError("压缩数据结束后存在多余数据")
+                    break
+                try:
+                    block = decompressor.decompress(data, chunk_size)
+                except (zlib.error, OSError, lzma.LZMAError) as e:
+                    raise ValueError(f"数据解压失败: {str(e)}")
+                if block:
+                    yield block
+                if is_zlib:
+                    data = decompressor.unconsumed_tail
+                    if not data and len(block) < chunk_size:
+                        break
+                else:
+                    data = b''
+                    if decompressor.needs_input:
+                        break
+        
+        if is_zlib:
+            tail = decompressor.flush()
+            if tail:
+                yield tail
+        if not decompressor.eof:
+            raise ValueError("压缩数据不完整")
+    
+    @staticmethod
+    def estimate_entropy(sample):
+        """估算样本的香农熵（比特/字节）"""
+        if len(sample) == 0:
+            return 0.0
+        total = len(sample)
+        return -sum(count / total * math.log2(count / total)
+                    for count in Counter(bytes(sample)).values())
+    
+    @staticmethod
+    def is_compressible(data, zdict=None):
+        """探测数据是否值得压缩（如JPEG、zip、加密数据等通常不值得）
+        
+        只检查前缀样本：先估算熵，熵接近8比特/字节时直接判定为不可压缩；
+        否则以最快级别试压缩样本，根据压缩比判断。提供预设字典时使用字典试压缩，
+        以免短小的相似记录被误判为不可压缩。
+        """
+        sample = bytes(data[:CodecUtil.PROBE_SAMPLE_SIZE])
+        if len(sample) == 0:
+            return False
+        if CodecUtil.estimate_entropy(sample) >= CodecUtil.PROBE_ENTROPY_THRESHOLD:
+            return False
+        if zdict:
+            compressor = zlib.compressobj(1, zlib.DEFLATED, -15, zdict=zdict)
+            ratio = len(compressor.compress(sample) + compressor.flush()) / len(sample)
+        else:
+            ratio = len(zlib.compress(sample, 1)) / len(sample)
+        return ratio < CodecUtil.PROBE_RATIO_THRESHOLD
+    
+    @staticmethod
+    def select_and_compress(data, codec=None, cpu_budget=0.05, probe=False, workers=None,
+                            zdict=None):
+        """按配置压缩数据，返回 (编解码器ID, 压缩结果)
+        
+        Args:
+            data: 待压缩数据
+            codec: 编解码器名称，auto表示在CPU预算内选择输出最小的编解码器
+            cpu_budget: auto模式的CPU时间预算（秒），超出预算后不再尝试后续候选；
+                至少会尝试第一个候选
+            probe: 是否先探测可压缩性，不可压缩时直接原样存储
+            workers: 分块并行压缩的线程数，默认为CPU核数
+            zdict: 预设字典，zdict编解码器必须提供；auto模式下提供时优先尝试
+        
+        压缩结果不小于原数据时同样改为原样存储，避免压缩导致数据膨胀。
+        """
+        if probe and not CodecUtil.is_compressible(data, zdict):
+            return CodecUtil.CODEC_STORED, bytes(data)
+        
+        codec_id = CodecUtil.get_codec_id(codec)
+        if codec_id is not None:
+            compressed = CodecUtil.compress(data, codec_id, workers, zdict)
+            if len(compressed) >= len(data) and codec_id != CodecUtil.CODEC_STORED:
+                return CodecUtil.CODEC_STORED, bytes(data)
+            return codec_id, compressed
+        
+        candidates = CodecUtil.AUTO_CANDIDATES
+        if len(data) >= CodecUtil.PARALLEL_AUTO_THRESHOLD and CodecUtil.get_parallel_workers(workers) > 1:
+            # 大负载优先使用分块并行压缩，墙钟时间随核数下降
+            candidates = [CodecUtil.CODEC_PARALLEL_DEFLATE] + candidates[1:]
+        elif zdict:
+            candidates = [CodecUtil.CODEC_ZDICT] + candidates
+        
+        best_id, best = CodecUtil.CODEC_STORED, bytes(data)
+        start = time.process_time()
+        for candidate in candidates:
+            output = CodecUtil.compress(data, candidate, workers, zdict)
+            if len(output) < len(best):
+                best_id, best = candidate, output
+            if time.process_time() - start >= cpu_budget:
+                break
+        return best_id, best
+
+
+class _StoredCodec:
+    """不压缩的编解码器，接口与zlib压缩/解压对象一致"""
+    
+    def __init__(self):
+        """初始化"""
+        self.eof = False
+        self.unconsumed_tail = b''
+    
+    def compress(self, data):
+        """原样返回数据"""
+        return bytes(data)
+    
+    def decompress(self, data, max_length=0):
+        """原样返回数据（不限制输出长度）"""
+        return bytes(data)
+    
+    def flush(self):
+        """结束数据流"""
+        self.eof = True
+        return b''
+
+
+def _create_executor(workers):
+    """创建块压缩/解压线程池，单线程时返回 None（concurrent.futures 在此时才导入）"""
+    if workers <= 1:
+        return None
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+class _ParallelDeflateCompressor:
+    """分块并行deflate压缩器
+    
+    数据按 block_size 分块，各块在线程池中独立压缩为原始deflate流（zlib压缩时释放GIL）。
+    输出格式为若干帧：压缩长度(4字节，小端序) + 原始长度(4字节，小端序) + 压缩数据，
+    以压缩长度和原始长度均为0的帧结束。帧头即块索引，解压时无需解压即可定位每个块。
+    """
+    
+    FRAME_HEADER = struct.Struct('<II')
+    
+    def __init__(self, block_size, workers):
+        """初始化压缩器"""
+        self.block_size = block_size
+        self.workers = workers
+        self._buffer = bytearray()
+        self._executor = _create_executor(workers)
+    
+    @staticmethod
+    def _compress_block(block):
+        """压缩单个块"""
+        compressor = zlib.compressobj(CodecUtil.DEFLATE_LEVEL, wbits=-15)
+        return compressor.compress(block) + compressor.flush()
+    
+    def _compress_blocks(self, blocks):
+        """并行压缩多个块并输出帧"""
+        if self._executor is not None and len(blocks) > 1:
+            compressed = list(self._executor.map(self._compress_block, blocks))
+        else:
+            compressed = [self._compress_block(block) for block in blocks]
+        
+        output = bytearray()
+        for block, data in zip(blocks, compressed):
+            output += self.FRAME_HEADER.pack(len(data), len(block))
+            output += data
+        return bytes(output)
+    
+    def compress(self, data):
+        """缓冲数据，凑满一批（线程数 × 块大小）后并行压缩"""
+        self._buffer += data
+        batch_size = self.block_size * self.workers
+        if len(self._buffer) < batch_size:
+            return b''
+        
+        usable = len(self._buffer) - len(self._buffer) % batch_size
+        view = memoryview(self._buffer)
+        blocks = [bytes(view[i:i + self.block_size]) for i in range(0, usable, self.block_size)]
+        view.release()
+        del self._buffer[:usable]
+        return self._compress_blocks(blocks)
+    
+    def flush(self):
+        """压缩剩余数据并写入结束帧"""
+        view = memoryview(self._buffer)
+        blocks = [bytes(view[i:i + self.block_size]) for i in range(0, len(self._buffer), self.block_size)]
+        view.release()
+        self._buffer = bytearray()
+        output = self._compress_blocks(blocks) if blocks else b''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        return output + self.FRAME_HEADER.pack(0, 0)
+
+
+class _ParallelDeflateDecompressor:
+    """分块并行deflate解压器，接口与zlib解压对象一致
+    
+    先根据帧头扫描出完整的块，再在线程池中并行解压一批块。
+    """
+    
+    def __init__(self, workers):
+        """初始化解压器"""
+        self.workers = workers
+        self.eof = False
+        self.unconsumed_tail = b''
+        self.unused_data = b''
+        self._input = bytearray()
+        self._offset = 0
+        self._output = deque()
+        self._executor = _create_executor(workers)
+    
+    @staticmethod
+    def _decompress_block(frame):
+        """解压单个块并校验长度"""
+        data, raw_length = frame
+        decompressor = zlib.decompressobj(wbits=-15)
+        block = decompressor.decompress(data) + decompressor.flush()
+        if len(block) != raw_length or not decompressor.eof:
+            raise ValueError("压缩块长度不匹配，数据可能已损坏")
+        return block
+    
+    def _next_frames(self, limit):
+        """从输入缓冲中取出至多 limit 个完整的帧"""
+        header = _ParallelDeflateCompressor.FRAME_HEADER
+        frames = []
+        while limit is None or len(frames) < limit:
+            if len(self._input) - self._offset < header.size:
+                break
+            compressed_length, raw_length = header.unpack_from(self._input, self._offset)
+            if compressed_length == 0 and raw_length == 0:
+                self.eof = True
+                self.unused_data = bytes(self._input[self._offset + header.size:])
+                break
+            start = self._offset + header.size
+            if len(self._input) - start < compressed_length:
+                break
+            frames.append((bytes(self._input[start:start + compressed_length]), raw_length))
+            self._offset = start + compressed_length
+        
+        # 适时压缩输入缓冲，避免反复移动大块数据
+        if self._offset > len(self._input) // 2:
+            del self._input[:self._offset]
+            self._offset = 0
+        return frames
+    
+    def _decompress_frames(self, frames):
+        """并行解压一批帧"""
+        try:
+            if self._executor is not None and len(frames) > 1:
+                return list(self._executor.map(self._decompress_block, frames))
+            return [self._decompress_block(frame) for frame in frames]
+        except zlib.error as e:
+            raise ValueError(f"数据解压失败: {str(e)}")
+    
+    def decompress(self, data, max_length=0):
+        """解压数据，max_length大于0时每次输出不超过该长度，剩余输出在下次调用时返回"""
+        if self.eof:
+            if len(data) > 0:
+                self.unused_data += bytes(data)
+        else:
+            self._input += data
+        
+        if max_length <= 0:
+            # 一次性解压全部可用的块
+            blocks = list(self._output)
+            self._output.clear()
+            blocks.extend(self._decompress_frames(self._next_frames(None)))
+            self._shutdown_if_done()
+            return b''.join(blocks)
+        
+        output = bytearray()
+        while len(output) < max_length:
+            if not self._output:
+                # 输出不足时再解压一批（每批最多与线程数相同的块）
+                frames = self._next_frames(self.workers) if not self.eof else []
+                if not frames:
+                    break
+                self._output.extend(self._decompress_frames(frames))
+            block = self._output.popleft()
+            take = max_length - len(output)
+            if len(block) > take:
+                self._output.appendleft(block[take:])
+                block = block[:take]
+            output += block
+        self._shutdown_if_done()
+        
+        # 仍有待输出的数据时返回满长度，调用方会继续调用
+        return bytes(output)
+    
+    def flush(self):
+        """返回剩余的输出"""
+        blocks = list(self._output)
+        self._output.clear()
+        return b''.join(blocks)
+    
+    def _shutdown_if_done(self):
+        """数据结束后关闭线程池"""
+        if self.eof and self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -30,11 +30,50 @@ class CommonUtil:
             return stream.read()
         return bytes(stream)
     
+    @staticmethod
+    def iter_chunks(source, chunk_size=64 * 1024):
+        """将数据源按块迭代
+        
+        Args:
+            source: bytes/bytearray/memoryview、带read方法的文件对象或数据块的可迭代对象
+            chunk_size: 块大小（字节），对可迭代对象不重新分块
+        
+        Yields:
+            数据块
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            for offset in range(0, len(view), chunk_size):
+                yield view[offset:offset + chunk_size]
+        elif hasattr(source, 'read'):
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            for chunk in source:
+                if chunk:
+                    yield chunk
+    
     @staticmethod
     def password_hash(password):
         """计算密码哈希值"""
         return int(hashlib.sha256(password.encode()).hexdigest()[:16], 16)
     
+    @staticmethod
+    def random_permutation(seed, size):
+        """生成 0..size-1 的随机置换
+        
+        与 np.random.default_rng(seed).permutation(size) 的结果相同，但索引不超过 2**32 时
+        使用 uint32 存储，内存占用减半。
+        """
+        import numpy as np
+        
+        positions = np.arange(size, dtype=np.uint32 if size <= 2 ** 32 else np.int64)
+        np.random.default_rng(seed).shuffle(positions)
+        return positions
+    
     @staticmethod
     def get_file_extension(filename):
         """获取文件扩展名"""
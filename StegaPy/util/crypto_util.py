@@ -3,12 +3,26 @@
 """
 
 import os
+import hmac
+import itertools
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.exceptions import InvalidTag
 import hashlib
+from .cache_util import LRUCache
+from .metrics_util import MetricsUtil
+from ..config import StegaPyConfig
+from ..exceptions import StegaPyException, StegaPyErrors
+
+
+def _wipe_key(cache_key, key):
+    """淘汰派生密钥时将其内容清零"""
+    for i in range(len(key)):
+        key[i] = 0
 
 
 class CryptoUtil:
@@ -17,20 +31,43 @@ class CryptoUtil:
     ALGO_DES = "DES"
     ALGO_AES128 = "AES128"
     ALGO_AES256 = "AES256"
+    # AES-GCM认证加密（名称沿用JWE算法标识，可放入8字节CRYPT_ALGO字段）
+    ALGO_AES128_GCM = "A128GCM"
+    ALGO_AES256_GCM = "A256GCM"
+    # 可用的加密算法（DES已弃用，不在其中）
+    ALGORITHMS = (ALGO_AES128, ALGO_AES256, ALGO_AES128_GCM, ALGO_AES256_GCM)
+    
+    NAMESPACE = "CryptoUtil"
+    GCM_NONCE_LENGTH = 12
+    GCM_TAG_LENGTH = 16
     
     # 8字节盐值
     SALT = bytes([0x28, 0x5F, 0x71, 0xC9, 0x1E, 0x35, 0x0A, 0x62])
-    ITER_COUNT = 7
+    ITER_COUNT = StegaPyConfig.DEFAULT_KDF_ITERATIONS
+    
+    # 进程级派生密钥缓存：键为(密码摘要, 算法, 盐值, 迭代次数)，值为可清零的bytearray
+    KEY_CACHE_SIZE = 32
+    _key_cache = LRUCache(KEY_CACHE_SIZE, on_evict=_wipe_key)
+    # 进程内随机密钥，用于计算密码摘要，避免缓存键可被离线字典攻击
+    _cache_secret = os.urandom(32)
     
-    def __init__(self, password, algorithm='AES128'):
-        """初始化加密工具"""
-        self.password = password
+    def __init__(self, password, algorithm='AES128', iterations=None, salt=None):
+        """初始化加密工具
+        
+        Args:
+            password: 密码
+            algorithm: 加密算法名称
+            iterations: PBKDF2迭代次数，默认ITER_COUNT
+            salt: 盐值，默认SALT
+        """
         self.algorithm = algorithm.upper() if algorithm else 'AES128'
+        self.iterations = iterations or self.ITER_COUNT
+        self.salt = salt or self.SALT
         
         # 根据算法确定密钥长度
-        if self.algorithm == 'AES128':
+        if self.algorithm in (self.ALGO_AES128, self.ALGO_AES128_GCM):
             self.key_length = 16
-        elif self.algorithm == 'AES256':
+        elif self.algorithm in (self.ALGO_AES256, self.ALGO_AES256_GCM):
             self.key_length = 32
         elif self.algorithm == 'DES':
             self.key_length = 8
@@ -41,19 +78,53 @@ class CryptoUtil:
         # 生成密钥
         self.key = self._derive_key(password)
     
+    def is_authenticated(self):
+        """判断当前算法是否为认证加密（AES-GCM）"""
+        return self.algorithm in (self.ALGO_AES128_GCM, self.ALGO_AES256_GCM)
+    
     def _derive_key(self, password):
-        """从密码派生密钥"""
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=self.key_length,
-            salt=self.SALT,
-            iterations=self.ITER_COUNT,
-            backend=default_backend()
-        )
-        return kdf.derive(password.encode())
-    
-    def encrypt(self, data):
-        """加密数据"""
+        """从密码派生密钥（优先使用进程级缓存）"""
+        password_bytes = password.encode()
+        digest = hmac.new(self._cache_secret, password_bytes, hashlib.sha256).digest()
+        cache_key = (digest, self.algorithm, self.salt, self.iterations)
+        derived = []
+        
+        def derive():
+            derived.append(True)
+            kdf = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=self.key_length,
+                salt=self.salt,
+                iterations=self.iterations,
+                backend=default_backend()
+            )
+            return bytearray(kdf.derive(password_bytes))
+        
+        key = self._key_cache.get_or_create(cache_key, derive, copy=bytes)
+        MetricsUtil.record_cache('crypto_key', not derived)
+        return key
+    
+    @classmethod
+    def clear_key_cache(cls):
+        """清空派生密钥缓存，并将缓存中的密钥清零"""
+        cls._key_cache.clear()
+    
+    @classmethod
+    def set_key_cache_size(cls, max_size):
+        """设置派生密钥缓存的最大条目数（0表示禁用缓存）"""
+        cls._key_cache.resize(max_size)
+    
+    def encrypt(self, data, associated_data=None):
+        """加密数据
+        
+        Args:
+            data: 明文
+            associated_data: AES-GCM 模式下一并认证（但不加密）的附加数据，解密时须提供相同的内容；
+                CBC 模式忽略
+        """
+        if self.is_authenticated():
+            return self._encrypt_gcm(data, associated_data)
+        
         try:
             # 生成随机IV
             iv = os.urandom(16)
@@ -84,8 +155,52 @@ class CryptoUtil:
         except Exception as e:
             raise Exception(f"加密失败: {str(e)}")
     
-    def decrypt(self, data):
-        """解密数据"""
+    def encrypt_stream(self, chunks, associated_data=None):
+        """流式加密数据块，输出格式与 encrypt() 相同
+        
+        Args:
+            chunks: 明文数据块的可迭代对象
+            associated_data: 附加数据，同 encrypt()
+        
+        Yields:
+            密文数据块，内存占用与数据块大小成正比
+        """
+        if self.is_authenticated():
+            nonce = os.urandom(self.GCM_NONCE_LENGTH)
+            mode = modes.GCM(nonce)
+            padder = None
+        else:
+            nonce = os.urandom(16)
+            mode = modes.CBC(nonce)
+            padder = padding.PKCS7(128).padder()
+        
+        encryptor = Cipher(algorithms.AES(self.key), mode, backend=default_backend()).encryptor()
+        if padder is None and associated_data:
+            encryptor.authenticate_additional_data(bytes(associated_data))
+        
+        # IV/Nonce长度(1字节) + IV/Nonce
+        yield bytes([len(nonce)]) + nonce
+        
+        for chunk in chunks:
+            if padder is not None:
+                chunk = padder.update(chunk)
+            block = encryptor.update(chunk)
+            if block:
+                yield block
+        
+        tail = padder.finalize() if padder is not None else b''
+        tail = encryptor.update(tail) + encryptor.finalize()
+        if self.is_authenticated():
+            # 认证标签附加在密文末尾
+            tail += encryptor.tag
+        if tail:
+            yield tail
+    
+    def decrypt(self, data, associated_data=None):
+        """解密数据，associated_data 须与加密时相同（仅 AES-GCM 模式校验）"""
+        if self.is_authenticated():
+            return self._decrypt_gcm(data, associated_data)
+        
         try:
             # 读取IV长度
             iv_len = data[0]
@@ -119,4 +234,136 @@ class CryptoUtil:
             if "Bad" in str(e) or "Invalid" in str(e):
                 raise Exception("密码错误或数据损坏")
             raise Exception(f"解密失败: {str(e)}")
-
+    
+    
+    def decrypt_stream(self, chunks, associated_data=None):
+        """流式解密 encrypt()/encrypt_stream() 生成的密文数据块
+        
+        AES-GCM 模式下明文在认证标签校验通过后才输出（解密过程中缓冲，内存与负载大小成正比），
+        被篡改的数据不会进入解压等后续处理。
+        
+        Args:
+            chunks: 密文数据块的可迭代对象
+            associated_data: 附加数据，须与加密时相同（仅 AES-GCM 模式校验）
+        
+        Yields:
+            明文数据块
+        """
+        chunks = iter(chunks)
+        buffer = b''
+        
+        # 读取IV/Nonce长度(1字节) + IV/Nonce
+        for chunk in chunks:
+            buffer += bytes(chunk)
+            if len(buffer) >= 1 and len(buffer) >= 1 + buffer[0]:
+                break
+        if len(buffer) < 1 or len(buffer) < 1 + buffer[0]:
+            raise StegaPyException(
+                "加密数据格式无效或已损坏",
+                StegaPyErrors.CORRUPT_DATA,
+                self.NAMESPACE
+            )
+        iv_len = buffer[0]
+        iv = buffer[1:1+iv_len]
+        pending = buffer[1+iv_len:]
+        
+        if self.is_authenticated():
+            if iv_len != self.GCM_NONCE_LENGTH:
+                raise StegaPyException(
+                    "加密数据格式无效或已损坏",
+                    StegaPyErrors.CORRUPT_DATA,
+                    self.NAMESPACE
+                )
+            decryptor = Cipher(algorithms.AES(self.key), modes.GCM(iv),
+                               backend=default_backend()).decryptor()
+            if associated_data:
+                decryptor.authenticate_additional_data(bytes(associated_data))
+            
+            # 末尾16字节为认证标签，始终保留在pending中（与Nonce同块读入的密文同样处理）
+            initial, pending = pending, b''
+            plaintext = []
+            for chunk in itertools.chain([initial], chunks):
+                pending += bytes(chunk)
+                if len(pending) > self.GCM_TAG_LENGTH:
+                    block = decryptor.update(pending[:-self.GCM_TAG_LENGTH])
+                    pending = pending[-self.GCM_TAG_LENGTH:]
+                    if block:
+                        plaintext.append(block)
+            if len(pending) < self.GCM_TAG_LENGTH:
+                raise StegaPyException(
+                    "加密数据格式无效或已损坏",
+                    StegaPyErrors.CORRUPT_DATA,
+                    self.NAMESPACE
+                )
+            try:
+                tail = decryptor.finalize_with_tag(pending)
+            except InvalidTag:
+                raise StegaPyException(
+                    "密码错误或数据已被篡改（认证失败）",
+                    StegaPyErrors.INVALID_PASSWORD,
+                    self.NAMESPACE
+                )
+            if tail:
+                plaintext.append(tail)
+            # 认证通过后才输出明文
+            yield from plaintext
+            return
+        
+        try:
+            decryptor = Cipher(algorithms.AES(self.key), modes.CBC(iv),
+                               backend=default_backend()).decryptor()
+            unpadder = padding.PKCS7(128).unpadder()
+            
+            for chunk in itertools.chain([pending], chunks):
+                block = unpadder.update(decryptor.update(chunk))
+                if block:
+                    yield block
+            
+            tail = unpadder.update(decryptor.finalize()) + unpadder.finalize()
+        except StegaPyException:
+            raise
+        except Exception as e:
+            if "Bad" in str(e) or "Invalid" in str(e):
+                raise Exception("密码错误或数据损坏")
+            raise Exception(f"解密失败: {str(e)}")
+        if tail:
+            yield tail
+    
+    def _encrypt_gcm(self, data, associated_data=None):
+        """使用AES-GCM加密数据"""
+        try:
+            nonce = os.urandom(self.GCM_NONCE_LENGTH)
+            # AESGCM输出: 加密数据 + 认证标签(16字节)，标签同时覆盖附加数据
+            ciphertext = AESGCM(self.key).encrypt(nonce, bytes(data), self._aad(associated_data))
+            
+            # 返回: Nonce长度(1字节) + Nonce + 加密数据 + 认证标签
+            return bytes([len(nonce)]) + nonce + ciphertext
+        except Exception as e:
+            raise Exception(f"加密失败: {str(e)}")
+    
+    def _decrypt_gcm(self, data, associated_data=None):
+        """使用AES-GCM解密数据，认证失败时在解压前直接拒绝"""
+        if len(data) < 1 or data[0] != self.GCM_NONCE_LENGTH or \
+                len(data) < 1 + self.GCM_NONCE_LENGTH + self.GCM_TAG_LENGTH:
+            raise StegaPyException(
+                "加密数据格式无效或已损坏",
+                StegaPyErrors.CORRUPT_DATA,
+                self.NAMESPACE
+            )
+        
+        nonce = bytes(data[1:1+self.GCM_NONCE_LENGTH])
+        ciphertext = bytes(data[1+self.GCM_NONCE_LENGTH:])
+        try:
+            # 标签校验由OpenSSL以恒定时间完成
+            return AESGCM(self.key).decrypt(nonce, ciphertext, self._aad(associated_data))
+        except InvalidTag:
+            raise StegaPyException(
+                "密码错误或数据已被篡改（认证失败）",
+                StegaPyErrors.INVALID_PASSWORD,
+                self.NAMESPACE
+            )
+    
+    @staticmethod
+    def _aad(associated_data):
+        """将附加数据转换为 AESGCM 接受的参数（空附加数据与不提供等价）"""
+        return bytes(associated_data) if associated_data else None
@@ -0,0 +1,150 @@
+"""
+压缩预设字典工具模块
+"""
+
+import os
+import threading
+import zlib
+from collections import Counter
+
+
+class DictionaryUtil:
+    """zlib 预设字典（zdict）的注册表与训练工具类
+    
+    字典以 adler32 校验值作为ID（与zlib的DICTID相同），ID写入LSB数据头，
+    提取时据此从注册表中查找对应字典。
+    """
+    
+    DEFAULT_DICTIONARY_SIZE = 4096
+    MAX_DICTIONARY_SIZE = 32 * 1024  # deflate窗口大小，超出部分不会被使用
+    SEGMENT_LENGTH = 8  # 训练时统计的片段长度
+    MAX_TRAINING_BYTES = 1024 * 1024  # 训练语料上限
+    
+    _registry = {}
+    _lock = threading.Lock()
+    
+    @staticmethod
+    def get_dictionary_id(dictionary):
+        """计算字典ID（adler32）"""
+        return zlib.adler32(dictionary) & 0xFFFFFFFF
+    
+    @staticmethod
+    def register(dictionary):
+        """注册字典并返回字典ID"""
+        if not dictionary:
+            raise ValueError("字典不能为空")
+        if len(dictionary) > DictionaryUtil.MAX_DICTIONARY_SIZE:
+            # 只有最后32KB会被deflate使用，截断以保证ID与实际内容一致
+            dictionary = dictionary[-DictionaryUtil.MAX_DICTIONARY_SIZE:]
+        dictionary = bytes(dictionary)
+        dict_id = DictionaryUtil.get_dictionary_id(dictionary)
+        with DictionaryUtil._lock:
+            existing = DictionaryUtil._registry.get(dict_id)
+            if existing is not None and existing != dictionary:
+                raise ValueError(f"字典ID冲突: {dict_id:#010x}")
+            DictionaryUtil._registry[dict_id] = dictionary
+        return dict_id
+    
+    @staticmethod
+    def unregister(dict_id):
+        """从注册表中移除字典"""
+        with DictionaryUtil._lock:
+            DictionaryUtil._registry.pop(dict_id, None)
+    
+    @staticmethod
+    def get(dict_id):
+        """根据字典ID获取字典，未注册时返回 None"""
+        with DictionaryUtil._lock:
+            return DictionaryUtil._registry.get(dict_id)
+    
+    @staticmethod
+    def list_ids():
+        """获取所有已注册的字典ID"""
+        with DictionaryUtil._lock:
+            return list(DictionaryUtil._registry)
+    
+    @staticmethod
+    def load(path):
+        """从文件加载字典并注册，返回字典ID"""
+        with open(path, 'rb') as f:
+            return DictionaryUtil.register(f.read())
+    
+    @staticmethod
+    def load_directory(path, suffix='.dict'):
+        """注册目录中所有以 suffix 结尾的字典文件，返回字典ID列表"""
+        dict_ids = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(suffix):
+                dict_ids.append(DictionaryUtil.load(os.path.join(path, name)))
+        return dict_ids
+    
+    @staticmethod
+    def save(dictionary, path):
+        """将字典保存到文件"""
+        with open(path, 'wb') as f:
+            f.write(dictionary)
+    
+    @staticmethod
+    def train_dictionary(samples, size=DEFAULT_DICTIONARY_SIZE):
+        """根据样本语料训练预设字典
+        
+        统计固定长度片段在多少个样本中出现，按出现次数从高到低选取片段，
+        并尽量向两侧延伸为更长的公共片段。deflate 对距离越近的匹配编码越短，
+        因此最常见的片段放在字典末尾（紧邻待压缩数据）。
+        
+        Args:
+            samples: 样本数据（bytes）的可迭代对象
+            size: 字典的最大长度
+        
+        Returns:
+            训练得到的字典，语料中没有重复内容时返回空字节串
+        """
+        size = min(size, DictionaryUtil.MAX_DICTIONARY_SIZE)
+        corpus = []
+        total = 0
+        for sample in samples:
+            if total >= DictionaryUtil.MAX_TRAINING_BYTES:
+                break
+            sample = bytes(sample)
+            if sample:
+                corpus.append(sample)
+                total += len(sample)
+        
+        k = DictionaryUtil.SEGMENT_LENGTH
+        counts = Counter()
+        for sample in corpus:
+            # 每个样本只计一次，衡量片段在多少条记录中出现
+            counts.update({sample[i:i + k] for i in range(len(sample) - k + 1)})
+        
+        segments = []
+        selected = bytearray()
+        for segment, frequency in counts.most_common():
+            if frequency < 2 or len(selected) >= size:
+                break
+            if segment in selected:
+                continue
+            segment = DictionaryUtil._extend_segment(segment, frequency, corpus)
+            segments.append((frequency, segment))
+            selected += segment + b'\x00'
+        
+        # 出现次数少的在前，最常见的在后；超出长度时舍弃最不常见的部分
+        segments.sort(key=lambda item: item[0])
+        dictionary = b''.join(segment for _, segment in segments)
+        return dictionary[-size:] if size > 0 else b''
+    
+    @staticmethod
+    def _extend_segment(segment, frequency, corpus):
+        """在出现次数不减少的前提下向两侧延伸片段"""
+        containing = [sample for sample in corpus if segment in sample]
+        
+        def count(candidate):
+            return sum(1 for sample in containing if candidate in sample)
+        
+        reference = containing[0]
+        start = reference.find(segment)
+        end = start + len(segment)
+        while end < len(reference) and count(reference[start:end + 1]) >= frequency:
+            end += 1
+        while start > 0 and count(reference[start - 1:end]) >= frequency:
+            start -= 1
+        return reference[start:end]
@@ -4,12 +4,14 @@
 
 import numpy as np
 import pywt
+from .performance_util import PerformanceUtil
 
 
 class DWTUtil:
     """离散小波变换工具类"""
     
     @staticmethod
+    @PerformanceUtil.timed('dwt_forward')
     def forward_dwt(image_data, wavelet='db1', level=3):
         """
         执行正向小波变换
@@ -26,6 +28,7 @@ class DWTUtil:
         return coeffs
     
     @staticmethod
+    @PerformanceUtil.timed('dwt_inverse')
     def inverse_dwt(coeffs, wavelet='db1'):
         """
         执行逆向小波变换
@@ -3,87 +3,123 @@
 """
 
 import io
+import os
+import zlib
 import numpy as np
 from PIL import Image
 import random
+from typing import BinaryIO, Union
+from .performance_util import PerformanceUtil
+from ..result import StegoResult
+
+# 图像与像素数组互相转换时每个条带的大小（字节），限制转换过程中的临时内存
+PIXEL_STRIP_BYTES = 1 << 20
+
+# 各格式始终使用的编码选项（编码配置和显式传入的选项可以覆盖）：隐写图像必须逐位无损，
+# 而 PIL 保存 WebP 时默认有损压缩，保存 TIFF 时默认不压缩
+FORMAT_OPTIONS = {
+    'WEBP': {'lossless': True},
+    'TIFF': {'compression': 'tiff_adobe_deflate'},
+}
+
+# TIFF 使用 LZW/deflate 压缩时写入水平差分预测器（Predictor 标签），压缩率明显提高
+TIFF_PREDICTOR_TAG = 317
+TIFF_HORIZONTAL_DIFFERENCING = 2
+TIFF_PREDICTOR_COMPRESSIONS = ('tiff_lzw', 'tiff_deflate', 'tiff_adobe_deflate')
+
+# 隐写图像的编码配置：配置名 -> {PIL 格式名: 传给 Image.save() 的编码选项}，未列出的格式使用 PIL 默认选项
+#   fastest    不压缩（WebP 为 0 级），编码最快
+#   balanced   默认；PNG 为 1 级 + 游程编码（Z_RLE），WebP 为 1 级，TIFF 为 deflate
+#   smallest   PNG 为 9 级 + optimize，WebP 为 4 级，输出最小、编码最慢
+ENCODING_PROFILES = {
+    'fastest': {
+        'PNG': {'compress_level': 0},
+        'WEBP': {'method': 0, 'quality': 0},
+        'TIFF': {'compression': 'raw'},
+    },
+    'balanced': {
+        'PNG': {'compress_level': 1, 'compress_type': zlib.Z_RLE},
+        'WEBP': {'method': 1, 'quality': 0},
+        'TIFF': {'compression': 'tiff_adobe_deflate'},
+    },
+    'smallest': {
+        'PNG': {'compress_level': 9, 'optimize': True},
+        'WEBP': {'method': 4, 'quality': 100},
+        'TIFF': {'compression': 'tiff_adobe_deflate'},
+    },
+}
+
+# 可作为载体/隐写图像传入的数据类型
+ImageSource = Union[bytes, bytearray, memoryview, BinaryIO, str, os.PathLike, Image.Image, np.ndarray,
+                    StegoResult]
+
+
+class _BufferReader(io.RawIOBase):
+    """只读、可定位的缓冲区文件对象，供PIL直接读取 bytearray、memoryview 等，不复制整个缓冲区"""
+    
+    def __init__(self, view):
+        self._view = view
+        self._position = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def readinto(self, buffer):
+        count = max(0, min(len(buffer), self._view.nbytes - self._position))
+        buffer[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._view.nbytes
+        if offset < 0:
+            raise ValueError("无效的读取位置")
+        self._position = offset
+        return offset
+    
+    def tell(self):
+        return self._position
 
 
 class ImageUtil:
     """图像处理工具类"""
     
     @staticmethod
+    @PerformanceUtil.timed('decode')
     def byte_array_to_image(data, filename=None):
-        """将字节数组转换为PIL图像"""
+        """将图像数据转换为PIL图像（RGB）
+        
+        data 可以是（见 ImageSource）：
+            bytes、bytearray、memoryview 等缓冲区对象    直接解码，不复制
+            io.BytesIO 等文件对象                        从开头读取，结束后恢复读取位置
+            文件路径（str 或 os.PathLike）
+            PIL 图像                                     不重新解码，已是 RGB 时原样返回
+            numpy 像素数组（高 x 宽 x 通道，uint8）      不经过编解码器
+            StegoResult                                  使用其中的图像，不经过编解码器
+        """
         try:
-            # 检查数据是否为空
             if data is None:
                 raise ValueError("图像数据为空")
             
-            # 统一转换为字节数组
-            data_bytes = None
-            if isinstance(data, io.BytesIO):
-                # 对于 BytesIO 对象，先读取所有内容
-                try:
-                    current_pos = data.tell()
-                    data.seek(0)  # 重置指针到开头
-                    data_bytes = data.read()
-                    # 恢复原位置（如果可能）
-                    try:
-                        data.seek(current_pos)
-                    except:
-                        pass
-                except Exception as e:
-                    raise ValueError(f"无法从BytesIO读取数据: {str(e)}")
-            elif isinstance(data, (bytes, bytearray)):
-                data_bytes = bytes(data)
+            if isinstance(data, StegoResult):
+                img = data.image
+            elif isinstance(data, Image.Image):
+                img = data
+            elif isinstance(data, np.ndarray):
+                return Image.fromarray(ImageUtil._normalize_pixels(data)[0])
+            elif isinstance(data, (str, os.PathLike)):
+                img = Image.open(data)
+                img.load()
+            elif hasattr(data, 'read'):
+                img = ImageUtil._open_stream(data)
             else:
-                # 尝试转换为字节数组
-                try:
-                    data_bytes = bytes(data)
-                except (TypeError, ValueError) as e:
-                    raise ValueError(f"不支持的图像数据类型: {type(data).__name__}, 错误: {str(e)}")
-            
-            # 验证数据不为空
-            if data_bytes is None or len(data_bytes) == 0:
-                raise ValueError("图像数据为空")
-            
-            # 验证数据大小（至少要有文件头）
-            if len(data_bytes) < 8:
-                raise ValueError(f"图像数据太小（仅{len(data_bytes)}字节），不是有效的图像文件")
-            
-            # 验证图像文件头（检查常见格式）
-            header = data_bytes[:8]
-            is_valid_image = False
-            
-            # PNG: 89 50 4E 47 0D 0A 1A 0A
-            if header.startswith(b'\x89PNG\r\n\x1a\n'):
-                is_valid_image = True
-            # JPEG: FF D8 FF
-            elif header.startswith(b'\xff\xd8\xff'):
-                is_valid_image = True
-            # BMP: 42 4D
-            elif header.startswith(b'BM'):
-                is_valid_image = True
-            # GIF: 47 49 46 38
-            elif header.startswith(b'GIF8'):
-                is_valid_image = True
-            # TIFF: 49 49 2A 00 或 4D 4D 00 2A
-            elif header.startswith(b'II*\x00') or header.startswith(b'MM\x00*'):
-                is_valid_image = True
-            
-            if not is_valid_image:
-                # 即使文件头不匹配，也尝试让PIL识别（某些格式可能有不同的头）
-                pass
-            
-            # 创建新的 BytesIO 对象以确保数据完整性
-            data = io.BytesIO(data_bytes)
-            
-            # 打开图像（PIL 会自动验证图像格式）
-            # 注意：如果数据不是有效的图像，这里会抛出异常
-            img = Image.open(data)
-            
-            # 加载图像数据（延迟加载，需要显式调用load）
-            img.load()
+                img = ImageUtil._open_buffer(data)
             
             # 转换为RGB模式以支持所有操作
             if img.mode != 'RGB':
@@ -91,42 +127,157 @@ class ImageUtil:
             return img
         except Exception as e:
             file_info = f" (文件: {filename})" if filename else ""
-            # 提供更详细的错误信息
+            data_type = type(data).__name__ if data is not None else "None"
             try:
-                if 'data_bytes' in locals() and data_bytes is not None:
-                    data_size = len(data_bytes)
-                    data_type = type(data).__name__
-                    if isinstance(data, io.BytesIO):
-                        error_msg = f"无法读取图像{file_info}: {str(e)} (数据类型: BytesIO, 数据大小: {data_size}字节)"
-                    else:
-                        error_msg = f"无法读取图像{file_info}: {str(e)} (数据类型: {data_type}, 数据大小: {data_size}字节)"
-                else:
-                    data_type = type(data).__name__ if data is not None else "None"
-                    error_msg = f"无法读取图像{file_info}: {str(e)} (数据类型: {data_type})"
-            except:
-                error_msg = f"无法读取图像{file_info}: {str(e)}"
-            raise Exception(error_msg)
-    
-    @staticmethod
-    def image_to_byte_array(image, filename=None, format='PNG'):
-        """将PIL图像转换为字节数组"""
+                size_info = f", 数据大小: {memoryview(data).nbytes}字节"
+            except TypeError:
+                size_info = ""
+            raise Exception(f"无法读取图像{file_info}: {str(e)} (数据类型: {data_type}{size_info})")
+    
+    @staticmethod
+    def _open_buffer(data):
+        """解码缓冲区对象中的图像，不复制数据"""
+        try:
+            view = memoryview(data)
+        except TypeError:
+            raise ValueError(f"不支持的图像数据类型: {type(data).__name__}")
+        if not view.contiguous:
+            view = memoryview(view.tobytes())
+        view = view.cast('B')
+        if view.nbytes == 0:
+            raise ValueError("图像数据为空")
+        # 至少要有文件头
+        if view.nbytes < 8:
+            raise ValueError(f"图像数据太小（仅{view.nbytes}字节），不是有效的图像文件")
+        
+        # bytes 作为 BytesIO 的初始值时共享内存，其他缓冲区通过只读包装读取
+        stream = io.BytesIO(data) if isinstance(data, bytes) else _BufferReader(view)
+        img = Image.open(stream)
+        # 加载图像数据（延迟加载，需要显式调用load）
+        img.load()
+        return img
+    
+    @staticmethod
+    def _open_stream(stream):
+        """从文件对象的开头解码图像，结束后恢复原读取位置"""
+        try:
+            position = stream.tell()
+            stream.seek(0)
+        except (AttributeError, OSError):
+            position = None
+        try:
+            img = Image.open(stream)
+            img.load()
+            return img
+        finally:
+            if position is not None:
+                try:
+                    stream.seek(position)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _normalize_pixels(pixels):
+        """将像素数组规范为 高 x 宽 x 3 的 uint8 数组，返回 (数组, 是否为新建的数组)"""
+        if pixels.dtype != np.uint8:
+            raise ValueError(f"像素数组必须为 uint8 类型，实际为 {pixels.dtype}")
+        if pixels.ndim == 2:
+            return np.repeat(pixels[:, :, None], 3, axis=2), True
+        if pixels.ndim != 3 or pixels.shape[2] not in (1, 3, 4):
+            raise ValueError(f"像素数组的形状必须为 高 x 宽 x 通道（1、3 或 4 通道），实际为 {pixels.shape}")
+        if pixels.shape[2] == 1:
+            return np.repeat(pixels, 3, axis=2), True
+        if pixels.shape[2] == 4:
+            # 与解码 RGBA 图像一致，丢弃 alpha 通道
+            return np.ascontiguousarray(pixels[:, :, :3]), True
+        return pixels, False
+    
+    @staticmethod
+    @PerformanceUtil.timed('encode')
+    def image_to_byte_array(image, filename=None, format='PNG', profile=None, **options):
+        """将PIL图像转换为字节数组
+        
+        Args:
+            image: PIL 图像
+            filename: 文件名，用于确定格式（优先于 format）
+            format: 默认格式
+            profile: 编码配置名（见 ENCODING_PROFILES），None 表示除 FORMAT_OPTIONS 外使用 PIL 默认选项
+            options: 传给 Image.save() 的编码选项，覆盖编码配置中的同名选项
+        """
+        # 根据文件名确定格式
+        format = ImageUtil.get_format(filename, format)
+        options = ImageUtil.get_encoding_options(format, profile, **options)
         try:
-            # 根据文件名确定格式
-            if filename:
-                ext = filename.rsplit('.', 1)[-1].lower()
-                if ext in ['jpg', 'jpeg']:
-                    format = 'JPEG'
-                elif ext == 'png':
-                    format = 'PNG'
-                elif ext == 'bmp':
-                    format = 'BMP'
-            
             output = io.BytesIO()
-            image.save(output, format=format)
+            image.save(output, format=format, **options)
             return output.getvalue()
         except Exception as e:
             raise Exception(f"无法保存图像: {str(e)}")
     
+    @staticmethod
+    def get_encoding_options(format, profile=None, **options):
+        """获取指定格式的编码选项：依次合并 FORMAT_OPTIONS、编码配置和 options 中的选项"""
+        format = format.upper()
+        merged = dict(FORMAT_OPTIONS.get(format, {}))
+        if profile is not None:
+            merged.update(ImageUtil.get_encoding_profile(profile).get(format, {}))
+        merged.update(options)
+        if format == 'TIFF' and merged.get('compression') in TIFF_PREDICTOR_COMPRESSIONS \
+                and 'tiffinfo' not in merged:
+            merged['tiffinfo'] = {TIFF_PREDICTOR_TAG: TIFF_HORIZONTAL_DIFFERENCING}
+        return merged
+    
+    @staticmethod
+    def get_encoding_profile(profile):
+        """获取编码配置的各格式编码选项，配置名无效时抛出 ValueError"""
+        try:
+            return ENCODING_PROFILES[profile]
+        except (KeyError, TypeError):
+            raise ValueError(f"未知的编码配置: {profile}（可选: {', '.join(ENCODING_PROFILES)}）")
+    
+    @staticmethod
+    def get_format(filename, default='PNG'):
+        """根据文件扩展名确定图像格式，无法识别时返回 default"""
+        if filename:
+            ext = filename.rsplit('.', 1)[-1].lower()
+            if ext in ['jpg', 'jpeg']:
+                return 'JPEG'
+            elif ext == 'png':
+                return 'PNG'
+            elif ext == 'bmp':
+                return 'BMP'
+            elif ext == 'webp':
+                return 'WEBP'
+            elif ext in ['tif', 'tiff']:
+                return 'TIFF'
+        return default
+    
+    @staticmethod
+    def byte_array_to_pixels(data, filename=None, writable=True):
+        """将图像数据转换为 uint8 像素数组（高 x 宽 x 3），data 的类型见 byte_array_to_image()
+        
+        解码得到的 PIL 图像在转换后即释放，调用方只持有一份像素数据。
+        像素数组输入不经过编解码器：writable 为 True 时返回可原位修改的副本（不改动调用方的数组），
+        为 False 时（只读取像素）直接返回该数组。
+        """
+        if isinstance(data, StegoResult):
+            data = data.pixels
+        if isinstance(data, np.ndarray):
+            try:
+                pixels, created = ImageUtil._normalize_pixels(data)
+            except ValueError as e:
+                file_info = f" (文件: {filename})" if filename else ""
+                raise Exception(f"无法读取图像{file_info}: {str(e)}")
+            if writable and not created:
+                return np.array(pixels)
+            return np.ascontiguousarray(pixels)
+        return ImageUtil.get_image_pixels(ImageUtil.byte_array_to_image(data, filename))
+    
+    @staticmethod
+    def pixels_to_byte_array(pixels, filename=None, format='PNG', profile=None, **options):
+        """将 uint8 像素数组编码为字节数组，参数含义见 image_to_byte_array()"""
+        return ImageUtil.image_to_byte_array(Image.fromarray(pixels), filename, format, profile, **options)
+    
     @staticmethod
     def generate_random_image(num_pixels):
         """生成随机图像"""
@@ -154,17 +305,34 @@ class ImageUtil:
     
     @staticmethod
     def get_image_pixels(image):
-        """获取图像像素数组"""
-        return np.array(image)
+        """获取图像像素数组（可写的副本）
+        
+        按条带复制，避免 np.array(image) 先生成整幅图像的临时字节串再复制一次。
+        """
+        width, height = image.size
+        channels = len(image.getbands())
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        if image.mode not in ('RGB', 'RGBA', 'L') or width == 0 or height == 0:
+            return np.array(image)
+        
+        pixels = np.empty(shape, dtype=np.uint8)
+        rows = max(1, PIXEL_STRIP_BYTES // (width * channels))
+        for top in range(0, height, rows):
+            bottom = min(height, top + rows)
+            strip = image.crop((0, top, width, bottom)).tobytes()
+            pixels[top:bottom] = np.frombuffer(strip, dtype=np.uint8).reshape((bottom - top,) + shape[1:])
+        return pixels
     
     @staticmethod
     def set_image_pixels(image, pixels):
         """设置图像像素"""
-        # 确保像素值在0-255范围内，避免uint8溢出错误
-        pixels = np.clip(pixels, 0, 255)
-        return Image.fromarray(pixels.astype(np.uint8))
+        # 确保像素值在0-255范围内，避免uint8溢出错误（uint8 数组无需裁剪和转换）
+        if pixels.dtype != np.uint8:
+            pixels = np.clip(pixels, 0, 255).astype(np.uint8)
+        return Image.fromarray(pixels)
     
     @staticmethod
+    @PerformanceUtil.timed('color_convert')
     def get_yuv_from_image(image):
         """将RGB图像转换为YUV色彩空间"""
         rgb_array = np.array(image, dtype=np.float32)
@@ -178,6 +346,7 @@ class ImageUtil:
         return [y.astype(np.int32), u.astype(np.int32), v.astype(np.int32)]
     
     @staticmethod
+    @PerformanceUtil.timed('color_convert')
     def get_image_from_yuv(yuv, img_type='RGB'):
         """将YUV色彩空间转换回RGB图像"""
         y, u, v = yuv[0].astype(np.float32), yuv[1].astype(np.float32), yuv[2].astype(np.float32)
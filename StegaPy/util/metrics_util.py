@@ -0,0 +1,478 @@
+"""
+指标工具模块
+
+进程内的指标注册表（计数器、仪表、直方图），以 Prometheus 文本格式导出到文件或 HTTP 接口，
+不依赖第三方库。MetricsUtil.enable() 之后 StegaPy、各插件、CryptoUtil 和 HTTP 服务更新以下指标：
+
+    stegapy_operations_total{plugin,operation,outcome}       操作次数（outcome: success/error）
+    stegapy_operation_duration_seconds{plugin,operation}     操作耗时
+    stegapy_payload_bytes_total{plugin,direction}            嵌入/提取的负载字节数（写入图像的数据）
+    stegapy_pixels_processed_total{plugin,operation}         处理的像素数
+    stegapy_stage_duration_seconds{stage}                    各阶段耗时（见 performance_util）
+    stegapy_cache_hits_total{cache} / stegapy_cache_misses_total{cache}
+    stegapy_server_queue_depth / stegapy_server_in_flight    HTTP 服务的排队请求数和处理中请求数
+    stegapy_http_requests_total{endpoint,status}             HTTP 请求数
+
+未启用时各记录函数只做一次全局标志判断。
+"""
+
+import bisect
+import math
+import os
+import threading
+
+from .performance_util import HistogramSink, PerformanceUtil
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value):
+    """格式化样本值"""
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        if math.isnan(value):
+            return 'NaN'
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+    return repr(value)
+
+
+def _escape_label(value):
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    """格式化标签集合"""
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class _Child:
+    """带确定标签值的指标"""
+    
+    __slots__ = ('_metric', '_key')
+    
+    def __init__(self, metric, key):
+        self._metric = metric
+        self._key = key
+    
+    def inc(self, amount=1):
+        """增加计数（计数器、仪表）"""
+        self._metric._inc(self._key, amount)
+    
+    def dec(self, amount=1):
+        """减少数值（仪表）"""
+        self._metric._inc(self._key, -amount)
+    
+    def set(self, value):
+        """设置数值（仪表）"""
+        self._metric._set(self._key, value)
+    
+    def observe(self, value):
+        """记录一次观测值（直方图）"""
+        self._metric._observe(self._key, value)
+
+
+class _Metric:
+    """指标基类"""
+    
+    TYPE = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        """初始化
+        
+        Args:
+            name: 指标名称
+            documentation: 说明（HELP）
+            labelnames: 标签名称
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._children = {}
+        self._lock = threading.Lock()
+    
+    def labels(self, *values, **kwargs):
+        """获取指定标签值的指标，如 counter.labels(plugin='LSB', outcome='success').inc()"""
+        if kwargs:
+            if values:
+                raise ValueError("标签值不能同时使用位置参数和关键字参数")
+            try:
+                values = tuple(kwargs[name] for name in self.labelnames)
+            except KeyError as e:
+                raise ValueError(f"缺少标签: {e.args[0]}")
+            if len(kwargs) != len(self.labelnames):
+                raise ValueError(f"未知的标签: {', '.join(set(kwargs) - set(self.labelnames))}")
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要 {len(self.labelnames)} 个标签值")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, _Child(self, key))
+        return child
+    
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def _set(self, key, value):
+        raise TypeError(f"{self.TYPE} 类型的指标不支持 set()")
+    
+    def _observe(self, key, value):
+        raise TypeError(f"{self.TYPE} 类型的指标不支持 observe()")
+    
+    def inc(self, amount=1):
+        """增加计数（无标签指标）"""
+        self.labels().inc(amount)
+    
+    def samples(self):
+        """获取样本列表：[(名称后缀, 标签名称, 标签值, 数值)]"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [('', self.labelnames, key, value) for key, value in items]
+    
+    def _snapshot_values(self):
+        """获取可序列化的取值副本（调用方持有锁）"""
+        return [[list(key), value] for key, value in self._values.items()]
+    
+    def snapshot(self):
+        """获取可序列化的取值副本"""
+        with self._lock:
+            return self._snapshot_values()
+    
+    def drain(self):
+        """获取取值副本并清空"""
+        with self._lock:
+            values = self._snapshot_values()
+            self._values.clear()
+        return values
+    
+    def merge(self, values):
+        """合并 snapshot() 得到的取值（累加）"""
+        for key, value in values:
+            self._inc(tuple(key), value)
+    
+    def reset(self):
+        """清空取值"""
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """计数器：只增不减"""
+    
+    TYPE = 'counter'
+    
+    def _inc(self, key, amount):
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        super()._inc(key, amount)
+
+
+class Gauge(_Metric):
+    """仪表：可增可减或直接设置"""
+    
+    TYPE = 'gauge'
+    
+    def _set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+    
+    def set(self, value):
+        """设置数值（无标签指标）"""
+        self.labels().set(value)
+    
+    def dec(self, amount=1):
+        """减少数值（无标签指标）"""
+        self.labels().dec(amount)
+    
+    def merge(self, values):
+        """合并 snapshot() 得到的取值（覆盖）"""
+        for key, value in values:
+            self._set(tuple(key), value)
+
+
+class Histogram(_Metric):
+    """直方图：按桶统计观测值的分布"""
+    
+    TYPE = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        """初始化
+        
+        Args:
+            buckets: 递增的桶上界，默认与 HistogramSink 相同（秒），+Inf 桶自动添加
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets or HistogramSink.DEFAULT_BUCKETS))
+    
+    def _observe(self, key, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    def _inc(self, key, amount):
+        raise TypeError("histogram 类型的指标不支持 inc()")
+    
+    def observe(self, value):
+        """记录一次观测值（无标签指标）"""
+        self.labels().observe(value)
+    
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2]))
+                           for key, entry in self._values.items())
+        samples = []
+        labelnames = self.labelnames + ('le',)
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append(('_bucket', labelnames, key + (_format_value(float(bound)),), cumulative))
+            samples.append(('_sum', self.labelnames, key, total))
+            samples.append(('_count', self.labelnames, key, count))
+        return samples
+    
+    def _snapshot_values(self):
+        return [[list(key), [list(entry[0]), entry[1], entry[2]]]
+                for key, entry in self._values.items()]
+    
+    def merge(self, values):
+        """合并 snapshot() 得到的取值（桶边界必须相同）"""
+        for key, (counts, total, count) in values:
+            if len(counts) != len(self.buckets) + 1:
+                raise ValueError(f"直方图 {self.name} 的桶数量不一致")
+            key = tuple(key)
+            with self._lock:
+                entry = self._values.get(key)
+                if entry is None:
+                    entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                for index, bucket_count in enumerate(counts):
+                    entry[0][index] += bucket_count
+                entry[1] += total
+                entry[2] += count
+
+
+class MetricsRegistry:
+    """指标注册表"""
+    
+    def __init__(self):
+        """初始化"""
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        """获取已注册的指标，不存在时创建；同名指标的类型或标签不一致时抛出 ValueError"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"指标 {name} 已以不同的类型或标签注册")
+            return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        """获取或创建计数器"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+    
+    def gauge(self, name, documentation, labelnames=()):
+        """获取或创建仪表"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        """获取或创建直方图"""
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+    
+    def get(self, name):
+        """按名称获取指标"""
+        with self._lock:
+            return self._metrics.get(name)
+    
+    def render(self):
+        """以 Prometheus 文本格式输出所有指标"""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            documentation = metric.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            for suffix, labelnames, values, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labelnames, values)} "
+                             f"{_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+    
+    def write_to_file(self, path):
+        """将指标写入文件（先写临时文件再替换，供 node_exporter 文本文件采集器读取）"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+    
+    def snapshot(self):
+        """获取所有指标取值的可序列化副本（可通过 pickle/JSON 传给其他进程）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+    
+    def drain(self):
+        """获取取值副本并清空（用于把工作进程中的增量汇总到主进程）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {metric.name: metric.drain() for metric in metrics}
+        return {name: values for name, values in snapshot.items() if values}
+    
+    def merge(self, snapshot):
+        """合并 snapshot()/drain() 的结果，只合并本注册表中已有的指标"""
+        for name, values in snapshot.items():
+            metric = self.get(name)
+            if metric is not None:
+                metric.merge(values)
+    
+    def reset(self):
+        """清空所有指标的取值"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+# 默认注册表
+REGISTRY = MetricsRegistry()
+
+# 是否启用指标记录；启用后为 MetricsUtil 使用的注册表
+_registry = None
+# 指标名称 -> 指标（启用时在注册表中创建）
+_metrics = {}
+_enable_lock = threading.Lock()
+
+
+def _stage_sink(stage, seconds):
+    """PerformanceUtil 接收器：记录阶段耗时"""
+    registry = _registry
+    if registry is not None:
+        _metrics['stage_duration'].labels(stage).observe(seconds)
+
+
+class MetricsUtil:
+    """StegaPy 指标工具类"""
+    
+    @staticmethod
+    def enable(registry=None):
+        """启用指标记录（同时启用分阶段计时），返回使用的注册表
+        
+        Args:
+            registry: 指标注册表，默认为模块级的 REGISTRY
+        """
+        global _registry
+        registry = registry or REGISTRY
+        with _enable_lock:
+            _metrics.update(
+                operations=registry.counter(
+                    'stegapy_operations_total', "StegaPy 操作次数",
+                    ('plugin', 'operation', 'outcome')),
+                operation_duration=registry.histogram(
+                    'stegapy_operation_duration_seconds', "StegaPy 操作耗时（秒）",
+                    ('plugin', 'operation')),
+                payload_bytes=registry.counter(
+                    'stegapy_payload_bytes_total', "嵌入/提取的负载字节数",
+                    ('plugin', 'direction')),
+                pixels=registry.counter(
+                    'stegapy_pixels_processed_total', "处理的像素数",
+                    ('plugin', 'operation')),
+                stage_duration=registry.histogram(
+                    'stegapy_stage_duration_seconds', "各处理阶段的耗时（秒）", ('stage',)),
+                cache_hits=registry.counter(
+                    'stegapy_cache_hits_total', "缓存命中次数", ('cache',)),
+                cache_misses=registry.counter(
+                    'stegapy_cache_misses_total', "缓存未命中次数", ('cache',)),
+            )
+            if _registry is None:
+                PerformanceUtil.add_sink(_stage_sink)
+            _registry = registry
+        return registry
+    
+    @staticmethod
+    def disable():
+        """停止指标记录（已记录的取值保留在注册表中）"""
+        global _registry
+        with _enable_lock:
+            if _registry is not None:
+                PerformanceUtil.remove_sink(_stage_sink)
+            _registry = None
+    
+    @staticmethod
+    def is_enabled():
+        """判断是否启用了指标记录"""
+        return _registry is not None
+    
+    @staticmethod
+    def get_registry():
+        """获取当前使用的注册表（未启用时为默认注册表）"""
+        return _registry or REGISTRY
+    
+    @staticmethod
+    def record_operation(plugin, operation, success, seconds):
+        """记录一次 StegaPy 操作"""
+        if _registry is None:
+            return
+        _metrics['operations'].labels(plugin, operation, 'success' if success else 'error').inc()
+        _metrics['operation_duration'].labels(plugin, operation).observe(seconds)
+    
+    @staticmethod
+    def add_payload_bytes(plugin, direction, count):
+        """记录嵌入（direction='embedded'）或提取（'extracted'）的负载字节数"""
+        if _registry is None:
+            return
+        _metrics['payload_bytes'].labels(plugin, direction).inc(count)
+    
+    @staticmethod
+    def add_pixels(plugin, operation, count):
+        """记录处理的像素数"""
+        if _registry is None:
+            return
+        _metrics['pixels'].labels(plugin, operation).inc(count)
+    
+    @staticmethod
+    def record_cache(cache, hit):
+        """记录一次缓存查询"""
+        if _registry is None:
+            return
+        _metrics['cache_hits' if hit else 'cache_misses'].labels(cache).inc()
+
+
+def start_http_server(port, host='127.0.0.1', registry=None):
+    """在后台线程中启动只提供 /metrics 的 HTTP 服务，返回服务对象（调用 shutdown() 停止）"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        """GET /metrics 返回 Prometheus 文本格式的指标"""
+        
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = (registry or MetricsUtil.get_registry()).render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='stegapy-metrics', daemon=True)
+    thread.start()
+    return server
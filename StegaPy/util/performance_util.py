@@ -1,42 +1,319 @@
-# Auto-generated utility file
-    def _decompress_data(self, data: bytes) -> bytes:
-        """解压数据"""
-        # 检查数据是否为空
-        if not data or len(data) == 0:
-            raise StegaPyException(
-                "数据为空，无法解压",
-                StegaPyErrors.CORRUPT_DATA,
-                self.NAMESPACE
-    # Fix: handle edge case
-            )
+"""
+性能计时工具模块
+
+在解码、压缩、加密、数据头构建、位嵌入、小波变换、色彩转换、编码等阶段外包裹命名计时区间，
+计时结果分发给已注册的接收器（回调函数、日志、内存直方图），或收集到当前线程的
+StageTimings 中。没有接收器且没有收集器时，计时区间只做一次全局标志判断。
+
+阶段名称:
+    decode          ImageUtil.byte_array_to_image
+    encode          ImageUtil.image_to_byte_array
+    compress        压缩（流式嵌入时为各数据块的累计耗时）
+    decompress      解压
+    encrypt         加密
+    decrypt         解密
+    header          数据头构建/解析
+    permutation     随机位置序列生成（RandomLSB）
+    embed_bits      位嵌入
+    extract_bits    位提取
+    color_convert   RGB 与 YUV 之间的转换
+    dwt_forward     正向小波变换
+    dwt_inverse     逆向小波变换
+    watermark       水印嵌入/检测（子带计算）
+
+各阶段耗时为包含式计时，阶段之间可能嵌套（如 embed_bits 中的数据头写入）。
+"""
+
+import bisect
+import functools
+import threading
+import time
+
+
+# 已注册的接收器（元组，注册/移除时整体替换，分发时无需加锁）
+_sinks = ()
+_sinks_lock = threading.Lock()
+# 各线程的收集器栈
+_local = threading.local()
+# 活跃的收集器数量；与 _sinks 一起决定计时区间是否生效
+_collecting = 0
+
+
+def _record(stage, seconds):
+    """将一次计时分发给当前线程的收集器和所有接收器"""
+    for timings in getattr(_local, 'stack', ()):
+        timings.add(stage, seconds)
+    for sink in _sinks:
+        sink(stage, seconds)
+
+
+class _Span:
+    """计时区间"""
+    
+    __slots__ = ('stage', 'start')
+    
+    def __init__(self, stage):
+        self.stage = stage
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        _record(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    """未启用计时时使用的空区间"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class StageTimings:
+    """一次调用（或一段代码）中各阶段的累计耗时"""
+    
+    def __init__(self):
+        """初始化"""
+        self.stages = {}
+        self.counts = {}
+        self.total = 0.0
+    
+    def add(self, stage, seconds):
+        """累加一个阶段的耗时"""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+    
+    def get(self, stage, default=0.0):
+        """获取阶段的累计耗时（秒）"""
+        return self.stages.get(stage, default)
+    
+    def as_dict(self):
+        """转换为可序列化的字典"""
+        return {
+            'total_s': self.total,
+            'stages': {stage: {'seconds': seconds, 'count': self.counts[stage]}
+                       for stage, seconds in self.stages.items()},
+        }
+    
+    def format(self):
+        """格式化为多行文本（毫秒）"""
+        lines = [f"{stage:<14} {seconds * 1000:10.3f} ms  x{self.counts[stage]}"
+                 for stage, seconds in self.stages.items()]
+        lines.append(f"{'total':<14} {self.total * 1000:10.3f} ms")
+        return '\n'.join(lines)
+    
+    def __repr__(self):
+        stages = ', '.join(f"{stage}={seconds * 1000:.3f}ms" for stage, seconds in self.stages.items())
+        return f"StageTimings(total={self.total * 1000:.3f}ms, {stages})"
+
+
+class LoggingSink:
+    """将每次计时写入日志的接收器"""
+    
+    def __init__(self, logger=None, level=None):
+        """初始化
         
-        # 检查数据是否是有效的 gzip 格式
-        # gzip 文件以 \x1f\x8b 开头
-        if len(data) < 2 or data[:2] != b'\x1f\x8b':
-            raise StegaPyException(
-                "数据不是有效的 gzip 格式。请检查：\n"
-                "1. 嵌入数据时是否启用了压缩\n"
-                "2. 提取数据时的压缩设置是否与嵌入时一致\n"
-                f"数据前2字节: {data[:2].hex() if len(data) >= 2 else '数据太短'}",
-                StegaPyErrors.CORRUPT_DATA,
-                self.NAMESPACE
-            )
+        Args:
+            logger: 日志记录器或名称，默认 'StegaPy.performance'
+            level: 日志级别，默认 DEBUG
+        """
+        # logging 仅在使用日志接收器时导入
+        import logging
         
-        try:
-            return gzip.decompress(data)
-        except gzip.BadGzipFile as e:
-            raise StegaPyException(
-                f"数据解压失败（不是有效的 gzip 文件）: {str(e)}\n"
-                "请检查压缩设置是否与嵌入时一致",
-                StegaPyErrors.CORRUPT_DATA,
-                self.NAMESPACE
-            )
-        except Exception as e:
-            raise StegaPyException(
-                f"数据解压失败: {str(e)}\n"
-                "请检查压缩设置是否与嵌入时一致",
-                StegaPyErrors.CORRUPT_DATA,
-                self.NAMESPACE
-            )
+        if level is None:
+            level = logging.DEBUG
+        if logger is None or isinstance(logger, str):
+            logger = logging.getLogger(logger or 'StegaPy.performance')
+        self.logger = logger
+        self.level = level
+    
+    def __call__(self, stage, seconds):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s: %.3f ms", stage, seconds * 1000)
 
 
+class HistogramSink:
+    """在内存中按阶段累计耗时直方图的接收器（线程安全）"""
+    
+    # 默认桶上界（秒），覆盖 0.1 ms 到 60 s
+    DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                       0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    
+    def __init__(self, buckets=None):
+        """初始化
+        
+        Args:
+            buckets: 递增的桶上界（秒），超出最大上界的计入 +Inf 桶
+        """
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self._stages = {}
+        self._lock = threading.Lock()
+    
+    def __call__(self, stage, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {
+                    'count': 0, 'sum': 0.0, 'min': seconds, 'max': seconds,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                }
+            entry['count'] += 1
+            entry['sum'] += seconds
+            entry['min'] = min(entry['min'], seconds)
+            entry['max'] = max(entry['max'], seconds)
+            entry['buckets'][index] += 1
+    
+    def snapshot(self):
+        """获取各阶段的统计副本：{阶段: {count, sum, min, max, buckets}}
+        
+        buckets 为各桶（非累计）的计数，最后一项为 +Inf 桶。
+        """
+        with self._lock:
+            return {stage: dict(entry, buckets=list(entry['buckets']))
+                    for stage, entry in self._stages.items()}
+    
+    def percentile(self, stage, q):
+        """按桶估计阶段耗时的分位数（q 取 0-100），返回所在桶的上界（秒）"""
+        entry = self.snapshot().get(stage)
+        if not entry:
+            return None
+        rank = max(1, -(-entry['count'] * q // 100))
+        seen = 0
+        for index, count in enumerate(entry['buckets']):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else entry['max']
+        return entry['max']
+    
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._stages.clear()
+
+
+class _Collector:
+    """PerformanceUtil.collect() 返回的上下文管理器"""
+    
+    def __init__(self):
+        self.timings = StageTimings()
+        self.start = 0.0
+    
+    def __enter__(self):
+        global _collecting
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.timings)
+        with _sinks_lock:
+            _collecting += 1
+        self.start = time.perf_counter()
+        return self.timings
+    
+    def __exit__(self, exc_type, exc, tb):
+        global _collecting
+        self.timings.total = time.perf_counter() - self.start
+        _local.stack.remove(self.timings)
+        with _sinks_lock:
+            _collecting -= 1
+        return False
+
+
+class PerformanceUtil:
+    """性能计时工具类"""
+    
+    @staticmethod
+    def is_enabled():
+        """判断计时是否生效（存在接收器或活跃的收集器）"""
+        return bool(_sinks) or _collecting > 0
+    
+    @staticmethod
+    def span(stage):
+        """计时区间，用法: with PerformanceUtil.span('compress'): ..."""
+        if not _sinks and not _collecting:
+            return _NULL_SPAN
+        return _Span(stage)
+    
+    @staticmethod
+    def timed(stage):
+        """装饰器：为函数的每次调用计时"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not _sinks and not _collecting:
+                    return func(*args, **kwargs)
+                with _Span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    @staticmethod
+    def iter_span(stage, iterable):
+        """为惰性迭代器的每次取值计时（用于流式压缩、加密），未启用计时时原样返回"""
+        if not _sinks and not _collecting:
+            return iterable
+        
+        def generate():
+            iterator = iter(iterable)
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    _record(stage, time.perf_counter() - start)
+                    return
+                _record(stage, time.perf_counter() - start)
+                yield item
+        return generate()
+    
+    @staticmethod
+    def add_sink(sink):
+        """注册接收器：任何签名为 sink(stage, seconds) 的可调用对象"""
+        global _sinks
+        if not callable(sink):
+            raise TypeError("接收器必须是可调用对象")
+        with _sinks_lock:
+            _sinks = _sinks + (sink,)
+        return sink
+    
+    @staticmethod
+    def remove_sink(sink):
+        """移除接收器"""
+        global _sinks
+        with _sinks_lock:
+            _sinks = tuple(s for s in _sinks if s is not sink)
+    
+    @staticmethod
+    def clear_sinks():
+        """移除所有接收器"""
+        global _sinks
+        with _sinks_lock:
+            _sinks = ()
+    
+    @staticmethod
+    def get_sinks():
+        """获取已注册的接收器"""
+        return _sinks
+    
+    @staticmethod
+    def collect():
+        """收集当前线程中代码块各阶段的耗时，用法:
+            
+            with PerformanceUtil.collect() as timings:
+                stega.embed_data(...)
+            print(timings.stages)
+        
+        可以嵌套，内层的计时同时计入外层。
+        """
+        return _Collector()
@@ -0,0 +1,230 @@
+"""
+性能剖析工具模块
+
+按需对单次 StegaPy 调用做性能剖析：用 cProfile 记录函数耗时，用 tracemalloc 比较调用前后的
+内存快照，在输出目录中写入：
+    
+    <时间>-<插件>-<操作>-<宽>x<高>-<负载字节数>B-<进程ID>-<序号>.prof        cProfile 数据
+    <时间>-<插件>-<操作>-<宽>x<高>-<负载字节数>B-<进程ID>-<序号>.alloc.txt   标签和内存分配排行
+
+启用方式（任一即可）：
+    - 环境变量 STEGAPY_PROFILE：1/true 表示剖析每次调用，0-1 之间的小数表示采样率；
+      STEGAPY_PROFILE_DIR 指定输出目录
+    - 配置项 profile=True（剖析该配置的每次调用）或 profile_sample_rate（采样率）
+    - 运行时调用 ProfileUtil.set_sample_rate()
+
+cProfile 和 tracemalloc 都是进程级的：同一时刻只剖析一个调用（其他调用照常执行，不剖析），
+内存分配统计包含同时运行的其他线程的分配。
+"""
+
+import io
+import itertools
+import os
+import random
+import threading
+import time
+
+ENV_PROFILE = 'STEGAPY_PROFILE'
+ENV_PROFILE_DIR = 'STEGAPY_PROFILE_DIR'
+
+# 报告中列出的内存分配条数
+TOP_ALLOCATIONS = 25
+
+
+def _parse_rate(value):
+    """解析环境变量中的采样率"""
+    if not value:
+        return 0.0
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes', 'on'):
+        return 1.0
+    if value in ('0', 'false', 'no', 'off'):
+        return 0.0
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+# 全局采样率（环境变量或 set_sample_rate()）
+_sample_rate = _parse_rate(os.environ.get(ENV_PROFILE))
+# 同一时刻只允许一个剖析
+_profile_lock = threading.Lock()
+_sequence = itertools.count(1)
+
+
+def _image_size(data):
+    """读取图像尺寸（编码数据只解析文件头），无法识别时返回 None"""
+    if data is None:
+        return None
+    try:
+        from PIL import Image
+        
+        if isinstance(data, Image.Image):
+            return data.size
+        if hasattr(data, 'shape') and hasattr(data, 'dtype'):
+            return data.shape[1], data.shape[0]
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = io.BytesIO(data)
+        elif hasattr(data, 'seek'):
+            data.seek(0)
+        elif not isinstance(data, (str, os.PathLike)):
+            return None
+        with Image.open(data) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def _safe_name(value):
+    """转换为可用于文件名的字符串"""
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in str(value))
+
+
+class ProfileSession:
+    """一次性能剖析（ProfileUtil.profile() 返回的上下文管理器）
+    
+    退出时写出报告；tags 可在调用过程中补充（如提取后才知道的负载大小）。
+    进入时已有其他剖析在进行则不做任何事（active 为 False）。
+    """
+    
+    def __init__(self, plugin, operation, output_dir=None, image=None, payload_size=None):
+        """初始化
+        
+        Args:
+            plugin: 插件名称
+            operation: 操作名称
+            output_dir: 输出目录，默认为环境变量 STEGAPY_PROFILE_DIR 或临时目录下的 stegapy-profiles
+            image: 载体/隐写图像数据（用于读取尺寸）
+            payload_size: 负载字节数
+        """
+        self.tags = {'plugin': plugin, 'operation': operation, 'image_size': None,
+                     'payload_size': payload_size, 'outcome': None, 'duration_s': None}
+        self.output_dir = output_dir
+        self.image = image
+        self.active = False
+        self.paths = None
+        self._profiler = None
+        self._start_snapshot = None
+        self._started_tracing = False
+        self._start = 0.0
+    
+    def __enter__(self):
+        import cProfile
+        import tracemalloc
+        
+        if not _profile_lock.acquire(blocking=False):
+            return self
+        self.active = True
+        self.tags['image_size'] = _image_size(self.image)
+        self.image = None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._profiler = cProfile.Profile()
+        self._start = time.perf_counter()
+        self._profiler.enable()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        import tracemalloc
+        
+        if not self.active:
+            return False
+        try:
+            self._profiler.disable()
+            self.tags['duration_s'] = time.perf_counter() - self._start
+            self.tags['outcome'] = 'success' if exc_type is None else f"error: {exc_type.__name__}"
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1] if self._started_tracing else None
+            if self._started_tracing:
+                tracemalloc.stop()
+            try:
+                self.paths = self._write(snapshot, peak)
+            except OSError as e:
+                # 报告写入失败不影响调用本身
+                import logging
+                logging.getLogger('StegaPy.profile').warning("无法写入性能剖析报告: %s", e)
+        finally:
+            self._start_snapshot = None
+            _profile_lock.release()
+        return False
+    
+    def _write(self, snapshot, peak):
+        """写出 .prof 和内存分配报告，返回文件路径"""
+        import tempfile
+        import tracemalloc
+        
+        output_dir = (self.output_dir or os.environ.get(ENV_PROFILE_DIR)
+                      or os.path.join(tempfile.gettempdir(), 'stegapy-profiles'))
+        os.makedirs(output_dir, exist_ok=True)
+        size = self.tags['image_size']
+        base = '-'.join([
+            time.strftime('%Y%m%d-%H%M%S'),
+            _safe_name(self.tags['plugin']),
+            _safe_name(self.tags['operation']),
+            f"{size[0]}x{size[1]}" if size else 'unknown',
+            f"{self.tags['payload_size']}B" if self.tags['payload_size'] is not None else 'unknown',
+            str(os.getpid()),
+            str(next(_sequence)),
+        ])
+        base = os.path.join(output_dir, base)
+        
+        prof_path = base + '.prof'
+        self._profiler.dump_stats(prof_path)
+        
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, __file__))
+        stats = snapshot.filter_traces(ignore).compare_to(
+            self._start_snapshot.filter_traces(ignore), 'lineno')
+        alloc_path = base + '.alloc.txt'
+        with open(alloc_path, 'w', encoding='utf-8') as f:
+            for key, value in self.tags.items():
+                f.write(f"{key}: {value}\n")
+            if peak is not None:
+                f.write(f"peak_traced_bytes: {peak}\n")
+            f.write(f"net_allocated_bytes: {sum(stat.size_diff for stat in stats)}\n")
+            f.write(f"\n内存分配排行（按净增长，前 {TOP_ALLOCATIONS} 项）:\n")
+            for stat in stats[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        return {'prof': prof_path, 'alloc': alloc_path}
+
+
+class ProfileUtil:
+    """性能剖析工具类"""
+    
+    @staticmethod
+    def get_sample_rate():
+        """获取全局采样率"""
+        return _sample_rate
+    
+    @staticmethod
+    def set_sample_rate(rate):
+        """设置全局采样率（0 表示关闭，1 表示剖析每次调用）"""
+        global _sample_rate
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError("采样率必须在0-1之间")
+        _sample_rate = rate
+    
+    @staticmethod
+    def should_profile(config=None):
+        """按配置和全局采样率决定本次调用是否剖析"""
+        rate = _sample_rate
+        if config is not None:
+            if config.is_profile():
+                return True
+            rate = max(rate, config.get_profile_sample_rate() or 0.0)
+        return rate > 0.0 and (rate >= 1.0 or random.random() < rate)
+    
+    @staticmethod
+    def profile(plugin, operation, output_dir=None, image=None, payload_size=None):
+        """剖析一段代码，用法:
+            
+            with ProfileUtil.profile('LSB', 'embed_data', image=cover, payload_size=len(msg)) as session:
+                ...
+            print(session.paths)
+        
+        已有剖析在进行时不剖析（session.active 为 False，paths 为 None）。参数含义见 ProfileSession。
+        """
+        return ProfileSession(plugin, operation, output_dir, image, payload_size)
@@ -71,7 +71,15 @@ def main():
         st.header("配置选项")
         
         use_compression = st.checkbox("使用压缩", value=True, 
-                                     help="使用GZIP压缩数据以减少嵌入数据大小")
+                                     help="压缩数据以减少嵌入数据大小")
+        compression_codec = "deflate"
+        if use_compression:
+            compression_codec = st.selectbox(
+                "压缩算法",
+                ["deflate", "auto", "zlib-1", "zlib-6", "zlib-9", "bz2", "lzma", "parallel-deflate", "gzip"],
+                help="deflate：原始deflate流，无额外封装\nauto：在CPU预算内自动选择输出最小的算法\n"
+                     "提取时根据数据头自动识别压缩算法"
+            )
         use_encryption = st.checkbox("使用加密", value=False,
                                     help="使用AES加密保护数据")
         
@@ -82,8 +90,9 @@ def main():
                                     help="用于加密/解密的密码")
             encryption_algorithm = st.selectbox(
                 "加密算法",
-                ["AES128", "AES256"],
-                help="AES128：128位AES加密\nAES256：256位AES加密"
+                ["AES128", "AES256", "A128GCM", "A256GCM"],
+                help="AES128：128位AES加密\nAES256：256位AES加密\n"
+                     "A128GCM/A256GCM：AES-GCM认证加密，密码错误或图像被篡改时在解压前直接拒绝"
             )
         
         # LSB特定配置
@@ -116,14 +125,14 @@ def main():
     # 主内容区
     if mode == "数据隐藏":
         data_hiding_ui(plugin_name, use_compression, use_encryption, 
-                      password, encryption_algorithm, max_bits)
+                      password, encryption_algorithm, max_bits, compression_codec)
     else:
         watermarking_ui(plugin_name, use_compression, use_encryption,
                        password, encryption_algorithm)
 
 
 def data_hiding_ui(plugin_name, use_compression, use_encryption,
-                  password, encryption_algorithm, max_bits):
+                  password, encryption_algorithm, max_bits, compression_codec="deflate"):
     """数据隐藏界面"""
     st.header("📦 数据隐藏")
     
@@ -170,25 +179,26 @@ def data_hiding_ui(plugin_name, use_compression, use_encryption,
             else:
                 try:
                     with st.spinner("正在嵌入数据..."):
-                        # 获取插件
-                        plugin = PluginManager.get_plugin_by_name(plugin_name)
                         if plugin_name in ["LSB", "RandomLSB"]:
                             from StegaPy.plugin.lsb.lsb_config import LSBConfig
                             config = LSBConfig(
                                 max_bits_used_per_channel=max_bits,
                                 use_compression=use_compression,
+                                compression_codec=compression_codec,
                                 use_encryption=use_encryption,
                                 password=password,
                                 encryption_algorithm=encryption_algorithm
                             )
-                            plugin.config = config
                         else:
                             config = StegaPyConfig(
                                 use_compression=use_compression,
+                                compression_codec=compression_codec,
                                 use_encryption=use_encryption,
                                 password=password,
                                 encryption_algorithm=encryption_algorithm
                             )
+                        # 每个请求使用独立的插件实例，并发请求之间互不影响
+                        plugin = PluginManager.create_plugin(plugin_name, config)
                         
                         # 读取数据（确保文件指针在开头）
                         cover_file.seek(0)
@@ -249,7 +259,7 @@ def data_hiding_ui(plugin_name, use_compression, use_encryption,
         
         stego_file = st.file_uploader(
             "上传隐写图像",
-            type=['png', 'jpg', 'jpeg', 'bmp'],
+            type=['png', 'jpg', 'jpeg', 'bmp', 'webp', 'tif', 'tiff'],
             help="包含隐藏数据的图像"
         )
         
@@ -267,25 +277,26 @@ def data_hiding_ui(plugin_name, use_compression, use_encryption,
             else:
                 try:
                     with st.spinner("正在提取数据..."):
-                        # 获取插件
-                        plugin = PluginManager.get_plugin_by_name(plugin_name)
                         if plugin_name in ["LSB", "RandomLSB"]:
                             from StegaPy.plugin.lsb.lsb_config import LSBConfig
                             config = LSBConfig(
                                 max_bits_used_per_channel=max_bits,
                                 use_compression=use_compression,
+                                compression_codec=compression_codec,
                                 use_encryption=use_encryption,
                                 password=password,
                                 encryption_algorithm=encryption_algorithm
                             )
-                            plugin.config = config
                         else:
                             config = StegaPyConfig(
                                 use_compression=use_compression,
+                                compression_codec=compression_codec,
                                 use_encryption=use_encryption,
                                 password=password,
                                 encryption_algorithm=encryption_algorithm
                             )
+                        # 每个请求使用独立的插件实例，并发请求之间互不影响
+                        plugin = PluginManager.create_plugin(plugin_name, config)
                         
                         # 读取数据（确保文件指针在开头）
                         stego_file.seek(0)
@@ -333,9 +344,8 @@ def watermarking_ui(plugin_name, use_compression, use_encryption,
             else:
                 try:
                     with st.spinner("正在生成签名..."):
-                        plugin = PluginManager.get_plugin_by_name(plugin_name)
                         config = StegaPyConfig(password=gen_password)
-                        plugin.config = config
+                        plugin = PluginManager.create_plugin(plugin_name, config)
                         
                         stegapy = StegaPy(plugin, config)
                         sig_data = stegapy.generate_signature()
@@ -421,8 +431,8 @@ def watermarking_ui(plugin_name, use_compression, use_encryption,
             else:
                 try:
                     with st.spinner("正在嵌入水印..."):
-                        plugin = PluginManager.get_plugin_by_name(plugin_name)
                         config = StegaPyConfig()
+                        plugin = PluginManager.create_plugin(plugin_name, config)
                         stegapy = StegaPy(plugin, config)
                         
                         # 读取数据（确保文件指针在开头）
@@ -536,9 +546,10 @@ def watermarking_ui(plugin_name, use_compression, use_encryption,
             else:
                 try:
                     with st.spinner("正在验证水印..."):
-                        plugin = PluginManager.get_plugin_by_name(plugin_name)
                         config = StegaPyConfig()
-                        stegapy = StegaPy(plugin, config)
+                        plugin = PluginManager.create_plugin(plugin_name, config)
+                        # 插件实例仅用于本次请求，关闭调用隔离以便读取检测后的调试信息
+                        stegapy = StegaPy(plugin, config, isolate_calls=False)
                         
                         # 读取数据（确保文件指针在开头）
                         stego_file.seek(0)
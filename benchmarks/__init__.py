@@ -0,0 +1,6 @@
+"""
+StegaPy 性能基准测试
+
+    python -m benchmarks.run               # 默认场景（0.25、1 MP）
+    python -m benchmarks.run --sizes 0.25,1,4,16,100 --full
+"""
@@ -0,0 +1,110 @@
+"""
+基准测试数据：确定性的合成载体图像和负载
+"""
+
+import io
+import math
+import os
+import random
+import numpy as np
+from PIL import Image
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+# 生成文本负载的词表（可压缩的负载）
+WORDS = ("stega", "pixel", "image", "cover", "hidden", "message", "payload", "channel", "bit",
+         "header", "deflate", "cipher", "secret", "wavelet", "subband", "the", "and", "of", "a",
+         "data", "plugin", "embed", "extract", "watermark", "signature", "0", "1", "2023", "2025")
+
+
+def cover_shape(megapixels):
+    """根据像素数（百万）计算接近正方形的图像尺寸 (宽, 高)"""
+    pixels = int(round(megapixels * 1000000))
+    width = max(8, int(math.sqrt(pixels)))
+    height = max(8, pixels // width)
+    return width, height
+
+
+def make_cover_pixels(megapixels, seed=0):
+    """生成确定性的RGB载体像素（uint8，形状为 (高, 宽, 3)）
+
+    平滑渐变叠加低幅噪声，接近自然图像的统计特性：PNG能压缩一部分，
+    DWT各子带都有能量。相同参数总是生成相同的像素。
+    """
+    width, height = cover_shape(megapixels)
+    rng = np.random.default_rng(seed)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    x = np.linspace(0.0, 1.0, width, dtype=np.float32)
+    # 按行块生成，避免大图像时的临时数组占用过多内存
+    rows = max(1, (16 * 1024 * 1024) // (width * 3 * 4))
+    for top in range(0, height, rows):
+        y = np.linspace(top / height, min(top + rows, height) / height,
+                        min(rows, height - top), dtype=np.float32)[:, None]
+        block = np.empty((len(y), width, 3), dtype=np.float32)
+        block[..., 0] = 255.0 * (0.5 + 0.5 * np.sin(6.0 * x + 3.0 * y))
+        block[..., 1] = 255.0 * (0.25 + 0.5 * x * y)
+        block[..., 2] = 255.0 * (0.5 + 0.4 * np.cos(4.0 * y - 2.0 * x))
+        block += rng.normal(0.0, 12.0, block.shape).astype(np.float32)
+        np.clip(block, 0, 255, out=block)
+        pixels[top:top + len(y)] = block.astype(np.uint8)
+    return pixels
+
+
+def make_cover(megapixels, seed=0, format='PNG', cache=True):
+    """生成载体图像文件内容，生成结果缓存在 benchmarks/.cache 中"""
+    path = os.path.join(CACHE_DIR, f"cover-{megapixels:g}mp-{seed}.{format.lower()}")
+    if cache and os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    buffer = io.BytesIO()
+    # 基准测试关心的是处理速度，载体使用快速压缩级别以缩短准备时间
+    Image.fromarray(make_cover_pixels(megapixels, seed)).save(buffer, format=format, compress_level=1)
+    data = buffer.getvalue()
+    if cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return data
+
+
+def make_payload(size, kind='text', seed=0):
+    """生成确定性的负载
+
+    Args:
+        size: 字节数
+        kind: 'text' 为可压缩的文本，'random' 为不可压缩的随机字节
+        seed: 随机种子
+    """
+    if kind == 'random':
+        return np.random.default_rng(seed).integers(0, 256, size, dtype=np.uint8).tobytes()
+    if kind != 'text':
+        raise ValueError(f"未知的负载类型: {kind}")
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(WORDS)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts).encode('ascii')[:size]
+
+
+def parse_size(text):
+    """解析带单位的大小，如 '512'、'64K'、'1M'"""
+    text = text.strip().upper()
+    units = {'K': 1024, 'M': 1024 * 1024}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size):
+    """将字节数格式化为简短形式"""
+    if size >= 1024 * 1024 and size % (1024 * 1024) == 0:
+        return f"{size // (1024 * 1024)}M"
+    if size >= 1024 and size % 1024 == 0:
+        return f"{size // 1024}K"
+    return str(size)
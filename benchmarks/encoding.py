@@ -0,0 +1,182 @@
+"""
+StegaPy 输出编码基准测试
+
+对每个编码配置（ImageUtil.ENCODING_PROFILES）和输出格式，测量隐写图像的编码耗时、编码吞吐量
+（按原始像素数据计算的 MB/s）和输出大小，并检查解码后的像素与编码前逐位一致。
+编码配置 pil-default 表示不使用编码配置（PIL 默认选项，PNG 为 6 级压缩），作为对照；
+vs PNG 列为相同载体、相同编码配置下相对 PNG 的耗时和大小之比。
+
+隐写图像由载体生成：前 --fill 比例的像素的最低位替换为随机位，相当于以 1 位/通道嵌入
+不可压缩（压缩或加密后）的负载，其余像素保持载体原样。载体默认为合成图像，也可以用
+--images 指定真实的图像文件。
+
+格式 tiff-lzw 为使用 LZW 压缩的 TIFF（tiff 为 deflate 压缩）。
+
+用法:
+    python -m benchmarks.encoding
+    python -m benchmarks.encoding --sizes 1,4,16 --profiles fastest,balanced --formats png,webp
+    python -m benchmarks.encoding --images photos/*.jpg --fill 0.1 --output encoding.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.data import make_cover_pixels
+from benchmarks.harness import environment_info, summarize_times, time_call
+from benchmarks.run import parse_list
+
+DEFAULT_SIZES = '1,4'
+DEFAULT_FORMATS = 'png,bmp,webp,tiff,tiff-lzw'
+# 格式变体：名称 -> (PIL 格式名, 附加的编码选项)
+FORMAT_VARIANTS = {
+    'TIFF-LZW': ('TIFF', {'compression': 'tiff_lzw'}),
+}
+# 表示 PIL 默认选项的编码配置名
+PIL_DEFAULT = 'pil-default'
+
+
+def make_stego_pixels(megapixels, fill=1.0, seed=0, path=None):
+    """生成隐写像素：前 fill 比例的像素低位替换为随机位，载体为合成图像或 path 指定的图像文件"""
+    if path is None:
+        pixels = make_cover_pixels(megapixels, seed)
+    else:
+        from StegaPy.util.image_util import ImageUtil
+
+        pixels = ImageUtil.byte_array_to_pixels(path)
+    rows = int(round(pixels.shape[0] * fill))
+    if rows:
+        noise = np.random.default_rng(seed + 1).integers(0, 2, pixels[:rows].shape, dtype=np.uint8)
+        pixels[:rows] = (pixels[:rows] & 0xFE) | noise
+    return pixels
+
+
+def run_case(image, pixels, cover, format, profile, repeat=3):
+    """测量一个格式和编码配置，返回结果记录"""
+    from StegaPy.util.image_util import ImageUtil
+
+    profile_name, profile = profile, (None if profile == PIL_DEFAULT else profile)
+    pil_format, options = FORMAT_VARIANTS.get(format, (format, {}))
+    height, width = pixels.shape[:2]
+    record = {'id': f"{format}/{profile_name}/{cover}", 'format': format, 'profile': profile_name,
+              'cover': cover, 'width': width, 'height': height,
+              'options': repr(ImageUtil.get_encoding_options(pil_format, profile, **options))}
+    try:
+        encode = lambda: ImageUtil.image_to_byte_array(image, None, pil_format, profile, **options)
+        times = time_call(encode, repeat=repeat, warmup=0)
+        data = encode()
+        decoded = ImageUtil.byte_array_to_pixels(data, writable=False)
+    except Exception as e:
+        record.update(status='error', reason=f"{type(e).__name__}: {e}")
+        return record
+
+    stats = summarize_times(times)
+    record.update(
+        status='ok',
+        stats=stats,
+        encode_mb_per_s=pixels.nbytes / 1e6 / stats['median_s'],
+        output_bytes=len(data),
+        output_ratio=len(data) / pixels.nbytes,
+        lossless=bool(np.array_equal(decoded, pixels)),
+    )
+    return record
+
+
+def compare_to_png(record, png_record):
+    """记录相对 PNG（相同载体和编码配置）的耗时和大小之比"""
+    if record['status'] != 'ok' or png_record is None or png_record['status'] != 'ok':
+        return
+    record['time_vs_png'] = record['stats']['median_s'] / png_record['stats']['median_s']
+    record['size_vs_png'] = record['output_bytes'] / png_record['output_bytes']
+
+
+def format_record(record):
+    """格式化一行结果"""
+    if record['status'] != 'ok':
+        return f"{record['id']:<36} {record['status']}: {record['reason']}"
+    versus = (f"{record['time_vs_png']:7.2f} {record['size_vs_png']:7.2f}"
+              if 'time_vs_png' in record else f"{'-':>7} {'-':>7}")
+    return (f"{record['id']:<36} {record['stats']['median_s'] * 1000:10.1f} "
+            f"{record['encode_mb_per_s']:9.1f} {record['output_bytes'] / 1e6:9.2f} "
+            f"{record['output_ratio']:6.2f} {versus} {'yes' if record['lossless'] else 'NO':>8}")
+
+
+def print_header():
+    """输出结果表头"""
+    print(f"{'format/profile/cover':<36} {'median ms':>10} {'MB/s':>9} {'output MB':>9} "
+          f"{'ratio':>6} {'time/PNG':>7} {'size/PNG':>7} {'lossless':>8}")
+
+
+def main(argv=None):
+    from StegaPy.util.image_util import ENCODING_PROFILES
+
+    parser = argparse.ArgumentParser(description="StegaPy 输出编码基准测试")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"载体像素数（百万）列表，默认 {DEFAULT_SIZES}")
+    all_profiles = ','.join((PIL_DEFAULT,) + tuple(ENCODING_PROFILES))
+    parser.add_argument('--profiles', default=all_profiles, help=f"编码配置列表，默认 {all_profiles}")
+    parser.add_argument('--formats', default=DEFAULT_FORMATS,
+                        help=f"输出格式列表，默认 {DEFAULT_FORMATS}")
+    parser.add_argument('--images', nargs='+', help="使用这些图像文件作为载体（忽略 --sizes）")
+    parser.add_argument('--fill', type=float, default=1.0,
+                        help="低位被负载占用的像素比例（0-1），默认 1")
+    parser.add_argument('--repeat', type=int, default=3, help="每个场景的计时次数，默认 3")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument('--output', help="结果文件（JSON），默认只输出到终端")
+    args = parser.parse_args(argv)
+
+    profiles = parse_list(args.profiles)
+    unknown = [profile for profile in profiles if profile != PIL_DEFAULT and profile not in ENCODING_PROFILES]
+    if unknown:
+        parser.error(f"未知的编码配置: {', '.join(unknown)}")
+    if not 0.0 <= args.fill <= 1.0:
+        parser.error("--fill 必须在0-1之间")
+    formats = [fmt.upper() for fmt in parse_list(args.formats)]
+    # 先编码 PNG，其他格式与之比较
+    formats.sort(key=lambda fmt: fmt != 'PNG')
+
+    from PIL import Image
+
+    if args.images:
+        covers = [(os.path.basename(path), None, path) for path in args.images]
+    else:
+        covers = [(f"{size:g}MP", size, None) for size in parse_list(args.sizes, float)]
+
+    results = []
+    print_header()
+    for cover, size, path in covers:
+        pixels = make_stego_pixels(size, args.fill, args.seed, path)
+        image = Image.fromarray(pixels)
+        png_records = {}
+        for format in formats:
+            for profile in profiles:
+                record = run_case(image, pixels, cover, format, profile, args.repeat)
+                if format == 'PNG':
+                    png_records[profile] = record
+                else:
+                    compare_to_png(record, png_records.get(profile))
+                results.append(record)
+                print(format_record(record), flush=True)
+
+    if args.output:
+        meta = environment_info()
+        meta['args'] = vars(args)
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=1)
+        print(f"\n结果已写入 {args.output}")
+
+    failed = any(record['status'] == 'error' or not record['lossless'] for record in results)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
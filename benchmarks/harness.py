@@ -0,0 +1,108 @@
+"""
+基准测试计时与内存测量
+"""
+
+import gc
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_call(func, repeat=3, warmup=1, min_time=0.0):
+    """多次执行 func 并返回每次的耗时（秒）
+
+    Args:
+        func: 无参数的可调用对象
+        repeat: 计时次数
+        warmup: 预热次数（不计时，用于加载插件、填充密钥缓存等）
+        min_time: 总计时时间不足该值时继续执行，直到达到该值（用于很快的操作）
+    """
+    for _ in range(warmup):
+        func()
+    times = []
+    total = 0.0
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        while len(times) < repeat or total < min_time:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            times.append(elapsed)
+            total += elapsed
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return times
+
+
+def peak_memory(func):
+    """执行一次 func，返回执行期间新分配的 Python/numpy 内存峰值（字节）"""
+    gc.collect()
+    # 重新开始跟踪，只统计本次执行中的分配
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize_times(times):
+    """计算耗时统计"""
+    return {
+        'min_s': min(times),
+        'median_s': statistics.median(times),
+        'mean_s': statistics.mean(times),
+        'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'runs': len(times),
+    }
+
+
+def _module_version(name):
+    """获取已安装模块的版本"""
+    try:
+        module = __import__(name)
+        return getattr(module, '__version__', None)
+    except ImportError:
+        return None
+
+
+def _git_commit():
+    """获取当前 git 提交"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info():
+    """收集运行环境信息，写入结果文件以便对比"""
+    from StegaPy import __version__
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'stegapy': __version__,
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': _module_version('numpy'),
+        'pillow': _module_version('PIL'),
+        'pywt': _module_version('pywt'),
+        'cryptography': _module_version('cryptography'),
+    }
@@ -0,0 +1,122 @@
+"""
+StegaPy 内存基准测试
+
+对嵌入/提取（以及水印嵌入/检查）的单次执行，用 tracemalloc 测量 Python/numpy 分配的
+内存峰值，按每百万像素的字节数（MB/MP）报告，用于估算容器的内存配额。x frame 为峰值
+相对一幅 RGB 像素数组（宽 x 高 x 3 字节）的倍数。
+
+tracemalloc 看不到 Pillow 在 C 层分配的内存：解码后的图像（RGB 每像素 4 字节）以及
+PNG 编解码器的缓冲区，估算配额时需另外加上约 4 MB/MP。
+
+用法:
+    python -m benchmarks.memory
+    python -m benchmarks.memory --sizes 1,4,16 --payloads 64K,1M --plugins LSB,RandomLSB
+    python -m benchmarks.memory --output memory.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.data import parse_size
+from benchmarks.harness import environment_info, peak_memory
+from benchmarks.run import (DATA_HIDING_PLUGINS, PLUGIN_OPERATIONS, WATERMARKING_PLUGINS,
+                            SkipScenario, build_scenarios, parse_list, prepare)
+
+DEFAULT_SIZES = '1,4'
+DEFAULT_PAYLOADS = '64K,1M'
+
+
+def run_scenario(scenario, payload_kind='text', seed=0):
+    """测量单个场景，返回结果记录"""
+    record = scenario.to_dict()
+    try:
+        func, _ = prepare(scenario, payload_kind, seed)
+        # 预热一次，避免把插件加载、密钥派生缓存等一次性开销计入峰值
+        func()
+        peak = peak_memory(func)
+    except SkipScenario as e:
+        record.update(status='skipped', reason=str(e))
+        return record
+    except Exception as e:
+        record.update(status='error', reason=f"{type(e).__name__}: {e}")
+        return record
+
+    pixels = record['width'] * record['height']
+    record.update(
+        status='ok',
+        peak_bytes=peak,
+        peak_bytes_per_mp=peak * 1e6 / pixels,
+        peak_frames=peak / (pixels * 3),
+    )
+    return record
+
+
+def format_record(record):
+    """格式化一行结果（MB、MB/MP）"""
+    if record['status'] != 'ok':
+        return f"{record['id']:<44} {record['status']}: {record['reason']}"
+    return (f"{record['id']:<44} {record['peak_bytes'] / 1e6:9.1f} "
+            f"{record['peak_bytes_per_mp'] / 1e6:9.2f} {record['peak_frames']:7.2f}")
+
+
+def print_header():
+    """输出结果表头"""
+    print(f"{'scenario':<44} {'peak MB':>9} {'MB/MP':>9} {'x frame':>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StegaPy 内存基准测试")
+    parser.add_argument('--plugins', default=','.join(DATA_HIDING_PLUGINS + WATERMARKING_PLUGINS),
+                        help="插件列表（默认 LSB,RandomLSB,DWTDugad）")
+    parser.add_argument('--operations', default='embed,extract,check', help="操作列表")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"载体像素数（百万）列表，默认 {DEFAULT_SIZES}")
+    parser.add_argument('--payloads', default=DEFAULT_PAYLOADS,
+                        help=f"负载大小列表，支持 K/M 后缀，默认 {DEFAULT_PAYLOADS}")
+    parser.add_argument('--bits', default='1', help="每通道位数列表，默认 1")
+    parser.add_argument('--payload-kind', choices=['text', 'random'], default='text',
+                        help="负载类型：可压缩文本或随机字节（默认 text）")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument('--output', help="结果文件（JSON），默认只输出到终端")
+    args = parser.parse_args(argv)
+
+    plugins = parse_list(args.plugins)
+    unknown = [plugin for plugin in plugins if plugin not in PLUGIN_OPERATIONS]
+    if unknown:
+        parser.error(f"未知的插件: {', '.join(unknown)}")
+    bits_list = parse_list(args.bits, int)
+    if not bits_list or any(not 1 <= bits <= 8 for bits in bits_list):
+        parser.error("每通道位数必须在1-8之间")
+
+    # 压缩、加密只影响负载大小的内存，不单独展开
+    scenarios = build_scenarios(plugins, parse_list(args.operations), parse_list(args.sizes, float),
+                                parse_list(args.payloads, parse_size), bits_list,
+                                (False,), (False,), full=True)
+
+    results = []
+    print_header()
+    for scenario in scenarios:
+        record = run_scenario(scenario, args.payload_kind, args.seed)
+        results.append(record)
+        print(format_record(record), flush=True)
+
+    if args.output:
+        meta = environment_info()
+        meta['args'] = vars(args)
+        if os.path.dirname(args.output):
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=1)
+        print(f"\n结果已写入 {args.output}")
+
+    return 1 if any(record['status'] == 'error' for record in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""
+性能回归检查
+
+运行一组固定的基准测试（端到端的嵌入/提取，以及 LSBOutputStream、RandomLSBInputStream、
+DWTDugadPlugin._wm_subband、ImageUtil 转换等热点路径），与提交在仓库中的基线
+（benchmarks/baseline.json）比较。耗时用紧邻该基准测试的校准循环耗时归一化，以抵消机器
+性能差异；超出容差范围变慢的项会重新运行确认，仍然变慢时以非零状态退出，并输出对比表。
+
+用法:
+    python -m benchmarks.regression                 # 与基线比较
+    python -m benchmarks.regression --update        # 重新生成基线
+    python -m benchmarks.regression --filter LSB --tolerance 0.3
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from benchmarks.data import make_cover, make_cover_pixels, make_payload
+from benchmarks.harness import environment_info, time_call
+from benchmarks.run import PASSWORD, Scenario, prepare
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+DEFAULT_TOLERANCE = 0.25
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_ERROR = 2
+
+
+def calibrate(repeat=7):
+    """校准循环：混合解释器、numpy 按位运算和 zlib 压缩的固定工作量，返回最短耗时（秒）
+
+    被测代码同样由这三类操作组成，用它的耗时归一化可以比较不同机器上的结果。
+    """
+    data = np.arange(2 * 1024 * 1024, dtype=np.uint32).astype(np.uint8)
+
+    def work():
+        total = 0
+        for i in range(200000):
+            total += i * i % 7
+        values = data
+        for bit in range(8):
+            values = (values & np.uint8(0xFF ^ (1 << bit))) | ((values >> 7) << bit)
+        zlib.compress(values[:1024 * 1024].tobytes(), 6)
+        return total
+
+    return min(time_call(work, repeat=repeat, warmup=1))
+
+
+def _end_to_end(plugin, operation, megapixels, payload_size=None, bits=None):
+    """端到端场景（与 benchmarks.run 中的场景相同）"""
+    def setup():
+        return prepare(Scenario(plugin, operation, megapixels, payload_size, bits))[0]
+    return setup
+
+
+def _lsb_output_stream(megapixels, payload_size, bits):
+    """LSBOutputStream：构造（复制像素、写数据头）、写入负载并生成图像"""
+    def setup():
+        from PIL import Image
+        from StegaPy.plugin.lsb.lsb_config import LSBConfig
+        from StegaPy.plugin.lsb.lsb_output_stream import LSBOutputStream
+
+        image = Image.fromarray(make_cover_pixels(megapixels))
+        payload = make_payload(payload_size)
+        config = LSBConfig(max_bits_used_per_channel=bits)
+
+        def run():
+            stream = LSBOutputStream(image, len(payload), 'payload.bin', config)
+            stream.write(payload)
+            stream.flush()
+            return stream.get_image()
+        return run
+    return setup
+
+
+def _random_lsb_input_stream(megapixels, payload_size, bits):
+    """RandomLSBInputStream：构造（生成置换序列、读数据头）并读取负载"""
+    def setup():
+        from PIL import Image
+        from StegaPy.plugin.lsb.lsb_config import LSBConfig
+        from StegaPy.plugin.randlsb.random_lsb_input_stream import RandomLSBInputStream
+        from StegaPy.plugin.randlsb.random_lsb_output_stream import RandomLSBOutputStream
+
+        payload = make_payload(payload_size)
+        config = LSBConfig(max_bits_used_per_channel=bits)
+        stream = RandomLSBOutputStream(Image.fromarray(make_cover_pixels(megapixels)),
+                                       len(payload), 'payload.bin', config, PASSWORD)
+        stream.write(payload)
+        stream.flush()
+        stego = stream.get_image()
+
+        def run():
+            data = RandomLSBInputStream(stego, config, PASSWORD).read()
+            assert data == payload
+            return data
+        return run
+    return setup
+
+
+def _wm_subband(megapixels):
+    """DWTDugadPlugin._wm_subband：在第1层水平细节子带中嵌入水印"""
+    def setup():
+        from StegaPy.config import StegaPyConfig
+        from StegaPy.plugin.dwtdugad.dwt_dugad_plugin import DWTDugadPlugin
+        from StegaPy.util.dwt_util import DWTUtil
+
+        plugin = DWTDugadPlugin(StegaPyConfig(password=PASSWORD))
+        sig = plugin._load_signature(plugin.generate_signature())
+        luminance = make_cover_pixels(megapixels)[..., 0].astype(np.float64)
+        subband = DWTUtil.forward_dwt(luminance, plugin.DEFAULT_WAVELET, 1)[1][0]
+
+        def run():
+            data = subband.copy()
+            plugin._wm_subband(data, sig['watermark'], sig['watermark_length'],
+                               sig['alpha'], sig['casting_threshold'])
+            return data
+        return run
+    return setup
+
+
+def _image_util(operation, megapixels):
+    """ImageUtil 转换"""
+    def setup():
+        from PIL import Image
+        from StegaPy.util.image_util import ImageUtil
+
+        if operation == 'byte_array_to_image':
+            cover = make_cover(megapixels)
+            return lambda: ImageUtil.byte_array_to_image(cover, 'cover.png')
+        image = Image.fromarray(make_cover_pixels(megapixels))
+        if operation == 'image_to_byte_array':
+            return lambda: ImageUtil.image_to_byte_array(image, 'stego.png')
+        if operation == 'get_yuv_from_image':
+            return lambda: ImageUtil.get_yuv_from_image(image)
+        yuv = ImageUtil.get_yuv_from_image(image)
+        return lambda: ImageUtil.get_image_from_yuv(yuv, 'RGB')
+    return setup
+
+
+# 名称 -> (准备函数, 容差；None 表示使用默认容差)
+BENCHMARKS = {
+    'e2e/LSB/embed/1MP/64K/b1': (_end_to_end('LSB', 'embed', 1, 65536, 1), 0.35),
+    'e2e/LSB/extract/1MP/64K/b1': (_end_to_end('LSB', 'extract', 1, 65536, 1), 0.35),
+    'e2e/RandomLSB/embed/1MP/64K/b1': (_end_to_end('RandomLSB', 'embed', 1, 65536, 1), 0.35),
+    'e2e/RandomLSB/extract/1MP/64K/b1': (_end_to_end('RandomLSB', 'extract', 1, 65536, 1), 0.35),
+    'e2e/DWTDugad/embed/0.25MP': (_end_to_end('DWTDugad', 'embed', 0.25), 0.35),
+    'e2e/DWTDugad/check/0.25MP': (_end_to_end('DWTDugad', 'check', 0.25), 0.35),
+    'LSBOutputStream/1MP/64K/b1': (_lsb_output_stream(1, 65536, 1), None),
+    'LSBOutputStream/1MP/64K/b4': (_lsb_output_stream(1, 65536, 4), None),
+    'RandomLSBInputStream/1MP/64K/b1': (_random_lsb_input_stream(1, 65536, 1), None),
+    'DWTDugadPlugin._wm_subband/0.25MP': (_wm_subband(0.25), None),
+    'ImageUtil.byte_array_to_image/1MP': (_image_util('byte_array_to_image', 1), None),
+    'ImageUtil.image_to_byte_array/1MP': (_image_util('image_to_byte_array', 1), None),
+    'ImageUtil.get_yuv_from_image/1MP': (_image_util('get_yuv_from_image', 1), None),
+    'ImageUtil.get_image_from_yuv/1MP': (_image_util('get_image_from_yuv', 1), None),
+}
+
+
+def run_benchmarks(names, repeat=5, min_time=0.5, progress=None):
+    """运行基准测试，返回 {名称: 结果}
+
+    取多次执行中的最短耗时，受干扰最小；每个基准测试前单独校准一次，
+    用紧邻的校准耗时归一化，以抵消运行过程中机器负载、频率的变化。
+    """
+    results = {}
+    for name in names:
+        setup, _ = BENCHMARKS[name]
+        try:
+            func = setup()
+            calibration = calibrate(repeat=3)
+            times = time_call(func, repeat=repeat, warmup=1, min_time=min_time)
+            results[name] = {'min_s': min(times), 'calibration_s': calibration, 'runs': len(times)}
+        except Exception as e:
+            results[name] = {'error': f"{type(e).__name__}: {e}"}
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def _normalized(result, calibration):
+    """归一化耗时；旧格式的结果没有单独的校准耗时，使用整体校准耗时"""
+    return result['min_s'] / result.get('calibration_s', calibration)
+
+
+def compare(baseline, current, calibration, tolerance_override=None):
+    """与基线比较，返回对比行列表
+
+    每行包含归一化耗时（耗时 / 校准耗时）、相对变化和状态：
+    ok、slower（超出容差变慢，视为回归）、faster（超出容差变快，可更新基线）、
+    new（基线中没有）、error（运行出错）。
+    """
+    rows = []
+    base_calibration = baseline['calibration_s']
+    for name, result in current.items():
+        _, tolerance = BENCHMARKS[name]
+        if tolerance_override is not None:
+            tolerance = tolerance_override
+        elif tolerance is None:
+            tolerance = baseline.get('tolerance', DEFAULT_TOLERANCE)
+        row = {'name': name, 'tolerance': tolerance}
+        if 'error' in result:
+            row.update(status='error', error=result['error'])
+            rows.append(row)
+            continue
+        row['current'] = _normalized(result, calibration)
+        base = baseline['results'].get(name)
+        if base is None:
+            row['status'] = 'new'
+        else:
+            row['baseline'] = _normalized(base, base_calibration)
+            row['change'] = row['current'] / row['baseline'] - 1.0
+            if row['change'] > tolerance:
+                row['status'] = 'slower'
+            elif row['change'] < -tolerance:
+                row['status'] = 'faster'
+            else:
+                row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def format_table(rows):
+    """格式化对比表（归一化耗时为校准循环的倍数）"""
+    lines = [f"{'benchmark':<40} {'baseline':>9} {'current':>9} {'change':>8} {'band':>6}  status",
+             '-' * 84]
+    for row in rows:
+        baseline = f"{row['baseline']:9.3f}" if 'baseline' in row else f"{'-':>9}"
+        current = f"{row['current']:9.3f}" if 'current' in row else f"{'-':>9}"
+        change = f"{row['change'] * 100:+7.1f}%" if 'change' in row else f"{'-':>8}"
+        status = row['status'].upper() if row['status'] in ('slower', 'error') else row['status']
+        if 'error' in row:
+            status += f" ({row['error']})"
+        lines.append(f"{row['name']:<40} {baseline} {current} {change} "
+                     f"{row['tolerance'] * 100:5.0f}%  {status}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StegaPy 性能回归检查")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="基线文件（默认 benchmarks/baseline.json）")
+    parser.add_argument('--update', action='store_true', help="运行后写入新的基线")
+    parser.add_argument('--filter', help="只运行名称匹配该正则表达式的基准测试")
+    parser.add_argument('--tolerance', type=float, help="覆盖所有基准测试的容差（如 0.25 表示 25%%）")
+    parser.add_argument('--repeat', type=int, default=5, help="每个基准测试的最少执行次数（默认 5）")
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help="每个基准测试的最短总计时时间（秒，默认 0.5）")
+    parser.add_argument('--retries', type=int, default=1,
+                        help="变慢的基准测试重新运行确认的次数（默认 1，0 表示不重试）")
+    parser.add_argument('--json', help="将对比结果写入 JSON 文件")
+    parser.add_argument('--list', action='store_true', help="只列出基准测试")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if not args.filter or re.search(args.filter, name)]
+    if args.list:
+        for name in names:
+            print(name)
+        return EXIT_OK
+    if not names:
+        parser.error("没有匹配的基准测试")
+
+    baseline = None
+    if not args.update:
+        if not os.path.exists(args.baseline):
+            print(f"基线文件不存在: {args.baseline}（使用 --update 生成）", file=sys.stderr)
+            return EXIT_ERROR
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    def progress(name, result):
+        detail = result.get('error') or f"{result['min_s'] * 1000:.2f} ms"
+        print(f"  {name}: {detail}", file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    # 在运行前后各校准一次，取较小值，减少机器状态变化（频率调节、缓存预热）的影响
+    calibration = calibrate()
+    current = run_benchmarks(names, args.repeat, args.min_time, progress)
+    calibration = min(calibration, calibrate())
+    print(f"校准耗时: {calibration * 1000:.2f} ms"
+          + (f"（基线 {baseline['calibration_s'] * 1000:.2f} ms）" if baseline else '')
+          + f"，用时 {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    errors = [name for name, result in current.items() if 'error' in result]
+    if args.update:
+        if errors:
+            print(f"以下基准测试出错，未更新基线: {', '.join(errors)}", file=sys.stderr)
+            return EXIT_ERROR
+        results = {}
+        if os.path.exists(args.baseline) and args.filter:
+            # 只更新本次运行的基准测试，其余保留
+            with open(args.baseline, encoding='utf-8') as f:
+                previous = json.load(f)
+            results = {name: result for name, result in previous['results'].items()
+                       if name in BENCHMARKS}
+        results.update({name: {'min_s': result['min_s'], 'calibration_s': result['calibration_s']}
+                        for name, result in current.items()})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': environment_info(), 'calibration_s': calibration,
+                       'tolerance': DEFAULT_TOLERANCE, 'results': results},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"基线已写入 {args.baseline}")
+        return EXIT_OK
+
+    rows = compare(baseline, current, calibration, args.tolerance)
+    for _ in range(args.retries):
+        # 偶发的干扰可能使单次结果偏慢：重新运行变慢的项，保留较好的结果
+        slower = [row['name'] for row in rows if row['status'] == 'slower']
+        if not slower:
+            break
+        print(f"重新运行 {len(slower)} 项变慢的基准测试以确认", file=sys.stderr)
+        for name, result in run_benchmarks(slower, args.repeat, args.min_time, progress).items():
+            if 'error' not in result and \
+                    _normalized(result, calibration) < _normalized(current[name], calibration):
+                current[name] = result
+        rows = compare(baseline, current, calibration, args.tolerance)
+    print(format_table(rows))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'meta': environment_info(), 'calibration_s': calibration, 'rows': rows},
+                      f, ensure_ascii=False, indent=1)
+
+    slower = [row['name'] for row in rows if row['status'] == 'slower']
+    faster = [row['name'] for row in rows if row['status'] == 'faster']
+    if faster:
+        print(f"\n{len(faster)} 项明显变快，可使用 --update 更新基线")
+    if slower or errors:
+        print(f"\n性能回归: {len(slower)} 项变慢，{len(errors)} 项出错")
+        return EXIT_REGRESSION
+    print("\n未发现性能回归")
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,301 @@
+"""
+StegaPy 基准测试
+
+对 LSB、RandomLSB 的嵌入/提取和 DWTDugad 的水印嵌入/检查计时，覆盖载体大小、负载大小、
+每通道位数（1-8）以及压缩、加密开关，记录吞吐量（MB/s、MP/s）和内存峰值，
+结果写入 JSON 文件（默认 benchmarks/results/），可用于比较热点路径修改前后的性能。
+
+用法:
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 0.25,1,4,16,100 --payloads 1K,64K,1M --full
+    python -m benchmarks.run --plugins LSB --bits 1,8 --filter embed --output lsb.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.data import cover_shape, format_size, make_cover, make_payload, parse_size
+from benchmarks.harness import environment_info, peak_memory, summarize_times, time_call
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+DATA_HIDING_PLUGINS = ('LSB', 'RandomLSB')
+WATERMARKING_PLUGINS = ('DWTDugad',)
+PLUGIN_OPERATIONS = {
+    'LSB': ('embed', 'extract'),
+    'RandomLSB': ('embed', 'extract'),
+    'DWTDugad': ('embed', 'check'),
+}
+
+PASSWORD = 'stegapy-benchmark'
+
+DEFAULT_SIZES = '0.25,1'
+DEFAULT_PAYLOADS = '1K,64K'
+DEFAULT_BITS = '1-8'
+
+
+class SkipScenario(Exception):
+    """场景不适用（如负载超出载体容量）"""
+
+
+class Scenario:
+    """基准测试场景"""
+
+    def __init__(self, plugin, operation, megapixels, payload_size=None, bits=None,
+                 compression=False, encryption=False):
+        """初始化场景
+
+        Args:
+            plugin: 插件名称
+            operation: embed、extract 或 check
+            megapixels: 载体像素数（百万）
+            payload_size: 负载字节数（水印场景为 None，负载为签名）
+            bits: 每通道位数（水印场景为 None）
+            compression: 是否压缩
+            encryption: 是否加密
+        """
+        self.plugin = plugin
+        self.operation = operation
+        self.megapixels = megapixels
+        self.payload_size = payload_size
+        self.bits = bits
+        self.compression = compression
+        self.encryption = encryption
+
+    @property
+    def id(self):
+        """场景标识，在不同版本的结果之间保持稳定"""
+        parts = [self.plugin, self.operation, f"{self.megapixels:g}MP"]
+        if self.payload_size is not None:
+            parts += [format_size(self.payload_size), f"b{self.bits}",
+                      f"c{int(self.compression)}", f"e{int(self.encryption)}"]
+        return '/'.join(parts)
+
+    def to_dict(self):
+        """转换为结果记录中的场景字段"""
+        width, height = cover_shape(self.megapixels)
+        return {
+            'id': self.id,
+            'plugin': self.plugin,
+            'operation': self.operation,
+            'megapixels': self.megapixels,
+            'width': width,
+            'height': height,
+            'payload_bytes': self.payload_size,
+            'bits': self.bits,
+            'compression': self.compression,
+            'encryption': self.encryption,
+        }
+
+
+def parse_list(text, convert=str):
+    """解析逗号分隔的列表，整数支持 a-b 范围"""
+    values = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if convert is int and re.fullmatch(r'\d+-\d+', item):
+            first, last = (int(x) for x in item.split('-'))
+            values.extend(range(first, last + 1))
+        else:
+            values.append(convert(item))
+    return values
+
+
+def build_scenarios(plugins, operations, sizes, payloads, bits_list,
+                    compression_modes=(False, True), encryption_modes=(False, True), full=False):
+    """生成场景列表
+
+    默认按单因素展开：每通道位数在不压缩、不加密时全部测试，压缩、加密开关只在
+    第一个位数下测试；full 为 True 时测试所有组合。
+    """
+    scenarios = []
+    for plugin in plugins:
+        for operation in PLUGIN_OPERATIONS[plugin]:
+            if operation not in operations:
+                continue
+            for megapixels in sizes:
+                if plugin in WATERMARKING_PLUGINS:
+                    scenarios.append(Scenario(plugin, operation, megapixels))
+                    continue
+                for payload_size in payloads:
+                    if full:
+                        combos = itertools.product(bits_list, compression_modes, encryption_modes)
+                    else:
+                        base = (compression_modes[0], encryption_modes[0])
+                        combos = [(bits, base[0], base[1]) for bits in bits_list]
+                        combos += [(bits_list[0], compression, encryption)
+                                   for compression, encryption
+                                   in itertools.product(compression_modes, encryption_modes)
+                                   if (compression, encryption) != base]
+                    for bits, compression, encryption in combos:
+                        scenarios.append(Scenario(plugin, operation, megapixels, payload_size,
+                                                  bits, compression, encryption))
+    return scenarios
+
+
+def _create_stegapy(scenario):
+    """创建场景使用的 StegaPy 实例"""
+    from StegaPy import StegaPy, PluginManager
+
+    plugin = PluginManager.create_plugin(scenario.plugin)
+    config = plugin.create_config().copy(password=PASSWORD)
+    if scenario.bits is not None:
+        config.set_max_bits_used_per_channel(scenario.bits)
+        config.set_use_compression(scenario.compression)
+        config.set_compression_codec('deflate')
+        config.set_use_encryption(scenario.encryption)
+    plugin.reset_config(config)
+    return StegaPy(plugin, config)
+
+
+def prepare(scenario, payload_kind='text', seed=0):
+    """准备场景，返回 (待计时的函数, 负载字节数)，场景不适用时抛出 SkipScenario"""
+    from StegaPy.plugin.lsb.lsb_data_header import LSBDataHeader
+
+    stegapy = _create_stegapy(scenario)
+    cover = make_cover(scenario.megapixels, seed)
+
+    if scenario.plugin in WATERMARKING_PLUGINS:
+        sig = stegapy.generate_signature()
+        if scenario.operation == 'embed':
+            return (lambda: stegapy.embed_mark(sig, 'signature.dat', cover, 'cover.png', 'stego.png'),
+                    len(sig))
+        stego = stegapy.embed_mark(sig, 'signature.dat', cover, 'cover.png', 'stego.png')
+        return lambda: stegapy.check_mark(stego, 'stego.png', sig), len(sig)
+
+    width, height = cover_shape(scenario.megapixels)
+    capacity = width * height * 3 * scenario.bits // 8 - LSBDataHeader.get_max_header_size()
+    # 加密会增加少量开销（IV、填充、认证标签）
+    if scenario.payload_size + 64 > capacity:
+        raise SkipScenario(f"负载超出载体容量（{capacity} 字节）")
+
+    payload = make_payload(scenario.payload_size, payload_kind, seed)
+    if scenario.operation == 'embed':
+        return (lambda: stegapy.embed_data(payload, 'payload.bin', cover, 'cover.png', 'stego.png'),
+                len(payload))
+
+    stego = stegapy.embed_data(payload, 'payload.bin', cover, 'cover.png', 'stego.png')
+    if stegapy.extract_data(stego, 'stego.png')[1] != payload:
+        raise RuntimeError("提取的数据与嵌入的数据不一致")
+    return lambda: stegapy.extract_data(stego, 'stego.png'), len(payload)
+
+
+def run_scenario(scenario, repeat=3, warmup=1, measure_memory=True, payload_kind='text', seed=0):
+    """运行单个场景，返回结果记录"""
+    record = scenario.to_dict()
+    try:
+        func, payload_bytes = prepare(scenario, payload_kind, seed)
+        times = time_call(func, repeat=repeat, warmup=warmup)
+    except SkipScenario as e:
+        record.update(status='skipped', reason=str(e))
+        return record
+    except Exception as e:
+        record.update(status='error', reason=f"{type(e).__name__}: {e}")
+        return record
+
+    stats = summarize_times(times)
+    megapixels = record['width'] * record['height'] / 1e6
+    record.update(stats)
+    record.update(
+        status='ok',
+        times=times,
+        mb_per_s=payload_bytes / 1e6 / stats['median_s'],
+        mp_per_s=megapixels / stats['median_s'],
+        peak_bytes=peak_memory(func) if measure_memory else None,
+    )
+    return record
+
+
+def format_record(record):
+    """格式化一行结果"""
+    if record['status'] != 'ok':
+        return f"{record['id']:<44} {record['status']}: {record['reason']}"
+    peak = f"{record['peak_bytes'] / 1e6:9.1f}" if record['peak_bytes'] is not None else f"{'-':>9}"
+    return (f"{record['id']:<44} {record['median_s'] * 1000:10.2f} {record['mb_per_s']:9.2f} "
+            f"{record['mp_per_s']:8.2f} {peak}")
+
+
+def print_header():
+    """输出结果表头"""
+    print(f"{'scenario':<44} {'median ms':>10} {'MB/s':>9} {'MP/s':>8} {'peak MB':>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StegaPy 基准测试")
+    parser.add_argument('--plugins', default=','.join(DATA_HIDING_PLUGINS + WATERMARKING_PLUGINS),
+                        help="插件列表（默认 LSB,RandomLSB,DWTDugad）")
+    parser.add_argument('--operations', default='embed,extract,check', help="操作列表")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"载体像素数（百万）列表，默认 {DEFAULT_SIZES}，可到 100")
+    parser.add_argument('--payloads', default=DEFAULT_PAYLOADS,
+                        help=f"负载大小列表，支持 K/M 后缀，默认 {DEFAULT_PAYLOADS}")
+    parser.add_argument('--bits', default=DEFAULT_BITS, help=f"每通道位数列表，默认 {DEFAULT_BITS}")
+    parser.add_argument('--compression', choices=['off', 'on', 'both'], default='both',
+                        help="压缩开关（默认 both）")
+    parser.add_argument('--encryption', choices=['off', 'on', 'both'], default='both',
+                        help="加密开关（默认 both）")
+    parser.add_argument('--full', action='store_true', help="测试位数、压缩、加密的所有组合")
+    parser.add_argument('--payload-kind', choices=['text', 'random'], default='text',
+                        help="负载类型：可压缩文本或随机字节（默认 text）")
+    parser.add_argument('--filter', help="只运行标识匹配该正则表达式的场景")
+    parser.add_argument('--repeat', type=int, default=3, help="计时次数（默认 3）")
+    parser.add_argument('--warmup', type=int, default=1, help="预热次数（默认 1）")
+    parser.add_argument('--no-memory', action='store_true', help="不测量内存峰值")
+    parser.add_argument('--seed', type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument('--output', help="结果文件（默认 benchmarks/results/bench-<时间>.json）")
+    parser.add_argument('--list', action='store_true', help="只列出场景")
+    args = parser.parse_args(argv)
+
+    modes = {'off': (False,), 'on': (True,), 'both': (False, True)}
+    plugins = parse_list(args.plugins)
+    unknown = [plugin for plugin in plugins if plugin not in PLUGIN_OPERATIONS]
+    if unknown:
+        parser.error(f"未知的插件: {', '.join(unknown)}")
+    bits_list = parse_list(args.bits, int)
+    if not bits_list or any(not 1 <= bits <= 8 for bits in bits_list):
+        parser.error("每通道位数必须在1-8之间")
+
+    scenarios = build_scenarios(plugins, parse_list(args.operations), parse_list(args.sizes, float),
+                                parse_list(args.payloads, parse_size), bits_list,
+                                modes[args.compression], modes[args.encryption], args.full)
+    if args.filter:
+        scenarios = [scenario for scenario in scenarios if re.search(args.filter, scenario.id)]
+    if args.list:
+        for scenario in scenarios:
+            print(scenario.id)
+        return 0
+
+    meta = environment_info()
+    meta['args'] = vars(args)
+    results = []
+    print_header()
+    for scenario in scenarios:
+        record = run_scenario(scenario, args.repeat, args.warmup, not args.no_memory,
+                              args.payload_kind, args.seed)
+        results.append(record)
+        print(format_record(record), flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=1)
+
+    failed = sum(1 for record in results if record['status'] == 'error')
+    print(f"\n{len(results)} 个场景，{failed} 个出错，结果已写入 {output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,10 @@
+"""
+pytest 配置：使测试可以直接导入仓库中的 StegaPy 包和 benchmarks 模块
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
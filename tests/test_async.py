@@ -0,0 +1,57 @@
+"""
+异步接口测试
+"""
+
+import asyncio
+
+import pytest
+
+from StegaPy import AsyncStegaPy, PluginManager, StegaPy
+from StegaPy.exceptions import StegaPyException
+from StegaPy.plugin.lsb.lsb_plugin import LSBPlugin
+from benchmarks.data import make_cover, make_payload
+
+
+class CustomLSBPlugin(LSBPlugin):
+    """未在 PluginManager 中注册的插件"""
+
+    def get_name(self):
+        return 'CustomLSB'
+
+
+def embed_and_extract(stega, msg):
+    """嵌入后再提取，返回 (隐写图像, 提取结果)"""
+    async def run():
+        async with stega:
+            stego = await stega.embed_data(msg, 'm.bin', make_cover(0.05), 'cover.png', 'stego.png')
+            return stego, await stega.extract_data(stego, 'stego.png')
+
+    return asyncio.run(run())
+
+
+def test_plugin_object_config_is_used():
+    """传入插件对象时使用其配置，而不是插件的默认配置"""
+    plugin = PluginManager.create_plugin('LSB')
+    plugin.reset_config(plugin.create_config().copy(password='pw', use_encryption=True,
+                                                    kdf_iterations=1000))
+    msg = make_payload(100, 'random')
+    stego, extracted = embed_and_extract(AsyncStegaPy(plugin, executor='thread', max_workers=1), msg)
+    assert extracted == ['m.bin', msg]
+
+    # 数据已按插件对象的配置加密，不提供密码时无法提取
+    with pytest.raises(StegaPyException):
+        plugin = PluginManager.create_plugin('LSB')
+        StegaPy(plugin, plugin.create_config()).extract_data(stego, 'stego.png')
+
+
+def test_unregistered_plugin_with_thread_executor():
+    """线程执行器可以使用未注册的插件对象"""
+    msg = make_payload(100, 'random')
+    _, extracted = embed_and_extract(AsyncStegaPy(CustomLSBPlugin(), executor='thread', max_workers=1), msg)
+    assert extracted == ['m.bin', msg]
+
+
+def test_unregistered_plugin_with_process_executor():
+    """进程池按名称创建插件，未注册的插件对象被拒绝"""
+    with pytest.raises(StegaPyException):
+        AsyncStegaPy(CustomLSBPlugin(), executor='process', max_workers=1)
@@ -0,0 +1,33 @@
+"""
+批量接口测试
+"""
+
+import pytest
+
+from StegaPy.batch import BatchProcessor, EmbedJob
+from StegaPy.exceptions import StegaPyException
+from benchmarks.data import make_cover
+
+
+@pytest.mark.parametrize('ordered', [False, True])
+def test_invalid_job_reported_per_job(ordered):
+    """参数无效的任务字典作为该任务的失败结果返回，不中断其他任务"""
+    cover = make_cover(0.05)
+    jobs = [
+        EmbedJob(b'first', cover, msg_filename='a.txt', stego_filename='a.png', job_id='a'),
+        {'cover': cover, 'job_id': 'missing'},
+        {'msg': b'x', 'cover': cover, 'colour': 'red', 'job_id': 'unknown'},
+        {'msg': b'last', 'cover': cover, 'msg_filename': 'b.txt', 'stego_filename': 'b.png', 'job_id': 'b'},
+    ]
+    with BatchProcessor(workers=1, max_in_flight=2) as processor:
+        results = list(processor.embed_many(jobs, ordered=ordered))
+
+    assert sorted(result.index for result in results) == [0, 1, 2, 3]
+    if ordered:
+        assert [result.index for result in results] == [0, 1, 2, 3]
+    by_id = {result.job_id: result for result in results}
+    assert by_id['a'].ok and by_id['b'].ok
+    for job_id in ('missing', 'unknown'):
+        assert not by_id[job_id].ok
+        with pytest.raises(StegaPyException):
+            by_id[job_id].get()
@@ -0,0 +1,138 @@
+"""
+加密与流式解密测试
+"""
+
+import io
+
+import pytest
+
+from StegaPy import PluginManager, StegaPy, StegaPyConfig, StegoResult
+from StegaPy.exceptions import StegaPyErrors, StegaPyException
+from StegaPy.util.codec_util import CodecUtil
+from StegaPy.util.crypto_util import CryptoUtil
+from benchmarks.data import make_cover, make_payload
+
+
+@pytest.mark.parametrize('algorithm', ['AES128', 'AES256', 'A128GCM', 'A256GCM'])
+@pytest.mark.parametrize('size', [1, 100, 5000])
+def test_extract_to_round_trip(algorithm, size):
+    """小负载（与 Nonce 在同一读取块中）经 extract_to 流式解密后与原文一致"""
+    plugin = PluginManager.create_plugin('LSB')
+    config = plugin.create_config().copy(password='pw', use_encryption=True,
+                                         encryption_algorithm=algorithm, kdf_iterations=1000)
+    stega = StegaPy(plugin, config)
+    msg = make_payload(size, 'random')
+    stego = stega.embed_data(msg, 'm.bin', make_cover(0.05), 'cover.png', 'stego.png')
+
+    sink = io.BytesIO()
+    assert stega.extract_to(stego, sink, 'stego.png') == 'm.bin'
+    assert sink.getvalue() == msg
+
+
+def make_stego_with_kdf_iterations(iterations):
+    """直接调用插件嵌入，构造数据头中迭代次数为 iterations 的加密隐写图像"""
+    plugin = PluginManager.create_plugin('LSB')
+    plugin.reset_config(plugin.create_config().copy(use_compression=False, use_encryption=True,
+                                                    kdf_iterations=iterations))
+    return plugin.embed_data(make_payload(64, 'random'), 'm.bin', make_cover(0.05), 'cover.png', 'stego.png').encode()
+
+
+@pytest.mark.parametrize('iterations', [0xFFFFFFFF, 0x7FFFFFFF])
+def test_header_kdf_iterations_above_limit_rejected(iterations):
+    """数据头中的迭代次数超过上限时，在派生密钥前以 StegaPyException 拒绝"""
+    stego = make_stego_with_kdf_iterations(iterations)
+    plugin = PluginManager.create_plugin('LSB')
+    stega = StegaPy(plugin, plugin.create_config().copy(password='pw'))
+
+    with pytest.raises(StegaPyException) as excinfo:
+        stega.extract_data(stego, 'stego.png')
+    assert excinfo.value.get_error_code() == StegaPyErrors.KDF_ITERATIONS_TOO_HIGH
+
+    sink = io.BytesIO()
+    with pytest.raises(StegaPyException) as excinfo:
+        stega.extract_to(stego, sink, 'stego.png')
+    assert excinfo.value.get_error_code() == StegaPyErrors.KDF_ITERATIONS_TOO_HIGH
+    assert sink.getvalue() == b''
+
+
+def test_max_kdf_iterations_is_configurable():
+    """提高上限后可以提取迭代次数较大的数据"""
+    plugin = PluginManager.create_plugin('LSB')
+    config = plugin.create_config().copy(password='pw', use_encryption=True, kdf_iterations=2000)
+    stego = StegaPy(plugin, config).embed_data(b'hello', 'm.bin', make_cover(0.05), 'cover.png', 'stego.png')
+
+    with pytest.raises(StegaPyException):
+        StegaPy(plugin, config.copy(max_kdf_iterations=1000)).extract_data(stego, 'stego.png')
+    assert StegaPy(plugin, config).extract_data(stego, 'stego.png') == ['m.bin', b'hello']
+
+
+@pytest.mark.parametrize('kwargs', [{'kdf_iterations': 0}, {'max_kdf_iterations': 0},
+                                    {'max_kdf_iterations': 0x80000000}])
+def test_config_kwargs_validated(kwargs):
+    """构造函数的关键字参数与 setter 做相同的校验"""
+    with pytest.raises(ValueError):
+        StegaPyConfig(**kwargs)
+
+
+@pytest.mark.parametrize('plugin_name', ['LSB', 'RandomLSB'])
+@pytest.mark.parametrize('filename, overrides', [
+    ('b.bin', {}),
+    ('a.bin', {'use_compression': True, 'payload_codec_id': CodecUtil.CODEC_STORED}),
+])
+def test_gcm_authenticates_header(plugin_name, filename, overrides):
+    """AES-GCM 的认证标签覆盖数据头：密文不变而文件名、压缩标志被改写时认证失败"""
+    plugin = PluginManager.create_plugin(plugin_name)
+    config = plugin.create_config().copy(password='pw', use_compression=False, use_encryption=True,
+                                         encryption_algorithm='A128GCM', kdf_iterations=1000)
+    plugin.reset_config(config)
+    msg = make_payload(100, 'random')
+    ciphertext = CryptoUtil('pw', 'A128GCM', 1000).encrypt(msg, plugin.get_associated_data('a.bin'))
+    stega = StegaPy(plugin, config)
+
+    # 数据头与加密时一致
+    stego = plugin.embed_data(ciphertext, 'a.bin', make_cover(0.05), 'cover.png', 'stego.png').encode()
+    assert stega.extract_data(stego, 'stego.png') == ['a.bin', msg]
+
+    # 用相同的密文重新嵌入，改写数据头
+    plugin.reset_config(config.copy(**overrides))
+    stego = plugin.embed_data(ciphertext, filename, make_cover(0.05), 'cover.png', 'stego.png').encode()
+    for extract in (lambda: stega.extract_data(stego, 'stego.png'),
+                    lambda: stega.extract_to(stego, io.BytesIO(), 'stego.png')):
+        with pytest.raises(StegaPyException) as excinfo:
+            extract()
+        assert excinfo.value.get_error_code() == StegaPyErrors.INVALID_PASSWORD
+
+
+class RecordingSink(io.BytesIO):
+    """记录 write 调用次数的 sink"""
+
+    writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+
+@pytest.mark.parametrize('algorithm', ['A128GCM', 'A256GCM'])
+@pytest.mark.parametrize('use_compression', [False, True])
+def test_extract_to_tampered_gcm_writes_nothing(algorithm, use_compression):
+    """翻转一个密文位后认证失败，解压前即拒绝，sink 中没有写入任何内容"""
+    plugin = PluginManager.create_plugin('LSB')
+    config = plugin.create_config().copy(password='pw', use_encryption=True, use_compression=use_compression,
+                                         compression_probe=False, encryption_algorithm=algorithm,
+                                         kdf_iterations=1000)
+    stega = StegaPy(plugin, config)
+    msg = make_payload(100000, 'text')
+    stego = stega.embed_data(msg, 'm.bin', make_cover(0.5), 'cover.png', 'stego.png', lazy=True)
+
+    # 数据头之后第 100 个字节（1 位/通道，每字节占 8 个通道值）的最低位
+    pixels = stego.pixels.copy()
+    header_size = len(plugin.get_associated_data('m.bin'))
+    pixels.reshape(-1)[(header_size + 100) * 8] ^= 1
+    tampered = StegoResult(pixels, 'stego.png').encode()
+
+    sink = RecordingSink()
+    with pytest.raises(StegaPyException) as excinfo:
+        stega.extract_to(tampered, sink, 'stego.png', chunk_size=4096)
+    assert excinfo.value.get_error_code() == StegaPyErrors.INVALID_PASSWORD
+    assert sink.writes == 0 and sink.getvalue() == b''
@@ -0,0 +1,57 @@
+"""
+WebP、TIFF 输出格式测试：隐写图像经编码、解码后像素逐位一致，数据可以完整提取
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from StegaPy import PluginManager, StegaPy
+from StegaPy.util.image_util import ImageUtil
+from benchmarks.data import make_cover_pixels, make_payload
+
+# 输出格式：名称 -> (隐写图像文件名, 附加的编码选项)
+FORMATS = {
+    'webp': ('stego.webp', {}),
+    'tiff-deflate': ('stego.tiff', {}),
+    'tiff-lzw': ('stego.tiff', {'compression': 'tiff_lzw'}),
+}
+
+
+@pytest.fixture(scope='module')
+def cover():
+    """合成载体像素"""
+    return make_cover_pixels(0.05)
+
+
+@pytest.mark.parametrize('plugin_name', ['LSB', 'RandomLSB'])
+@pytest.mark.parametrize('bits', [1, 4, 8])
+@pytest.mark.parametrize('format', list(FORMATS))
+def test_lossless_round_trip(cover, plugin_name, bits, format):
+    """编码后的像素与嵌入结果逐位一致，提取出的数据与原文一致"""
+    filename, options = FORMATS[format]
+    plugin = PluginManager.create_plugin(plugin_name)
+    config = plugin.create_config().copy(password='pw', use_compression=False)
+    config.set_max_bits_used_per_channel(bits)
+    plugin.reset_config(config)
+    stega = StegaPy(plugin, config)
+    msg = make_payload(2000, 'random')
+
+    result = stega.embed_data(msg, 'm.bin', cover, None, filename, lazy=True)
+    data = result.encode(**options)
+    assert np.array_equal(ImageUtil.byte_array_to_pixels(data), result.pixels)
+    assert list(stega.extract_data(data, filename)) == ['m.bin', msg]
+
+
+@pytest.mark.parametrize('format, compression', [('tiff-deflate', 'tiff_adobe_deflate'),
+                                                 ('tiff-lzw', 'tiff_lzw')])
+def test_tiff_compression(cover, format, compression):
+    """TIFF 使用无损压缩，并带水平差分预测器"""
+    filename, options = FORMATS[format]
+    plugin = PluginManager.create_plugin('LSB')
+    result = StegaPy(plugin, plugin.create_config()).embed_data(b'x', 'm.bin', cover, None, filename, lazy=True)
+    image = Image.open(io.BytesIO(result.encode(**options)))
+    assert image.info['compression'] == compression
+    assert image.tag_v2[317] == 2
@@ -0,0 +1,37 @@
+"""
+导入耗时测试：执行 tools/check_import_time.py，StegaPy 包或命令行入口的导入耗时超出预算、
+或提前加载了重型依赖时失败
+"""
+
+import os
+import subprocess
+import sys
+
+from StegaPy.cli import ENCRYPTION_ALGORITHMS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'tools', 'check_import_time.py')
+
+
+def test_import_time_within_budget():
+    """import StegaPy、import StegaPy.cli 的耗时不超过预算，且不加载 numpy、PIL 等延迟导入的依赖"""
+    result = subprocess.run([sys.executable, SCRIPT], stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, universal_newlines=True)
+    assert result.returncode == 0, result.stdout
+
+
+def test_cli_help_loads_no_heavy_dependencies():
+    """构建命令行解析器（--help）时同样不加载重型依赖"""
+    code = ("import sys; from StegaPy.cli import build_parser; build_parser().format_help(); "
+            "print(','.join(m for m in ('numpy', 'PIL', 'pywt', 'cryptography') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, universal_newlines=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+
+def test_cli_algorithms_match_crypto_util():
+    """命令行的算法选项与 CryptoUtil 支持的算法一致"""
+    from StegaPy.util.crypto_util import CryptoUtil
+
+    assert ENCRYPTION_ALGORITHMS == CryptoUtil.ALGORITHMS
@@ -0,0 +1,101 @@
+"""
+HTTP 服务测试
+"""
+
+import http.client
+import io
+import socket
+import threading
+
+import pytest
+
+from StegaPy.server import _read_multipart, create_server
+from benchmarks.data import make_cover, make_payload
+
+BOUNDARY = 'stegapy-test-boundary'
+
+
+def encode_multipart(fields):
+    """编码 multipart 请求体，fields 为 [(字段名, 文件名, 数据)]"""
+    body = io.BytesIO()
+    for name, filename, data in fields:
+        body.write(f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{name}\"; "
+                   f"filename=\"{filename}\"\r\nContent-Type: application/octet-stream\r\n\r\n"
+                   .encode('utf-8'))
+        body.write(data)
+        body.write(b'\r\n')
+    body.write(f"--{BOUNDARY}--\r\n".encode('ascii'))
+    return body.getvalue()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64 * 1024])
+def test_read_multipart_chunk_boundaries(chunk_size):
+    """分隔行和字段头跨越读取块时仍能正确切分字段"""
+    payload = b'\r\n--' + BOUNDARY.encode('ascii')[:-1] + b'\r\n' * 3 + bytes(range(256)) * 10
+    body = io.BytesIO(b'preamble\r\n' + encode_multipart([('message', 'a.bin', payload),
+                                                          ('ignored', 'b.bin', b'skip'),
+                                                          ('cover', 'c.png', b'')]))
+    parts = {}
+
+    def open_part(name, filename):
+        if name == 'ignored':
+            return None
+        parts[name] = (filename, io.BytesIO())
+        return parts[name][1]
+
+    _read_multipart(body.read, BOUNDARY.encode('ascii'), open_part, chunk_size)
+    assert parts['message'][0] == 'a.bin'
+    assert parts['message'][1].getvalue() == payload
+    assert parts['cover'][1].getvalue() == b''
+    assert set(parts) == {'message', 'cover'}
+
+
+@pytest.fixture(scope='module')
+def server():
+    """在后台线程中运行的单工作进程服务"""
+    server = create_server(port=0, workers=1, max_body_size=8 * 1024 * 1024)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, path, body, headers=None):
+    """发送请求，返回 (状态码, 响应头, 响应体)"""
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=60)
+    try:
+        connection.request('POST', path, body, dict(headers or {}))
+        response = connection.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        connection.close()
+
+
+def test_embed_extract_streamed(server):
+    """上传按块写入临时目录，结果以 chunked 传输编码返回"""
+    msg = make_payload(300 * 1024, 'random')
+    content_type = f'multipart/form-data; boundary={BOUNDARY}'
+    status, headers, stego = post(server, '/embed?compression=0',
+                                  encode_multipart([('cover', 'cover.png', make_cover(1.0)),
+                                                    ('message', 'm.bin', msg)]),
+                                  {'Content-Type': content_type})
+    assert status == 200
+    assert headers['Transfer-Encoding'] == 'chunked'
+
+    # 请求体使用 chunked 上传，且请求体即为图像
+    status, headers, data = post(server, '/extract', iter([stego[:1000], stego[1000:]]),
+                                 {'Content-Type': 'image/png'})
+    assert status == 200
+    assert headers['Transfer-Encoding'] == 'chunked'
+    assert "filename*=UTF-8''m.bin" in headers['Content-Disposition']
+    assert data == msg
+
+
+def test_chunked_upload_over_limit(server):
+    """chunked 上传的块超过大小限制时，在读取其内容之前返回 413"""
+    with socket.create_connection(server.server_address[:2], timeout=60) as sock:
+        sock.sendall(b'POST /extract HTTP/1.1\r\nHost: test\r\nContent-Type: image/png\r\n'
+                     b'Transfer-Encoding: chunked\r\n\r\n%x\r\n' % (9 * 1024 * 1024))
+        response = sock.makefile('rb').readline()
+    assert response.startswith(b'HTTP/1.1 413')
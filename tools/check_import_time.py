@@ -0,0 +1,105 @@
+"""
+导入耗时检查
+
+在独立的解释器中执行 `python -X importtime -c "import StegaPy"`，统计包的累计导入耗时，
+超过预算或导入了应延迟加载的重型依赖（numpy、PIL、pywt、cryptography）时以非零状态退出。
+默认检查 StegaPy 包和命令行入口 StegaPy.cli。测试套件通过 tests/test_import_time.py 执行本脚本。
+
+用法:
+    python tools/check_import_time.py [--budget 毫秒] [--repeat 次数] [--module 模块名 ...]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = 100.0
+DEFAULT_MODULES = ('StegaPy', 'StegaPy.cli')
+# 只应在首次使用时导入的重型依赖
+DEFERRED_MODULES = ('numpy', 'PIL', 'pywt', 'cryptography')
+
+# import time: self [us] | cumulative | imported package
+LINE_PATTERN = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$')
+
+
+def measure(module):
+    """在新的解释器中导入模块，返回 (累计耗时(微秒), [(模块名, 自身耗时, 累计耗时)])
+
+    累计耗时包括模块及其父包（如 StegaPy.cli 和 StegaPy）的顶层导入。
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+
+    cumulative = None
+    imported = []
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.append((name, int(match.group(1)), int(match.group(2))))
+        # 缩进为1个空格的是顶层导入
+        if len(match.group(3)) == 1 and (name == module or module.startswith(name + '.')):
+            cumulative = (cumulative or 0) + int(match.group(2))
+    if cumulative is None:
+        raise RuntimeError(f"未在 importtime 输出中找到 {module}")
+    return cumulative, imported
+
+
+def check(module, args):
+    """检查单个模块并输出结果，通过时返回 True"""
+    runs = [measure(module) for _ in range(max(1, args.repeat))]
+    best_us, imported = min(runs, key=lambda run: run[0])
+    best_ms = best_us / 1000.0
+
+    passed = True
+    print(f"import {module}: {best_ms:.1f} ms（预算 {args.budget:g} ms，{len(runs)} 次取最小值）")
+    if best_ms > args.budget:
+        print(f"失败: 导入耗时超出预算 {best_ms - args.budget:.1f} ms")
+        passed = False
+
+    loaded = sorted({name.split('.')[0] for name, _, _ in imported} & set(DEFERRED_MODULES))
+    if loaded:
+        print(f"失败: 导入时加载了应延迟导入的依赖: {', '.join(loaded)}")
+        passed = False
+
+    if args.verbose:
+        print(f"共导入 {len(imported)} 个模块，自身耗时最多的模块:")
+        for name, self_us, cumulative_us in sorted(imported, key=lambda item: -item[1])[:15]:
+            print(f"  {self_us / 1000.0:8.2f} ms  {cumulative_us / 1000.0:8.2f} ms  {name}")
+    return passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="检查 StegaPy 包的导入耗时")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"导入耗时预算（毫秒），默认 {DEFAULT_BUDGET_MS:g}")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="测量次数，取最小值以减少抖动，默认 5")
+    parser.add_argument('--module', action='append', dest='modules',
+                        help=f"要检查的模块，可重复指定，默认 {', '.join(DEFAULT_MODULES)}")
+    parser.add_argument('--verbose', action='store_true', help="输出耗时最多的子模块")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules or DEFAULT_MODULES:
+        if not check(module, args):
+            failed = True
+
+    if not failed:
+        print("通过")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
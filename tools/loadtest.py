@@ -0,0 +1,225 @@
+"""
+HTTP 服务负载测试
+
+以固定并发数向 StegaPy HTTP 服务发送请求，统计吞吐量、状态码分布和延迟分位数。
+可以连接已运行的服务（--url），也可以在本进程中启动服务（--spawn）。
+
+用法:
+    python tools/loadtest.py --spawn --workers 2 --queue-size 4 --concurrency 16 --requests 200
+    python tools/loadtest.py --url http://127.0.0.1:8000 --endpoint extract --duration 30
+"""
+
+import argparse
+import http.client
+import io
+import json
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def make_cover(size):
+    """生成随机噪声载体图像（PNG）"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def encode_multipart(files):
+    """编码 multipart/form-data 请求体，files 为 {字段名: (文件名, 数据)}"""
+    boundary = uuid.uuid4().hex
+    body = bytearray()
+    for name, (filename, data) in files.items():
+        body += f"--{boundary}\r\n".encode()
+        body += (f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                 f"Content-Type: application/octet-stream\r\n\r\n").encode()
+        body += data + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+    return bytes(body), f"multipart/form-data; boundary={boundary}"
+
+
+def percentile(values, p):
+    """计算分位数（最近秩法）"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    rank = math.ceil(p / 100.0 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class LoadTest:
+    """负载测试：concurrency 个线程各自保持一个连接，循环发送相同的请求"""
+
+    def __init__(self, url, path, body, content_type, headers, concurrency,
+                 total_requests=None, duration=None, timeout=120.0):
+        """初始化负载测试"""
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = path
+        self.body = body
+        self.headers = dict(headers, **{'Content-Type': content_type})
+        self.concurrency = concurrency
+        self.total_requests = total_requests
+        self.duration = duration
+        self.timeout = timeout
+        self.results = []
+        self._lock = threading.Lock()
+        self._issued = 0
+
+    def _next(self, deadline):
+        """领取下一个请求，达到请求数或时长时返回 False"""
+        with self._lock:
+            if self.total_requests is not None and self._issued >= self.total_requests:
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            self._issued += 1
+            return True
+
+    def _worker(self, deadline):
+        """发送请求的线程"""
+        connection = None
+        while self._next(deadline):
+            if connection is None:
+                connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            start = time.perf_counter()
+            try:
+                connection.request('POST', self.path, body=self.body, headers=self.headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if response.getheader('Connection', '').lower() == 'close':
+                    connection.close()
+                    connection = None
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                connection.close()
+                connection = None
+            with self._lock:
+                self.results.append((status, time.perf_counter() - start))
+        if connection is not None:
+            connection.close()
+
+    def run(self):
+        """执行测试，返回统计结果"""
+        start = time.perf_counter()
+        deadline = start + self.duration if self.duration else None
+        threads = [threading.Thread(target=self._worker, args=(deadline,), daemon=True)
+                   for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.summarize(time.perf_counter() - start)
+
+    def summarize(self, elapsed):
+        """汇总结果"""
+        statuses = Counter(str(status) for status, _ in self.results)
+        ok = [latency for status, latency in self.results if status == 200]
+        rejected = [latency for status, latency in self.results if status in (429, 503)]
+        report = {
+            'requests': len(self.results),
+            'concurrency': self.concurrency,
+            'elapsed': round(elapsed, 3),
+            'throughput': round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            'statuses': dict(sorted(statuses.items())),
+            'latency_ms': {f"p{p}": round(percentile(ok, p) * 1000, 2) for p in PERCENTILES},
+        }
+        report['latency_ms']['max'] = round(max(ok) * 1000, 2) if ok else float('nan')
+        if rejected:
+            report['rejected_latency_ms'] = {f"p{p}": round(percentile(rejected, p) * 1000, 2)
+                                             for p in (50, 99)}
+        return report
+
+
+def print_report(report):
+    """输出易读的测试结果"""
+    print(f"请求数: {report['requests']}  并发: {report['concurrency']}  "
+          f"耗时: {report['elapsed']:.2f}s  吞吐量: {report['throughput']:.2f} req/s（仅统计200）")
+    print("状态码: " + ", ".join(f"{status}={count}" for status, count in report['statuses'].items()))
+    print("成功请求延迟 (ms): " + "  ".join(f"{key}={value:.1f}"
+                                        for key, value in report['latency_ms'].items()))
+    if 'rejected_latency_ms' in report:
+        print("被拒绝请求延迟 (ms): " + "  ".join(f"{key}={value:.1f}"
+                                            for key, value in report['rejected_latency_ms'].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="StegaPy HTTP 服务负载测试")
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help="服务地址")
+    parser.add_argument('--spawn', action='store_true', help="在本进程中启动服务（随机端口）")
+    parser.add_argument('--workers', type=int, help="--spawn 时的工作进程数")
+    parser.add_argument('--queue-size', type=int, help="--spawn 时的等待队列长度")
+    parser.add_argument('--endpoint', default='embed', choices=['embed', 'extract'],
+                        help="测试的接口（默认 embed）")
+    parser.add_argument('--cover', help="载体图像文件，默认生成随机噪声图像")
+    parser.add_argument('--size', type=int, default=512, help="生成的载体图像边长（默认 512）")
+    parser.add_argument('--message-size', type=int, default=4096, help="嵌入的消息大小（字节）")
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help="并发连接数（默认 8）")
+    parser.add_argument('-n', '--requests', type=int, help="请求总数（默认 100，与 --duration 二选一）")
+    parser.add_argument('-d', '--duration', type=float, help="测试时长（秒）")
+    parser.add_argument('--json', action='store_true', help="以 JSON 格式输出结果")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 100
+
+    server = None
+    url = args.url
+    if args.spawn:
+        from StegaPy.server import create_server
+        server = create_server('127.0.0.1', 0, workers=args.workers, queue_size=args.queue_size)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        cover = open(args.cover, 'rb').read() if args.cover else make_cover(args.size)
+        message = os.urandom(args.message_size)
+        body, content_type = encode_multipart({'cover': ('cover.png', cover),
+                                               'message': ('message.bin', message)})
+        path = '/embed?compression=0'
+        if args.endpoint == 'extract':
+            # 先嵌入一次得到隐写图像
+            parts = urlsplit(url)
+            connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+            connection.request('POST', path, body=body, headers={'Content-Type': content_type})
+            response = connection.getresponse()
+            stego = response.read()
+            connection.close()
+            if response.status != 200:
+                print(f"准备隐写图像失败: {response.status} {stego[:200]!r}", file=sys.stderr)
+                return 1
+            body, content_type = encode_multipart({'stego': ('stego.png', stego)})
+            path = '/extract'
+
+        test = LoadTest(url, path, body, content_type, {}, args.concurrency,
+                        args.requests, args.duration)
+        report = test.run()
+        if args.json:
+            print(json.dumps(report, ensure_ascii=False))
+        else:
+            print_report(report)
+        return 0
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())